@@ -0,0 +1,99 @@
+import threading
+import time
+
+# Adaptive sampling: stretch the sampler interval while CPU/RAM are far below the
+# soft limits, tighten it as they approach or cross them. Band changes use separate
+# enter/exit thresholds (hysteresis) so the rate does not flap around a boundary.
+# Headroom = limit - value, taking the tighter of CPU and RAM.
+
+STATE_IDLE = "IDLE"
+STATE_NORMAL = "NORMAL"
+STATE_FAST = "FAST"
+
+DEFAULT_BANDS = {
+    "intervals": {STATE_IDLE: 10.0, STATE_NORMAL: 1.0, STATE_FAST: 0.25},
+    "fast_enter": 10.0,  # headroom (pts) below which we go FAST
+    "fast_exit": 15.0,   # ...and above which we leave FAST
+    "idle_enter": 35.0,  # headroom above which we may go IDLE
+    "idle_exit": 25.0,   # ...and below which we leave IDLE
+    "idle_after": 5,     # consecutive calm samples before going IDLE
+}
+
+class AdaptiveRate:
+    def __init__(self, limits, bands=None, base_interval=1.0, clock=time.monotonic):
+        self.limits = limits # callable -> (cpu_limit, ram_limit)
+        self.bands = dict(DEFAULT_BANDS, **(bands or {}))
+        self.intervals = dict(self.bands["intervals"])
+        self.base_interval = base_interval # the fixed rate we are compared against
+        self.clock = clock
+        self.state = STATE_NORMAL
+        self.calm = 0
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.started = None
+        self.samples = 0
+        self.transitions = 0
+        self.time_in = {STATE_IDLE: 0.0, STATE_NORMAL: 0.0, STATE_FAST: 0.0}
+        self.state_since = None
+
+    def set_bands(self, bands=None):
+        # Recalibration: new thresholds / intervals, state and counters carry on
+        with self.lock:
+            self.bands = dict(DEFAULT_BANDS, **(bands or {}))
+            self.intervals = dict(self.bands["intervals"])
+
+    def interval(self):
+        return self.intervals[self.state]
+
+    def headroom(self, snap):
+        cpu_limit, ram_limit = self.limits()
+        return min(cpu_limit - snap.cpu, ram_limit - snap.ram)
+
+    def update(self, snap):
+        # Returns the interval to use until the next sample
+        now = self.clock()
+        with self.lock:
+            if self.started is None: self.started = self.state_since = now
+            self.samples += 1
+            headroom = self.headroom(snap)
+            b = self.bands
+            state = self.state
+            if headroom < b["fast_enter"]:
+                state = STATE_FAST
+                self.calm = 0
+            elif state == STATE_FAST:
+                if headroom > b["fast_exit"]: state = STATE_NORMAL
+            elif state == STATE_IDLE:
+                if headroom < b["idle_exit"]: state = STATE_NORMAL
+            elif headroom > b["idle_enter"]:
+                self.calm += 1
+                if self.calm >= b["idle_after"]: state = STATE_IDLE
+            else:
+                self.calm = 0
+            changed = state != self.state
+            if changed:
+                self.time_in[self.state] += now - self.state_since
+                self.state_since = now
+                self.state = state
+                self.calm = 0
+                self.transitions += 1
+            listeners = list(self.listeners) if changed else []
+        for callback in listeners:
+            try: callback(state)
+            except Exception: pass
+        return self.intervals[state]
+
+    def on_change(self, callback):
+        with self.lock: self.listeners.append(callback)
+
+    def stats(self):
+        with self.lock:
+            now = self.clock()
+            elapsed = (now - self.started) if self.started is not None else 0.0
+            time_in = dict(self.time_in)
+            if self.state_since is not None: time_in[self.state] += now - self.state_since
+            fixed = elapsed / self.base_interval
+            return {"state": self.state, "interval": self.intervals[self.state], "samples": self.samples,
+                    "fixed_rate_samples": int(fixed), "wakeups_saved": int(fixed) - self.samples,
+                    "transitions": self.transitions, "elapsed_s": round(elapsed, 1),
+                    "time_in_s": {k: round(v, 1) for k, v in time_in.items()}}
@@ -0,0 +1,619 @@
+import os
+import sys
+import json
+import time
+import tempfile
+
+# Engine micro-benchmarks. Usage: python benchmarks.py [name ...]  (no name = run all)
+
+def timed(fn, repeat=5):
+    # Median wall time in milliseconds
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+# --- NEXUS MEMORY: full JSON rewrite vs journal ---
+def bench_journal():
+    from journal import MemoryJournal, apply_quantum_spike, COMPACT_EVERY
+
+    print(f"{'history':>10} | {'full rewrite ms':>15} | {'journal save ms':>15} | {'compaction ms':>13} | {'amortized ms':>12}")
+    for size in (1000, 100000, 1000000):
+        history = {f"app_{i}.exe": {"spikes": i % 50, "type": "CPU" if i % 2 else "RAM"} for i in range(size)}
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_path = os.path.join(tmp, "legacy.json")
+            def full_rewrite():
+                with open(legacy_path, 'w') as f: json.dump(history, f)
+            full_ms = timed(full_rewrite, repeat=3)
+
+            journal = MemoryJournal(os.path.join(tmp, "memory.json"), apply_quantum_spike, compact_every=10**9)
+            journal.state = history
+            def journal_save():
+                journal.append({"app": "app_1.exe", "type": "CPU"})
+                journal.flush()
+            save_ms = timed(journal_save, repeat=20)
+            compact_ms = timed(journal.compact, repeat=3)
+            journal.closed = True
+
+        amortized = save_ms + compact_ms / COMPACT_EVERY
+        print(f"{size:>10} | {full_ms:>15.2f} | {save_ms:>15.3f} | {compact_ms:>13.2f} | {amortized:>12.3f}")
+
+# --- LONG-TERM HISTORY: mmap open + range query ---
+def bench_binlog():
+    from binlog import HistoryLog, RECORD, KIND_SAMPLE
+
+    year = 365 * 24 * 3600
+    step = 10 # one year of samples at 10s resolution (~3.2M records)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.bin")
+        HistoryLog(path).close()
+        t0 = 1.7e9
+        with open(path, 'ab') as f:
+            chunk = 100000
+            for base in range(0, year // step, chunk):
+                f.write(b"".join(RECORD.pack(t0 + (base + i) * step, KIND_SAMPLE, 0, 0, 0, 50.0, 40.0) for i in range(chunk)))
+        size_mb = os.path.getsize(path) / 1e6
+
+        log = None
+        def open_log():
+            nonlocal log
+            if log: log.close()
+            log = HistoryLog(path)
+        open_ms = timed(open_log)
+        hour_ms = timed(lambda: log.query(t0 + year / 2, t0 + year / 2 + 3600))
+        day_ms = timed(lambda: log.query(t0 + year / 2, t0 + year / 2 + 86400))
+        print(f"records={log.count()} size={size_mb:.1f}MB open={open_ms:.3f}ms query(1h)={hour_ms:.3f}ms query(1d)={day_ms:.3f}ms")
+        log.close()
+
+# --- PROCESS TABLE: refresh cost with 2000+ processes ---
+def bench_proctable(target=2000):
+    import subprocess
+    from proctable import ProcessTable
+
+    children = []
+    if os.name != 'nt':
+        # Pad the machine with idle processes up to the target count
+        import psutil # type: ignore
+        for _ in range(max(0, target - len(psutil.pids()))):
+            children.append(subprocess.Popen(["sleep", "120"]))
+    try:
+        table = ProcessTable(budget_ms=10**9)
+        t0 = time.perf_counter(); c0 = time.process_time()
+        table.refresh()
+        cold_wall, cold_cpu = (time.perf_counter() - t0) * 1000, (time.process_time() - c0) * 1000
+        time.sleep(0.5)
+        warm = []
+        for _ in range(5):
+            table.refresh()
+            warm.append(table.stats["last_cpu_ms"])
+            time.sleep(0.2)
+        warm.sort()
+        print(f"processes={len(table)} cold scan={cold_wall:.1f}ms wall/{cold_cpu:.1f}ms cpu warm scan median={warm[2]:.1f}ms cpu max={warm[-1]:.1f}ms cpu")
+        print(f"top(5) by cpu: {table.top(5)}")
+    finally:
+        for child in children: child.kill()
+        for child in children: child.wait()
+
+# --- STARTUP: headless import + cold start budget ---
+IMPORT_BUDGET_MS = 250.0
+COLD_START_BUDGET_MS = 750.0
+GUI_MODULES = ("customtkinter", "tkinter", "pystray", "PIL", "humanize")
+
+def bench_startup():
+    import subprocess
+    here = os.path.dirname(os.path.abspath(__file__))
+    probe = (
+        "import sys, time, json; t0 = time.perf_counter();"
+        "import nexus_core; t1 = time.perf_counter();"
+        "titan, nexus = nexus_core.start_engine(); titan.scan_hardware(); nexus.sampler.snapshot(); t2 = time.perf_counter();"
+        f"gui = [m for m in {GUI_MODULES!r} if m in sys.modules];"
+        "print(json.dumps({'import_ms': (t1 - t0) * 1000, 'start_ms': (t2 - t1) * 1000, 'gui': gui}))"
+    )
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=here)
+        for _ in range(5):
+            t0 = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", probe], cwd=tmp, env=env, capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            result["process_ms"] = (time.perf_counter() - t0) * 1000
+            runs.append(result)
+    med = lambda key: sorted(r[key] for r in runs)[len(runs) // 2]
+    gui = sorted({m for r in runs for m in r["gui"]})
+    print(f"import nexus_core={med('import_ms'):.1f}ms (budget {IMPORT_BUDGET_MS:.0f}) cold start (engine ready)={med('start_ms'):.1f}ms (budget {COLD_START_BUDGET_MS:.0f}) whole process={med('process_ms'):.1f}ms")
+    print(f"GUI modules loaded headless: {gui or 'none'}")
+    return not gui and med("import_ms") <= IMPORT_BUDGET_MS and med("start_ms") <= COLD_START_BUDGET_MS
+
+# --- SCHEDULER: toggle storm + jitter ---
+def bench_scheduler():
+    import threading
+    from scheduler import Scheduler
+
+    sched = Scheduler().start()
+    sched.every("telemetry.sample", 0.1, lambda: None)
+    sched.every("nexus.neural", 0.2, lambda: time.sleep(0.002))
+    threads_before = threading.active_count()
+    for _ in range(500):
+        # APEX/TRINITY toggled on and off as fast as a user could click
+        sched.every("boost.priority", 0.5, lambda: None, first_delay=0)
+        sched.every("boost.priority", 0.5, lambda: None, first_delay=0)
+        sched.cancel("boost.priority")
+    sched.every("boost.priority", 0.5, lambda: None, first_delay=0)
+    threads_after = threading.active_count()
+    time.sleep(3)
+    stats = sched.stats()
+    sched.stop()
+    print(f"threads before/after 500 toggles: {threads_before}/{threads_after} wakeups in 3s: {stats['wakeups']}")
+    for name, job in stats["jobs"].items():
+        print(f"  {name:<18} runs={job['runs']:<3} jitter avg={job['jitter_avg_ms']}ms max={job['jitter_max_ms']}ms skipped={job['skipped']}")
+    return threads_before == threads_after
+
+# --- ADAPTIVE SAMPLING: wakeups vs fixed 1s polling on a synthetic day ---
+def bench_adaptive():
+    import math
+    import random
+    from collections import namedtuple
+    from adaptive import AdaptiveRate
+
+    Snap = namedtuple("Snap", ["cpu", "ram"])
+    rng = random.Random(7)
+    clock = [0.0]
+    rate = AdaptiveRate(lambda: (85, 85), clock=lambda: clock[0])
+    def load_at(t):
+        # Mostly idle desk machine with a 2h gaming session and short compile bursts
+        base = 8 + 4 * math.sin(t / 3600.0)
+        if 14 * 3600 <= t < 16 * 3600: base = 70 + 20 * math.sin(t / 30.0)
+        elif int(t) % 5400 < 120: base = 92
+        return min(100.0, max(0.0, base + rng.uniform(-3, 3)))
+    while clock[0] < 24 * 3600:
+        cpu = load_at(clock[0])
+        clock[0] += rate.update(Snap(cpu, 40.0))
+    stats = rate.stats()
+    print(f"samples={stats['samples']} fixed-rate={stats['fixed_rate_samples']} wakeups saved={stats['wakeups_saved']} "
+          f"({stats['wakeups_saved'] * 100.0 / stats['fixed_rate_samples']:.1f}%) transitions={stats['transitions']}")
+    print(f"time in state: {stats['time_in_s']}")
+
+# --- ORACLE: lead time / false positives on a synthetic ramp trace ---
+def bench_oracle():
+    import random
+    from oracle import evaluate
+
+    rng = random.Random(3)
+    trace, t, value = [], 0.0, 40.0
+    while t < 6 * 3600:
+        # Quiet noise with a ramp towards a spike every ~10 minutes (a game loading, a build starting)
+        phase = t % 600
+        if 500 <= phase < 530: value = 55 + (phase - 500) * 1.5 + rng.uniform(-2, 2)
+        elif 530 <= phase < 560: value = 97 + rng.uniform(-2, 2)
+        else: value = 40 + rng.uniform(-8, 8)
+        trace.append((t, value))
+        t += 1.0
+    result = evaluate(trace, 85.0)
+    print(f"samples={len(trace)} {result}")
+
+# --- CORTEX: per-app sketches (fixed size, accuracy, merge) ---
+def bench_sketches():
+    import random
+    from sketches import AppProfile, encode_profiles
+
+    rng = random.Random(5)
+    print(f"{'spike ticks':>11} | {'persisted B':>11} | {'p50 err':>7} | {'p90 err':>7} | {'update us':>9}")
+    for n in (100, 10000, 1000000):
+        profile = AppProfile()
+        values = [min(100.0, max(0.0, rng.gauss(88, 5))) for _ in range(n)]
+        t0 = time.perf_counter()
+        for i, v in enumerate(values): profile.observe_spike(i, "CPU", v, v)
+        update_us = (time.perf_counter() - t0) / n * 1e6
+        values.sort()
+        exact = lambda q: values[int(q * (n - 1))]
+        size = len(json.dumps(profile, default=encode_profiles))
+        print(f"{n:>11} | {size:>11} | {abs(profile.cpu.quantile(0.5) - exact(0.5)):>7.2f} | {abs(profile.cpu.quantile(0.9) - exact(0.9)):>7.2f} | {update_us:>9.2f}")
+
+    # Two sessions / machines merge into the same distribution as one combined stream
+    a, b, both = AppProfile(), AppProfile(), AppProfile()
+    for i in range(5000):
+        v = rng.uniform(80, 100)
+        (a if i % 2 else b).observe_spike(i, "RAM", v, v)
+        both.observe_spike(i, "RAM", v, v)
+    merged = a.merge(b)
+    print(f"merge exact: {merged.cpu.counts == both.cpu.counts and merged.mix == both.mix}")
+
+# --- TEMP CLEANER: synthetic tree, cold vs incremental runs ---
+def bench_tempclean(files=500000, per_dir=1000):
+    from tempclean import TempCleaner, format_report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "temp")
+        old = time.time() - 2 * 86400
+        t0 = time.perf_counter()
+        for d in range(files // per_dir):
+            path = os.path.join(root, f"d{d // 32}", f"s{d}")
+            os.makedirs(path)
+            for i in range(per_dir):
+                name = os.path.join(path, f"f{i}.tmp")
+                with open(name, 'wb') as f: f.write(b"x" * (i % 8) * 512)
+                if i % 2: os.utime(name, (old, old)) # half the files are past the age policy
+        print(f"built {files} files in {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        walked = sum(len(names) for _, _, names in os.walk(root))
+        print(f"{'legacy os.walk (list only)':<28} {walked} files in {time.perf_counter() - t0:.2f}s")
+
+        index = os.path.join(tmp, "index.json")
+        for label, dry_run in (("cold dry-run", True), ("clean", False), ("rerun (dirs changed)", False), ("rerun (unchanged)", False)):
+            cleaner = TempCleaner(root, index_path=index, ops_per_s=None)
+            report = cleaner.run(dry_run=dry_run)
+            print(f"{label:<28} scan {report['scan_s']:.2f}s | {format_report(report)}")
+
+# --- VIEW MODEL: widget operations per frame (fake widget backend) ---
+def bench_viewmodel(seconds=60, frames_per_s=10):
+    from viewmodel import ViewModel, FakeBackend, FakeWidget
+
+    backend = FakeBackend()
+    view = ViewModel(backend, scrollback=200)
+    widgets = {key: FakeWidget(key) for key in ("cpu.text", "cpu.color", "cpu.bar", "ram.text", "ram.color", "ram.bar", "ai.text", "ai.color")}
+    for key, widget in widgets.items(): view.bind(key, widget)
+    console = FakeWidget("console")
+    view.bind_console(console)
+
+    legacy_ops, idle_ops = 0, 0
+    for second in range(seconds):
+        # One engine update per second: values mostly steady, a burst of feed lines every 10s
+        cpu, ram = (40 if second % 20 < 15 else 95), 60
+        view.update({"cpu.text": f"{cpu}%", "cpu.color": "white" if cpu <= 90 else "red", "cpu.bar": cpu / 100,
+                     "ram.text": f"{ram}%", "ram.color": "white", "ram.bar": ram / 100, "ai.text": "ACTIVE", "ai.color": "green"})
+        burst = 37 if second % 10 == 0 else 0
+        for i in range(burst): view.log(f"SENTINEL: RAM Critical ({i})")
+        legacy_ops += len(widgets) + burst * 2 # configure every widget + insert/see per line
+        for frame in range(frames_per_s):
+            ops = view.render()
+            if frame: idle_ops += ops
+    print(f"frames={view.stats['frames']} idle_frames={view.stats['idle_frames']} widget_ops={backend.ops} legacy_ops={legacy_ops} "
+          f"ops_in_idle_frames={idle_ops} console_lines={len(console.lines)}")
+    return idle_ops == 0 and len(console.lines) <= 200
+
+# --- TELEMETRY API: hundreds of concurrent clients, server cost per request ---
+def bench_api(rounds=(1, 10, 100, 500), requests=40):
+    import asyncio
+    import random
+    import threading
+    from types import SimpleNamespace
+    from telemetry import TelemetrySnapshot
+    from timeseries import TimeSeriesStore
+    from journal import MemoryJournal, apply_quantum_spike
+    from telemetry_api import TelemetryAPI
+
+    rng = random.Random(11)
+    now = time.time()
+    store = TimeSeriesStore()
+    for i in range(3600):
+        store.record_snapshot(TelemetrySnapshot(now - 3600 + i, i, rng.uniform(5, 95), rng.uniform(30, 80), 0, 0))
+    for a in range(64):
+        for i in range(600): store.record_app(f"app_{a}.exe", now - 600 + i, rng.uniform(0, 100), rng.uniform(0, 100))
+    queries = [{"q": "current"}, {"q": "window", "metric": "cpu", "seconds": 3600, "stat": "p95"},
+               {"q": "apps"}, {"q": "app", "name": "app_3.exe"}, {"q": "metrics"}]
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = MemoryJournal(os.path.join(tmp, "memory.json"), apply_quantum_spike, durable=False)
+        history = journal.load()
+        for i in range(5000): journal.append({"app": f"app_{i % 200}.exe", "type": "CPU", "ts": now - i, "cpu": 90.0, "ram": 60.0, "start": i % 10 == 0})
+        # The engine ticks at 10 Hz during the test (answers must track new samples)
+        latest = [TelemetrySnapshot(now, 1, 40.0, 50.0, 4 << 30, 16 << 30)]
+        sampler = SimpleNamespace(snapshot=lambda: latest[0])
+        nexus = SimpleNamespace(sampler=sampler, timeseries=store, journal=journal, history=history, is_active=True,
+                                cpu_limit_soft=85, ram_limit_soft=85, signals=SimpleNamespace(latest={"disk_busy": 3.0}))
+        running = [True]
+        def ticker():
+            while running[0]:
+                s = latest[0]
+                latest[0] = TelemetrySnapshot(time.time(), s.seq + 1, rng.uniform(5, 95), 50.0, s.ram_used, s.ram_total)
+                time.sleep(0.1)
+        threading.Thread(target=ticker, daemon=True).start()
+        api = TelemetryAPI(nexus, socket_path=os.path.join(tmp, "api.sock"), http_port=0).start()
+
+        async def client(n, latencies):
+            reader, writer = await asyncio.open_unix_connection(api.socket_path, limit=1 << 22)
+            for i in range(requests):
+                t0 = time.perf_counter()
+                writer.write(json.dumps(queries[(n + i) % len(queries)]).encode() + b"\n")
+                line = await reader.readline()
+                latencies.append(time.perf_counter() - t0)
+                if not line.startswith(b'{"ok":true'): raise RuntimeError(line[:200])
+            writer.close()
+        async def http_client(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\nGET /v1/window?metric=ram&seconds=600 HTTP/1.1\r\nConnection: close\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            return data.count(b"HTTP/1.1 200 OK") == 2 and b"nexus_cpu_percent" in data
+        async def round_trip(clients):
+            latencies = []
+            await asyncio.gather(*(client(n, latencies) for n in range(clients)))
+            return latencies
+
+        # serve us/req: server CPU per answer excluding renders; renders/tick: work tied to new samples, not to clients
+        print(f"{'clients':>7} | {'requests':>8} | {'req/s':>7} | {'p50 ms':>6} | {'p99 ms':>6} | {'serve us/req':>12} | {'renders/tick':>12}")
+        per_request, per_tick = [], []
+        for clients in rounds:
+            before, cache_before, seq = dict(api.stats), dict(api.cache.stats), latest[0].seq
+            t0 = time.perf_counter()
+            latencies = sorted(asyncio.run(round_trip(clients)))
+            elapsed = time.perf_counter() - t0
+            served = api.stats["requests"] - before["requests"]
+            render_s = api.cache.stats["render_s"] - cache_before["render_s"]
+            us = (api.stats["cpu_s"] - before["cpu_s"] - render_s) / served * 1e6
+            renders = (api.cache.stats["renders"] - cache_before["renders"]) / max(1, latest[0].seq - seq)
+            per_request.append(us)
+            per_tick.append(renders)
+            print(f"{clients:>7} | {served:>8} | {served / elapsed:>7.0f} | {latencies[len(latencies) // 2] * 1000:>6.2f} | "
+                  f"{latencies[int(len(latencies) * 0.99)] * 1000:>6.2f} | {us:>12.1f} | {renders:>12.1f}")
+        http_ok = asyncio.run(http_client(api.address()))
+        running[0] = False
+        api.stop()
+        journal.close()
+    print(f"http ok: {http_ok} peak clients: {api.stats['peak_clients']} errors: {api.stats['errors']} rejected: {api.stats['rejected']}")
+    # Flat: per-answer cost with hundreds of clients within 2x of 10 clients, renders bounded by the query mix
+    return http_ok and api.stats["errors"] == 0 and per_request[-1] <= 2 * per_request[1] and max(per_tick) <= 2 * len(queries)
+
+# --- DIAGNOSTICS: cost of the instrumentation itself ---
+def bench_diagnostics(n=200000):
+    from diagnostics import Instruments, get_instruments
+    from proctable import ProcessTable
+
+    inst = Instruments()
+    def bare(): pass
+    t0 = time.perf_counter()
+    for _ in range(n): bare()
+    base = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with inst.measure("cortex_analyze"): pass
+    measure_us = (time.perf_counter() - t0 - base) / n * 1e6
+    t0 = time.perf_counter()
+    for _ in range(n): inst.count("bench")
+    count_us = (time.perf_counter() - t0 - base) / n * 1e6
+
+    # The call sites report what they made; psutil itself is never wrapped
+    shared = get_instruments()
+    table = ProcessTable()
+    before = shared.psutil_total
+    with shared.measure("bench_scan"): table.refresh(force=True)
+    reported = shared.psutil_total - before
+    per_run = shared.loops["bench_scan"].psutil_calls
+    print(f"measure(): {measure_us:.2f}us per loop run | count(): {count_us:.2f}us per report | one refresh of {len(table)} processes "
+          f"reported {reported} psutil calls ({per_run} attributed to the loop)")
+    # A 2s neural tick runs a handful of measured loops: the bookkeeping has to stay in the microseconds
+    return measure_us < 20 and count_us < 5 and reported > len(table) and per_run == reported and inst.psutil_total == n
+
+def write_synthetic_trace(path, hours=1.0, procs=200, seed=7):
+    # 1 Hz snapshots + 2 s ticks: a RAM ramp every 10 minutes, CPU bursts, process churn, foreground switches
+    import random
+    from replay import open_trace, TRACE_VERSION
+    rng = random.Random(seed)
+    start = 1.7e9
+    table = {(1000 + i, start - 10.0): f"app{i % 40}" for i in range(procs)}
+    next_pid = 1000 + procs
+    with open_trace(path, "wt") as f:
+        def write(record): f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        write({"t": "meta", "version": TRACE_VERSION, "started": start, "host": "synthetic", "cpu_count": 8, "interval": 1.0,
+               "adaptive": True, "limits": [85, 85]})
+        new = [[pid, ct, name] for (pid, ct), name in table.items()]
+        for i in range(int(hours * 3600)):
+            ts = start + i
+            phase = i % 600
+            ram = 60 + (phase - 400) * 0.2 if 400 <= phase < 560 else 60 + rng.random() * 3
+            cpu = 95 if 100 <= phase < 130 else 20 + rng.random() * 20
+            write({"t": "snap", "ts": ts, "seq": i + 1, "cpu": cpu, "ram": ram, "used": int(ram * 1.6e8), "total": 16000000000})
+            if i % 2: continue
+            gone = []
+            if rng.random() < 0.2:
+                key = rng.choice(list(table))
+                del table[key]
+                gone.append(list(key))
+                table[(next_pid, ts)] = f"app{rng.randrange(40)}"
+                new.append([next_pid, ts, table[(next_pid, ts)]])
+                next_pid += 1
+            keys = list(table)
+            changed = rng.sample(keys, 20)
+            fg = keys[(i // 120) % len(keys)]
+            write({"t": "tick", "ts": ts, "fg": [fg[0], table[fg]], "sig": {"psi_cpu_some": rng.random() * 5}, "io": [],
+                   "new": new, "gone": gone, "cpu": [[pid, ct, round(rng.random() * cpu / 10, 1)] for pid, ct in changed],
+                   "rss": [[pid, ct, rng.randrange(1 << 20, 1 << 31)] for pid, ct in changed]})
+            new = []
+
+def bench_replay(hours=1.0):
+    from replay import replay, compare
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.jsonl.gz")
+        write_synthetic_trace(path, hours)
+        effects = {"flux_capacitor": ("ram", -10.0, 60.0)}
+        base = replay(path, effects=effects)
+        again = replay(path, effects=effects)
+        relaxed = replay(path, lambda nexus: setattr(nexus, "ram_limit_soft", 90), effects)
+    diff = compare(base, relaxed)
+    deterministic = base["decisions"] == again["decisions"] and base["actions"] == again["actions"]
+    print(f"{base['sim_s'] / 3600:.1f} simulated h in {base['wall_s']:.2f}s ({base['speedup']}x) | engine CPU "
+          f"{base['cpu_s_per_sim_hour']:.2f}s per simulated hour | {len(base['decisions'])} decisions, "
+          f"{len(base['actions'])} actions | deterministic: {deterministic}")
+    print(f"ram_limit_soft 85 -> 90: actions {diff['actions']}, spikes {diff['spikes']}, decisions {diff['decisions']}")
+    # Replay has to be fast enough to re-run a day of traces on every policy change
+    return base["speedup"] >= 100 and deterministic
+
+def bench_calibration():
+    from calibration import run_calibration, compare, format_run
+    first = run_calibration()
+    second = run_calibration()
+    second["compare"] = compare(second, [first])
+    print(format_run(second))
+    outside = [c["metric"] for c in second["compare"] if c["outside"]]
+    # A real regression persists: the same machine looking 40% slower (than its slower run so far) twice in a row is flagged
+    slowest = min(first["disk"]["write_mb_s"], second["disk"]["write_mb_s"])
+    slow = dict(second, disk=dict(second["disk"], write_mb_s=slowest * 0.6))
+    slow["compare"] = compare(slow, [first, second])
+    slower = dict(slow, compare=compare(slow, [first, second, slow]))
+    caught = "disk.write_mb_s" in [c["metric"] for c in slower["compare"] if c["regression"]]
+    noisy = [c["metric"] for c in second["compare"] if c["regression"]]
+    print(f"calibration took {first['duration_s']:.1f}s / {second['duration_s']:.1f}s | outside band: {outside or 'none'} | "
+          f"run-to-run regressions flagged: {noisy or 'none'} | repeated 40% disk drop flagged: {caught}")
+    # Has to stay short enough to run at install time / on demand from the dashboard
+    return max(first["duration_s"], second["duration_s"]) < 15 and not noisy and caught
+
+def bench_manifest(n=200):
+    from hardware import scan_manifest, save_manifest, load_manifest, identity, is_fresh
+    t0 = time.perf_counter()
+    for _ in range(20): manifest = scan_manifest()
+    scan_ms = (time.perf_counter() - t0) / 20 * 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hardware.json")
+        ident = identity()
+        save_manifest(manifest, ident, path)
+        t0 = time.perf_counter()
+        for _ in range(n): fresh = is_fresh(load_manifest(path), identity())
+        cached_ms = (time.perf_counter() - t0) / n * 1000
+    print(f"full scan {scan_ms:.2f}ms | cached read (incl. identity check) {cached_ms:.3f}ms | fresh: {fresh} | "
+          f"topology: {'yes' if manifest.get('topology') else 'no'}")
+    # Startup only ever pays the cached read; the scan runs on a background thread
+    return fresh and cached_ms < 5
+
+def synthetic_policy(rules=1000, names=400, seed=11):
+    # Mix seen in real rule files: per-app rules, numeric thresholds, system rules, a few free-form scans
+    import random
+    rng = random.Random(seed)
+    out = []
+    for i in range(rules):
+        kind = rng.random()
+        if kind < 0.45:
+            when = [["proc.name", "==", f"app{rng.randrange(names)}.exe"], ["proc.rss", ">", rng.randrange(1, 4000) << 20]]
+        elif kind < 0.8:
+            field, low, high = rng.choice([("cpu", 20, 95), ("rss", 1 << 30, 8 << 30), ("age", 3600, 86400)])
+            when = [["ram", ">", rng.randrange(50, 95)], [f"proc.{field}", ">", rng.randrange(low, high)]]
+        elif kind < 0.95:
+            when = [["cpu", ">", rng.randrange(50, 99)], {"any": [["psi_io_full", ">", 10], ["app.heavy", "==", True]]}]
+        else:
+            when = [["proc.name", "startswith", f"app{rng.randrange(names)}"], ["proc.foreground", "==", False]]
+        out.append({"name": f"r{i}", "when": when, "then": "notify"})
+    return {"rules": out}
+
+def bench_policy(rules=1000, procs=2000, rounds=20):
+    import random
+    from policy import CompiledPolicy, compile_node
+    rng = random.Random(5)
+    spec = synthetic_policy(rules)
+    t0 = time.perf_counter()
+    compiled = CompiledPolicy(spec)
+    compile_ms = (time.perf_counter() - t0) * 1000
+    views = [(pid, f"app{rng.randrange(600)}.exe", rng.random() * 30, rng.randrange(1, 2000) << 20, rng.random() * 7200, pid == 100)
+             for pid in range(100, 100 + procs)]
+    ctx = {"cpu": 96.0, "ram": 91.0, "psi_io_full": 12.0, "app.heavy": True}
+    t0 = time.perf_counter()
+    for _ in range(rounds): fired, matches = compiled.evaluate(ctx, views)
+    tick_ms = (time.perf_counter() - t0) / rounds * 1000
+    # Baseline: every rule's full condition tree interpreted against every process
+    naive = [(rule, compile_node(rule["when"])[0]) for rule in spec["rules"]]
+    t0 = time.perf_counter()
+    expected = sum(1 for rule, fn in naive if not any(c[0].startswith("proc.") for c in rule["when"] if isinstance(c, list)) and fn(ctx))
+    expected += sum(1 for rule, fn in naive if any(c[0].startswith("proc.") for c in rule["when"] if isinstance(c, list)) for p in views if fn(ctx, p))
+    naive_ms = (time.perf_counter() - t0) * 1000
+    ok = expected == len(fired) + len(matches)
+    print(f"{rules} rules x {procs} procs: compile {compile_ms:.1f}ms | tick {tick_ms:.2f}ms (naive {naive_ms:.0f}ms, {naive_ms / tick_ms:.0f}x) | "
+          f"{len(fired)} system + {len(matches)} process matches ({'same' if ok else 'DIFFERENT'} as naive)")
+    # Well inside one neural tick (2s), and the same answers as the interpreter
+    return ok and tick_ms < 50
+
+def bench_launch(launches=20, gap=0.37):
+    import subprocess
+    from scheduler import Scheduler
+    from proctable import ProcessTable
+    from priority import PriorityManager
+    from launch import LaunchProfiles
+    # Real processes, real pid-list polling: time from create_time to the profile being in place
+    sched = Scheduler().start()
+    table = ProcessTable()
+    table.refresh()
+    priority = PriorityManager(proctable=table)
+    profile = {"app": "sleep", "dominant": "CPU", "level": "high", "isolate": True, "trim": True, "fast": True}
+    events = {"trim": 0, "tighten": []}
+    watcher = LaunchProfiles(table, sched, lambda name: profile if name == "sleep" else None, priority=priority,
+                             trim=lambda: events.__setitem__("trim", events["trim"] + 1), tighten=events["tighten"].append).start()
+    children = []
+    for _ in range(launches):
+        time.sleep(gap) # lands anywhere inside the poll interval
+        children.append(subprocess.Popen(["sleep", "30"]))
+    time.sleep(0.5)
+    pinned = len(priority.pinned)
+    for child in children: child.kill(); child.wait()
+    time.sleep(0.6)
+    summary = watcher.summary()
+    sched.stop()
+    watcher.stop()
+    lat = summary["latency"]
+    print(f"{launches} launches: apply latency p50 {lat['p50_ms']}ms p90 {lat['p90_ms']}ms max {lat['max_ms']}ms (target {lat['target_ms']:.0f}) | "
+          f"late {summary['late']} | pinned {pinned} -> {len(priority.pinned)} after exit | trims {events['trim']} | tighten {events['tighten']} | "
+          f"poll {summary['poll_ms_max']:.2f}ms max, priority {priority.stats}")
+    return lat["samples"] == launches and lat["max_ms"] < lat["target_ms"] and not priority.pinned and events["tighten"] == [True, False]
+
+# --- WATCHDOG: a killed or frozen worker is replaced, the UI keeps its last values meanwhile ---
+def bench_watchdog(heartbeat_timeout=2.0, recover_s=15.0):
+    import signal
+    from engine_process import EngineProcess
+    def wait_for(test, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            snap = engine.snapshot()
+            if snap is not None and test(snap): return time.monotonic()
+            time.sleep(0.05)
+        return None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp) # the worker writes its memory/history files into the working directory
+        engine = EngineProcess(heartbeat_timeout=heartbeat_timeout).start()
+        try:
+            ready = wait_for(lambda s: True, recover_s) is not None
+            faults, recovered = [("crash", signal.SIGKILL)], []
+            if hasattr(signal, "SIGSTOP"): faults.append(("hang", signal.SIGSTOP))
+            for fault, sig in faults:
+                pid, t0 = engine.process.pid, time.monotonic()
+                os.kill(pid, sig) # from outside, the way a real crash or freeze happens
+                before = engine.snapshot() # the shared block outlives the worker
+                t1 = wait_for(lambda s: s.pid != pid and s.heartbeat > time.time() - 1, recover_s)
+                recovered.append((fault, None if t1 is None else t1 - t0, before is not None, engine.call("ping") == engine.process.pid))
+        finally:
+            engine.stop()
+            os.chdir(cwd)
+    for fault, seconds, kept, answers in recovered:
+        print(f"{fault}: {'recovered in %.1fs' % seconds if seconds is not None else 'NOT recovered'} | last values kept: {kept} | answers calls: {answers}")
+    print(f"starts {engine.stats['starts']} restarts {engine.stats['restarts']} call errors {engine.stats['call_errors']}")
+    return ready and all(seconds is not None and kept and answers for _, seconds, kept, answers in recovered)
+
+BENCHMARKS = {
+    "journal": bench_journal,
+    "binlog": bench_binlog,
+    "proctable": bench_proctable,
+    "startup": bench_startup,
+    "scheduler": bench_scheduler,
+    "adaptive": bench_adaptive,
+    "oracle": bench_oracle,
+    "sketches": bench_sketches,
+    "tempclean": bench_tempclean,
+    "viewmodel": bench_viewmodel,
+    "api": bench_api,
+    "diagnostics": bench_diagnostics,
+    "replay": bench_replay,
+    "calibration": bench_calibration,
+    "manifest": bench_manifest,
+    "policy": bench_policy,
+    "launch": bench_launch,
+    "watchdog": bench_watchdog,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    failed = []
+    for name in names:
+        print(f"== {name} ==")
+        if BENCHMARKS[name]() is False: failed.append(name)
+    if failed:
+        print(f"OVER BUDGET: {', '.join(failed)}")
+        sys.exit(1)
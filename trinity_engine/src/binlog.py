@@ -0,0 +1,203 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+# Compact long-term history: fixed 24-byte records, appended in time order and
+# read back through mmap. Range queries binary-search on the timestamp column,
+# so they only fault in the pages they actually touch.
+#
+#   header: magic(4s) version(H) record_size(H) flags(I) created(d)      = 20 bytes
+#   record: ts(d) kind(B) flags(B) pad(H) app_id(I) cpu(f) ram(f)        = 24 bytes
+#
+# App names live in a sidecar string table (<file>.names, one name per line, id = line no + 1).
+MAGIC = b"QNXH"
+VERSION = 1
+HEADER = struct.Struct("<4sHHId")
+RECORD = struct.Struct("<dBBHIff")
+
+KIND_SAMPLE = 0
+KIND_SPIKE_CPU = 1
+KIND_SPIKE_RAM = 2
+KIND_SPIKE_IO = 3
+KIND_SPIKE_SWAP = 4
+KIND_SPIKE_NET = 5
+KIND_NAMES = {KIND_SAMPLE: "SAMPLE", KIND_SPIKE_CPU: "CPU", KIND_SPIKE_RAM: "RAM", KIND_SPIKE_IO: "IO", KIND_SPIKE_SWAP: "SWAP", KIND_SPIKE_NET: "NET"}
+KIND_BY_TYPE = {name: kind for kind, name in KIND_NAMES.items() if kind != KIND_SAMPLE}
+
+FLAG_IMPORTED = 0x01 # record came from a legacy JSON memory file
+HEADER_LEGACY_IMPORTED = 0x01
+
+HISTORY_FILE = "nexus_history.bin"
+FLUSH_EVERY = 32 # records buffered before a write
+
+class HistoryLog:
+    def __init__(self, path=HISTORY_FILE, flush_every=FLUSH_EVERY):
+        self.path = path
+        self.names_path = path + ".names"
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self.buffer = bytearray()
+        self.buffered = 0
+        self.last_ts = 0.0
+        self.map = None
+        self.mapped_size = 0
+
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+            with open(path, 'wb') as f: f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0, time.time()))
+        with open(path, 'rb') as f: magic, version, rec_size, self.flags, self.created = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or rec_size != RECORD.size:
+            raise ValueError(f"{path}: not a Nexus history file")
+
+        self.names = []
+        self.name_ids = {}
+        if os.path.exists(self.names_path):
+            with open(self.names_path, 'r', encoding='utf-8') as f:
+                for line in f: self.register_name(line.rstrip("\n"))
+
+        # A crash mid-write leaves a partial record: cut it off, or every later append lands misaligned
+        size = os.path.getsize(path)
+        aligned = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+        if aligned != size:
+            with open(path, 'r+b') as f: f.truncate(aligned)
+
+        self.writer = open(path, 'ab')
+        self.remap()
+        if self.count(): self.last_ts = self.read_ts(self.count() - 1)
+
+    # --- STRING TABLE ---
+    def register_name(self, name):
+        self.names.append(name)
+        self.name_ids[name] = len(self.names)
+        return len(self.names)
+
+    def app_id(self, app):
+        if not app: return 0
+        app_id = self.name_ids.get(app)
+        if app_id is None:
+            app_id = self.register_name(app)
+            with open(self.names_path, 'a', encoding='utf-8') as f: f.write(app + "\n")
+        return app_id
+
+    def app_name(self, app_id):
+        return self.names[app_id - 1] if 0 < app_id <= len(self.names) else None
+
+    # --- WRITE PATH ---
+    def append(self, ts, kind, app=None, cpu=0.0, ram=0.0, flags=0):
+        with self.lock:
+            ts = max(ts, self.last_ts) # keep the file sorted for binary search
+            self.last_ts = ts
+            self.buffer += RECORD.pack(ts, kind, flags, 0, self.app_id(app), cpu, ram)
+            self.buffered += 1
+            if self.buffered >= self.flush_every: self.flush_locked()
+
+    def append_snapshot(self, snap):
+        # Sampler subscriber
+        self.append(snap.ts, KIND_SAMPLE, None, snap.cpu, snap.ram)
+
+    def flush(self):
+        with self.lock: self.flush_locked()
+
+    def flush_locked(self):
+        if not self.buffer: return
+        self.writer.write(self.buffer)
+        self.writer.flush()
+        self.buffer = bytearray()
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.writer.close()
+            if self.map is not None: self.map.close()
+            self.map = None
+
+    # --- READ PATH ---
+    def remap(self):
+        size = os.path.getsize(self.path)
+        if size == self.mapped_size and self.map is not None: return
+        usable = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+        if self.map is not None: self.map.close()
+        self.map = None
+        if usable > HEADER.size:
+            with open(self.path, 'rb') as f: self.map = mmap.mmap(f.fileno(), usable, access=mmap.ACCESS_READ)
+        self.mapped_size = size
+
+    def count(self):
+        return (len(self.map) - HEADER.size) // RECORD.size if self.map is not None else 0
+
+    def read_ts(self, index):
+        return struct.unpack_from("<d", self.map, HEADER.size + index * RECORD.size)[0]
+
+    def bisect(self, ts):
+        # First record with timestamp >= ts
+        lo, hi = 0, self.count()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.read_ts(mid) < ts: lo = mid + 1
+            else: hi = mid
+        return lo
+
+    def query(self, t_start, t_end, kinds=None):
+        # (ts, kind, app, cpu, ram, flags) rows for t_start <= ts < t_end
+        self.flush()
+        with self.lock:
+            self.remap()
+            if self.map is None: return []
+            lo, hi = self.bisect(t_start), self.bisect(t_end)
+            view = memoryview(self.map)[HEADER.size + lo * RECORD.size:HEADER.size + hi * RECORD.size]
+            rows = []
+            for ts, kind, flags, _, app_id, cpu, ram in RECORD.iter_unpack(view):
+                if kinds is None or kind in kinds:
+                    rows.append((ts, kind, self.app_name(app_id), cpu, ram, flags))
+            view.release()
+            return rows
+
+    def time_span(self):
+        with self.lock:
+            self.remap()
+            n = self.count()
+            return (self.read_ts(0), self.read_ts(n - 1)) if n else (None, None)
+
+    # --- HEADER FLAGS ---
+    def set_header_flag(self, flag):
+        self.flush()
+        with self.lock:
+            self.flags |= flag
+            with open(self.path, 'r+b') as f:
+                f.seek(8)
+                f.write(struct.pack("<I", self.flags))
+
+# --- LEGACY JSON CONVERTER ---
+def import_json_memory(json_paths, log):
+    # One-time import of nexus_quantum_memory.json / nexus_memory.json spike counters.
+    # The JSON files carry no timestamps, so every counted spike is stamped with the file mtime.
+    if log.flags & HEADER_LEGACY_IMPORTED: return 0
+    imported = 0
+    for json_path in sorted(json_paths, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0):
+        if not os.path.exists(json_path): continue
+        try:
+            with open(json_path, 'r') as f: data = json.load(f)
+        except Exception: continue
+        if data.get("version") and "apps" in data: data = data["apps"] # journal snapshot format
+        stamp = os.path.getmtime(json_path)
+        for app, stats in sorted(data.items()):
+            count = stats.get("spikes", stats.get("lag_count", 0))
+            kind = KIND_SPIKE_RAM if stats.get("type", stats.get("bottleneck_type")) == "RAM" else KIND_SPIKE_CPU
+            for _ in range(int(count)):
+                log.append(stamp, kind, app, flags=FLAG_IMPORTED)
+                imported += 1
+    log.set_header_flag(HEADER_LEGACY_IMPORTED)
+    return imported
+
+if __name__ == "__main__":
+    # python binlog.py import <memory.json> [<memory.json> ...]
+    if len(sys.argv) >= 3 and sys.argv[1] == "import":
+        target = HistoryLog(HISTORY_FILE)
+        print(f"Imported {import_json_memory(sys.argv[2:], target)} spike events into {HISTORY_FILE}.")
+        target.close()
+    else:
+        print("usage: python binlog.py import <memory.json> [<memory.json> ...]")
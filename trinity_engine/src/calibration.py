@@ -0,0 +1,286 @@
+import psutil # type: ignore
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+# Titan calibration: short microbenchmarks + the idle baseline -> per-machine limits and budgets.
+#   compute   sha256 MB/s on one core and on every core at once (hashlib drops the GIL on big buffers)
+#   memory    copy bandwidth over a buffer well past the LLC; dependent-load latency from a pseudo-random
+#             walk, large table minus a cache-resident one (the interpreter cost cancels out)
+#   disk      sequential write (fsync'd) and read of a temp file
+#   baseline  idle CPU/RAM distribution; taken from the rolling history when the engine has one
+# derive() turns a run into cpu/ram soft limits, the process-scan budget and the adaptive
+# sampling intervals. Runs are kept per machine in CALIBRATION_FILE and each new one is compared
+# with the median of the previous ones, so a hardware or driver regression shows up. Single
+# runs swing by 20%+ (cache state, turbo, writeback), so every benchmark keeps the best of
+# REPEATS tries, a metric is only out of line past its own noise band (NOISE_BAND x the spread,
+# median absolute deviation, of its earlier runs, never below REGRESSION), and it is only
+# reported as a regression when the previous run was out of line the same way too.
+CALIBRATION_FILE = "nexus_calibration.json"
+MAX_RUNS = 20 # per machine
+REPEATS = 3 # per benchmark, best one kept
+REGRESSION = 0.2 # at least 20% worse than the previous median
+NOISE_BAND = 3.0 # x relative MAD of the previous runs
+MIN_SPREAD_RUNS = 3 # earlier runs needed before their spread widens the band
+COMPUTE_S = 0.3
+HASH_BLOCK = 1 << 20
+MEM_BYTES = 64 << 20
+LATENCY_BIG = 1 << 22 # uint32 entries: 16 MB (power of two)
+LATENCY_SMALL = 1 << 12 # 16 kB, stays in L1/L2
+LATENCY_STEPS = 300000
+DISK_BYTES = 32 << 20
+BASELINE_S = 5.0
+BASELINE_INTERVAL = 0.25
+BASELINE_HISTORY_S = 300
+MIN_HISTORY = 60 # samples needed before the rolling history is trusted as the baseline
+
+# A mid-range desktop: derived budgets scale against it
+REFERENCE = {"single_mb_s": 1000.0, "all_mb_s": 4000.0, "disk_write_mb_s": 200.0}
+DEFAULT_INTERVALS = {"IDLE": 10.0, "NORMAL": 1.0, "FAST": 0.25}
+SCAN_BUDGET_MS = 40.0
+
+# (section, key, higher is better)
+METRICS = [("compute", "single_mb_s", True), ("compute", "all_mb_s", True), ("memory", "bandwidth_gb_s", True),
+           ("memory", "latency_ns", False), ("disk", "write_mb_s", True), ("disk", "read_mb_s", True)]
+
+def clamp(value, lo, hi):
+    return max(lo, min(hi, value))
+
+def percentile(values, q):
+    if not values: return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * q / 100.0)))]
+
+def best_of(bench, section, repeats=REPEATS):
+    # Run a benchmark several times and keep each metric's best value (max, or min for latencies)
+    results = [bench() for _ in range(repeats)]
+    out = dict(results[0])
+    for sec, key, higher in METRICS:
+        if sec != section: continue
+        values = [r[key] for r in results if r.get(key)]
+        if values: out[key] = max(values) if higher else min(values)
+    return out
+
+def machine_id():
+    # Host name + OS install id (survives reboots, changes with a reinstall / new box)
+    ident = ""
+    for path in ("/etc/machine-id", "/var/lib/dbus/machine-id"):
+        try:
+            with open(path) as f: ident = f.read().strip()
+            break
+        except OSError: pass
+    return f"{platform.node()}:{ident[:12] or platform.machine()}"
+
+# --- MICROBENCHMARKS ---
+def bench_compute(seconds=COMPUTE_S, threads=None):
+    threads = threads or psutil.cpu_count(logical=True) or 1
+    block = os.urandom(HASH_BLOCK)
+    def hash_for(deadline, out, i):
+        n = 0
+        while time.perf_counter() < deadline:
+            hashlib.sha256(block).digest()
+            n += 1
+        out[i] = n
+    single = [0]
+    t0 = time.perf_counter()
+    hash_for(t0 + seconds, single, 0)
+    single_mb_s = single[0] / (time.perf_counter() - t0)
+    counts = [0] * threads
+    t0 = time.perf_counter()
+    workers = [threading.Thread(target=hash_for, args=(t0 + seconds, counts, i), daemon=True) for i in range(threads)]
+    for w in workers: w.start()
+    for w in workers: w.join()
+    all_mb_s = sum(counts) / (time.perf_counter() - t0)
+    return {"single_mb_s": round(single_mb_s, 1), "all_mb_s": round(all_mb_s, 1), "threads": threads,
+            "scaling": round(all_mb_s / single_mb_s, 2) if single_mb_s else None}
+
+def bench_memory(size=MEM_BYTES, steps=LATENCY_STEPS, repeats=REPEATS):
+    src = bytearray(size)
+    dst = bytearray(size)
+    view_src, view_dst = memoryview(src), memoryview(dst)
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        view_dst[:] = view_src
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    bandwidth = 2 * size / best / 1e9 # read + write
+    del view_src, view_dst, src, dst
+    # The tables are the slow part to build: made once, walked `repeats` times
+    big, small = walk_table(LATENCY_BIG), walk_table(LATENCY_SMALL)
+    latency = min(chase(big, steps) for _ in range(repeats)) - min(chase(small, steps) for _ in range(repeats))
+    return {"bandwidth_gb_s": round(bandwidth, 2), "latency_ns": round(latency, 1)}
+
+def walk_table(entries):
+    # i -> (i * A + C) mod 2^k visits every slot (full-period LCG), so the walk never settles in cache
+    mask = entries - 1
+    return array('I', [(i * 2654435761 + 12345) & mask for i in range(entries)])
+
+def chase(table, steps):
+    # ns per step of a pseudo-random walk where every load depends on the previous one
+    i = 0
+    t0 = time.perf_counter()
+    for _ in range(steps): i = table[i]
+    return (time.perf_counter() - t0) / steps * 1e9
+
+def bench_disk(directory=None, size=DISK_BYTES):
+    block = os.urandom(1 << 20)
+    fd, path = tempfile.mkstemp(prefix="nexus_calibration_", dir=directory)
+    try:
+        t0 = time.perf_counter()
+        with os.fdopen(fd, 'wb') as f:
+            for _ in range(size // len(block)): f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        write_s = time.perf_counter() - t0
+        with open(path, 'rb') as f:
+            if hasattr(os, "posix_fadvise"): os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED) # best effort: read from disk, not cache
+            t0 = time.perf_counter()
+            while f.read(1 << 20): pass
+            read_s = time.perf_counter() - t0
+    finally:
+        try: os.remove(path)
+        except OSError: pass
+    return {"write_mb_s": round(size / write_s / 1e6, 1), "read_mb_s": round(size / read_s / 1e6, 1)}
+
+def idle_baseline(timeseries=None, seconds=BASELINE_S):
+    # Load distribution before the benchmarks run: engine history if there is enough, else a short sample
+    cpu = ram = None
+    source = "history"
+    if timeseries is not None:
+        cpu = list(timeseries.window("cpu", BASELINE_HISTORY_S))
+        ram = list(timeseries.window("ram", BASELINE_HISTORY_S))
+    if not cpu or len(cpu) < MIN_HISTORY:
+        source = "sampled"
+        cpu, ram = [], []
+        psutil.cpu_percent(None)
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            time.sleep(BASELINE_INTERVAL)
+            cpu.append(psutil.cpu_percent(None))
+            ram.append(psutil.virtual_memory().percent)
+    return {"source": source, "samples": len(cpu),
+            "cpu_p50": percentile(cpu, 50), "cpu_p90": percentile(cpu, 90), "cpu_p99": percentile(cpu, 99),
+            "ram_p50": percentile(ram, 50), "ram_p90": percentile(ram, 90), "ram_p99": percentile(ram, 99)}
+
+# --- DERIVED LIMITS ---
+def derive(run):
+    base = run["baseline"]
+    compute = run["compute"]
+    ram_total = run["ram_total"]
+    # CPU: little total headroom -> act earlier; never inside the machine's own idle noise
+    cpu = 85.0
+    if compute["all_mb_s"] < REFERENCE["all_mb_s"] / 2: cpu -= 5
+    cpu = clamp(max(cpu, (base["cpu_p99"] or 0) + 10), 60, 95)
+    # RAM: size rule, earlier when swapping would be slow, above the idle working set
+    ram = 75.0 if ram_total < 8 else 92.0 if ram_total > 32 else 85.0
+    if run["disk"]["write_mb_s"] < REFERENCE["disk_write_mb_s"] / 2: ram -= 5
+    ram = clamp(max(ram, (base["ram_p99"] or 0) + 5), 60, 95)
+    # Budgets: the scan gets the same share of the whole machine; slow cores sample FAST less often
+    cores = run["cpu_logical"] or 1
+    speed = compute["single_mb_s"] / REFERENCE["single_mb_s"]
+    intervals = dict(DEFAULT_INTERVALS)
+    if speed < 0.5: intervals["FAST"] = 0.5
+    if speed < 0.25: intervals["NORMAL"] = 2.0
+    return {"cpu_limit_soft": round(cpu), "ram_limit_soft": round(ram),
+            "scan_budget_ms": round(clamp(SCAN_BUDGET_MS * cores / 4, SCAN_BUDGET_MS / 2, SCAN_BUDGET_MS * 2), 1),
+            "intervals": intervals, "core_speed": round(speed, 2)}
+
+def run_calibration(timeseries=None, disk_dir=None):
+    vm = psutil.virtual_memory()
+    run = {"ts": time.time(), "machine": machine_id(), "os": f"{platform.system()} {platform.release()}",
+           "python": platform.python_version(), "cpu_logical": psutil.cpu_count(logical=True),
+           "cpu_physical": psutil.cpu_count(logical=False), "ram_total": round(vm.total / (1024**3), 2)}
+    t0 = time.perf_counter()
+    run["baseline"] = idle_baseline(timeseries) # first: the benchmarks below are the opposite of idle
+    run["compute"] = best_of(bench_compute, "compute")
+    run["memory"] = bench_memory()
+    run["disk"] = best_of(lambda: bench_disk(disk_dir), "disk")
+    run["duration_s"] = round(time.perf_counter() - t0, 2)
+    run["derived"] = derive(run)
+    return run
+
+# --- PERSISTENCE + COMPARISON ---
+def load_runs(path=CALIBRATION_FILE):
+    try:
+        with open(path) as f: return json.load(f)
+    except (OSError, ValueError): return {}
+
+def save_runs(runs, path=CALIBRATION_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f: json.dump(runs, f, indent=1)
+    os.replace(tmp, path)
+
+def was_outside(run, metric):
+    for c in run.get("compare", []):
+        if c["metric"] == metric: return c.get("outside", c.get("regression", False))
+    return False
+
+def compare(run, previous):
+    # Each metric against the median of the earlier runs on this machine, outside its noise band.
+    # The current streak of runs outside the band is left out of the median and the spread: a
+    # lasting regression must not widen its own band until it disappears in it (isolated outliers
+    # further back stay in, they are the metric's noise).
+    out = []
+    for section, key, higher in METRICS:
+        metric = f"{section}.{key}"
+        end = len(previous)
+        while end and was_outside(previous[end - 1], metric): end -= 1
+        history = [r[section][key] for r in previous[:end] if r.get(section, {}).get(key)]
+        value = run[section][key]
+        if not history or not value:
+            out.append({"metric": metric, "value": value, "previous": None, "change": None, "band": None, "outside": False, "regression": False})
+            continue
+        median = percentile(history, 50)
+        change = (value - median) / median
+        worse = -change if higher else change
+        band = REGRESSION
+        if len(history) >= MIN_SPREAD_RUNS:
+            spread = percentile([abs(h - median) for h in history], 50) / median
+            band = max(band, NOISE_BAND * spread)
+        outside = worse > band
+        before = previous[-1] if previous else {}
+        out.append({"metric": metric, "value": value, "previous": median, "change": round(change, 3),
+                    "band": round(band, 3), "outside": outside, "regression": outside and was_outside(before, metric)})
+    return out
+
+def record_run(run, path=CALIBRATION_FILE):
+    runs = load_runs(path)
+    previous = runs.get(run["machine"], [])
+    run["compare"] = compare(run, previous)
+    run["regressions"] = [c["metric"] for c in run["compare"] if c["regression"]]
+    runs[run["machine"]] = (previous + [run])[-MAX_RUNS:]
+    save_runs(runs, path)
+    return run
+
+def latest_run(path=CALIBRATION_FILE):
+    # Last persisted run for this machine (None if it was never calibrated): no benchmarks
+    runs = load_runs(path).get(machine_id())
+    return runs[-1] if runs else None
+
+def format_run(run):
+    c, m, d, b, x = run["compute"], run["memory"], run["disk"], run["baseline"], run["derived"]
+    lines = [f"COMPUTE:  {c['single_mb_s']:.0f} MB/s per core, {c['all_mb_s']:.0f} MB/s on {c['threads']} threads (x{c['scaling']})",
+             f"MEMORY:   {m['bandwidth_gb_s']:.1f} GB/s copy, ~{m['latency_ns']:.0f} ns dependent load",
+             f"DISK:     {d['write_mb_s']:.0f} MB/s write, {d['read_mb_s']:.0f} MB/s read",
+             f"IDLE:     CPU p50/p99 {b['cpu_p50']}/{b['cpu_p99']}%, RAM p50/p99 {b['ram_p50']}/{b['ram_p99']}% ({b['source']}, {b['samples']} samples)",
+             f"LIMITS:   CPU {x['cpu_limit_soft']}% / RAM {x['ram_limit_soft']}% | scan budget {x['scan_budget_ms']} ms | "
+             f"sampling {x['intervals']['FAST']}s / {x['intervals']['NORMAL']}s / {x['intervals']['IDLE']}s"]
+    for item in run.get("compare", []):
+        if item["change"] is None: continue
+        flag = "  REGRESSION" if item["regression"] else "  outside band" if item.get("outside") else ""
+        band = f", band {item['band']:.0%}" if item.get("band") else ""
+        lines.append(f"  {item['metric']:<22} {item['value']:>10} vs {item['previous']:>10} ({item['change']:+.0%}{band}){flag}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    # python calibration.py   run, persist and compare with the previous runs on this machine
+    result = record_run(run_calibration())
+    print(format_run(result))
+    sys.exit(1 if result["regressions"] else 0)
@@ -0,0 +1,245 @@
+import psutil # type: ignore
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from sketches import Histogram
+
+# Self-overhead instrumentation: what the optimizer itself costs.
+#   loops     per-loop duration histograms (log2 buckets from 64us), overruns vs budget,
+#             psutil calls made inside the loop (reported by the call sites, count_psutil)
+#   scheduler jitter / duration per job (Scheduler.stats)
+#   self      own CPU%, RSS and thread count, psutil calls per sampler tick
+#   profiler  opt-in: a sampling thread grabs the stack of any loop that is past its
+#             budget (sys._current_frames), aggregated as collapsed stacks (flamegraph input)
+# Everything is in-memory; dump() is the machine-readable form, format_panel() the in-app one.
+LOOP_BUDGETS_MS = {
+    "cortex_analyze": 50.0,
+    "oracle_predict": 10.0,
+    "sentinel_react": 20.0,
+    "boost_priority_loop": 100.0,
+    "update_live_feed": 16.0, # one frame
+    "save_memory": 50.0,
+    "neural_tick": 100.0, # cortex + oracle + sentinel + process scan
+    "launch_watch": 10.0, # pid-list diff every 250 ms
+}
+DEFAULT_BUDGET_MS = 50.0
+DURATION_BINS = 20 # bin 0: < 64us, bin k: [32us * 2^k, 64us * 2^k) ... ~16s+
+SELF_INTERVAL = 5.0
+PROFILE_INTERVAL = 0.005
+MAX_STACKS = 200 # distinct stacks kept per loop
+STACK_DEPTH = 40
+DUMP_FILE = "nexus_diagnostics.json"
+
+def duration_bin(seconds):
+    return min(DURATION_BINS - 1, max(0, int(seconds * 1e6).bit_length() - 6))
+
+def bin_upper_ms(index):
+    return 64 * 2 ** index / 1000.0
+
+class LoopStats:
+    __slots__ = ("name", "budget", "hist", "count", "total", "max", "last", "overruns", "psutil_calls")
+
+    def __init__(self, name, budget_ms):
+        self.name = name
+        self.budget = budget_ms / 1000.0
+        self.hist = Histogram(DURATION_BINS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.overruns = 0
+        self.psutil_calls = 0
+
+    def record(self, seconds, psutil_calls):
+        self.hist.add(duration_bin(seconds))
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+        self.psutil_calls += psutil_calls
+        if seconds > self.budget: self.overruns += 1
+
+    def quantile_ms(self, q):
+        # Upper edge of the bucket holding the q-quantile (an upper bound)
+        index = self.hist.quantile_bin(q)
+        return None if index is None else bin_upper_ms(index)
+
+    def summary(self):
+        n = self.count or 1
+        return {"runs": self.count, "budget_ms": self.budget * 1000, "overruns": self.overruns,
+                "avg_ms": round(self.total / n * 1000, 3), "last_ms": round(self.last * 1000, 3), "max_ms": round(self.max * 1000, 3),
+                "p50_ms": self.quantile_ms(0.5), "p90_ms": self.quantile_ms(0.9), "p99_ms": self.quantile_ms(0.99),
+                "psutil_per_run": round(self.psutil_calls / n, 2), "histogram": list(self.hist.counts)}
+
+class Instruments:
+    def __init__(self):
+        self.loops = {}
+        self.lock = threading.Lock()
+        self.active = {} # thread ident -> [[loop, start, budget_s], ...] (nested loops stack up)
+        self.psutil_total = 0
+        self.psutil_by_site = {}
+        self.scheduler = None
+        self.sampler = None
+        self.process = None
+        self.self_stats = {}
+        self.last_self = None # (psutil_total, sampler seq) at the previous self sample
+        self.profiling = False
+        self.profiler = None
+        self.stacks = {} # loop -> {collapsed stack: samples}
+        self.started = time.time()
+
+    # --- LOOPS ---
+    def loop(self, name):
+        stats = self.loops.get(name)
+        if stats is None:
+            with self.lock:
+                stats = self.loops.setdefault(name, LoopStats(name, LOOP_BUDGETS_MS.get(name, DEFAULT_BUDGET_MS)))
+        return stats
+
+    @contextmanager
+    def measure(self, name):
+        stats = self.loop(name)
+        ident = threading.get_ident()
+        frames = self.active.setdefault(ident, [])
+        t0 = time.perf_counter()
+        calls0 = self.psutil_total
+        frames.append((name, t0, stats.budget))
+        try: yield
+        finally:
+            frames.pop()
+            stats.record(time.perf_counter() - t0, self.psutil_total - calls0)
+
+    def count(self, site, n=1):
+        # Unlocked: counts are approximate while several threads report at once
+        self.psutil_total += n
+        self.psutil_by_site[site] = self.psutil_by_site.get(site, 0) + n
+
+    # --- SELF COST ---
+    def attach(self, scheduler, sampler=None):
+        # Idempotent: engine and GUI both call it
+        if self.scheduler is not None: return self
+        self.scheduler = scheduler
+        self.sampler = sampler
+        self.cores = psutil.cpu_count(logical=True) or 1
+        scheduler.every("diag.self", SELF_INTERVAL, self.sample_self, first_delay=0)
+        return self
+
+    def sample_self(self):
+        if self.process is None:
+            self.process = psutil.Process(os.getpid())
+            self.process.cpu_percent(None) # prime
+        try:
+            with self.process.oneshot():
+                cpu = self.process.cpu_percent(None)
+                rss = self.process.memory_info().rss
+                threads = self.process.num_threads()
+        except (psutil.Error, OSError): return
+        finally: self.count("diag.self", 3)
+        seq = self.sampler.snapshot().seq if self.sampler is not None else None
+        per_tick = None
+        if self.last_self is not None and seq is not None and seq > self.last_self[1]:
+            per_tick = (self.psutil_total - self.last_self[0]) / (seq - self.last_self[1])
+        self.last_self = (self.psutil_total, seq)
+        self.self_stats = {"ts": time.time(), "cpu_percent": cpu, "cpu_percent_machine": round(cpu / self.cores, 2), "rss": rss,
+                           "threads": threads, "python_threads": threading.active_count(),
+                           "psutil_calls_per_tick": None if per_tick is None else round(per_tick, 2)}
+
+    # --- PROFILER (opt-in) ---
+    def enable_profiler(self, enabled=True):
+        self.profiling = enabled
+        if enabled and (self.profiler is None or not self.profiler.is_alive()):
+            self.profiler = threading.Thread(target=self.profile_loop, name="nexus-profiler", daemon=True)
+            self.profiler.start()
+
+    def profile_loop(self):
+        me = threading.get_ident()
+        while self.profiling:
+            time.sleep(PROFILE_INTERVAL)
+            now = time.perf_counter()
+            overrunning = [(ident, frames[-1][0]) for ident, frames in list(self.active.items())
+                           if frames and ident != me and now - frames[-1][1] > frames[-1][2]]
+            if not overrunning: continue
+            current = sys._current_frames()
+            for ident, name in overrunning:
+                frame = current.get(ident)
+                if frame is not None: self.add_stack(name, frame)
+
+    def add_stack(self, name, frame):
+        parts = []
+        while frame is not None and len(parts) < STACK_DEPTH:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        key = ";".join(reversed(parts))
+        with self.lock:
+            stacks = self.stacks.setdefault(name, {})
+            if key not in stacks and len(stacks) >= MAX_STACKS: key = "[other]"
+            stacks[key] = stacks.get(key, 0) + 1
+
+    # --- OUTPUT ---
+    def dump(self, top_stacks=20):
+        with self.lock:
+            loops = {name: stats.summary() for name, stats in self.loops.items()}
+            stacks = {name: dict(sorted(s.items(), key=lambda item: item[1], reverse=True)[:top_stacks]) for name, s in self.stacks.items()}
+        return {"ts": time.time(), "pid": os.getpid(), "uptime_s": round(time.time() - self.started, 1), "loops": loops,
+                "scheduler": self.scheduler.stats() if self.scheduler is not None else None,
+                "self": dict(self.self_stats), "psutil": {"total": self.psutil_total, "by_site": dict(self.psutil_by_site)},
+                "profiler": {"enabled": self.profiling, "interval_ms": PROFILE_INTERVAL * 1000, "stacks": stacks}}
+
+    def write_dump(self, path=DUMP_FILE):
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f: json.dump(self.dump(), f, indent=1)
+        os.replace(tmp, path)
+        return path
+
+# --- PSUTIL CALL COUNTING ---
+def count_psutil(site, n=1):
+    # The engine's own call sites report the psutil calls they made (psutil itself is left alone)
+    get_instruments().count(site, n)
+
+# --- PANEL ---
+def format_panel(dump):
+    # Times in ms; p90/p99 are histogram bucket upper bounds
+    lines = [f"{'LOOP (ms)':<20} {'RUNS':>6} {'AVG':>8} {'P90<':>8} {'P99<':>8} {'MAX':>8} {'OVER':>5} {'PSUTIL':>7}"]
+    for name, s in sorted(dump["loops"].items()):
+        p90 = f"{s['p90_ms']:g}" if s["p90_ms"] is not None else "-"
+        p99 = f"{s['p99_ms']:g}" if s["p99_ms"] is not None else "-"
+        lines.append(f"{name:<20} {s['runs']:>6} {s['avg_ms']:>8.2f} {p90:>8} {p99:>8} {s['max_ms']:>8.1f} {s['overruns']:>5} {s['psutil_per_run']:>7}")
+    if dump.get("scheduler"):
+        lines.append("")
+        lines.append(f"{'JOB (ms)':<20} {'RUNS':>6} {'JITTER':>8} {'J.MAX':>8} {'SKIP':>5}   (scheduler wakeups {dump['scheduler']['wakeups']})")
+        for name, j in sorted(dump["scheduler"]["jobs"].items()):
+            lines.append(f"{name:<20} {j['runs']:>6} {j['jitter_avg_ms']:>8.1f} {j['jitter_max_ms']:>8.1f} {j['skipped']:>5}")
+    me = dump.get("self") or {}
+    if me:
+        lines.append("")
+        lines.append(f"SELF: CPU {me['cpu_percent']:.1f}% of a core ({me['cpu_percent_machine']:.2f}% of machine) | "
+                     f"RSS {me['rss'] / 1048576:.1f} MB | threads {me['threads']} | psutil/tick {me['psutil_calls_per_tick']}")
+    profiler = dump.get("profiler") or {}
+    if profiler.get("enabled"):
+        samples = sum(sum(s.values()) for s in profiler["stacks"].values())
+        lines.append(f"PROFILER: on, {samples} overrun samples")
+    return "\n".join(lines)
+
+# --- SHARED INSTANCE ---
+_instruments = None
+_instruments_lock = threading.Lock()
+
+def get_instruments():
+    global _instruments
+    with _instruments_lock:
+        if _instruments is None: _instruments = Instruments()
+        return _instruments
+
+def measured(name):
+    # Method decorator: times every call under `name`
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_instruments().measure(name): return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,315 @@
+import multiprocessing
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+# Engine-in-a-worker-process mode.
+# The worker runs Titan + Nexus (sampling, process scans, actions) and publishes the latest
+# telemetry into a fixed-layout shared-memory block guarded by a seqlock; the UI reads it
+# in place (struct.unpack_from on the shared buffer, no copy, no syscall, no lock). Commands
+# and anything bigger (Nexus feed, reports) go over a duplex pipe, tagged with a request id
+# so a reply that arrives after its timeout is discarded. A watchdog thread in the UI
+# process restarts a dead or hung worker with exponential backoff; the shared block
+# outlives workers, so the UI simply keeps showing the last good values meanwhile.
+# Workers are spawned (not forked), the same on Linux and Windows, so no Tk state or
+# half-held locks from UI threads leak into the engine.
+#
+# Layout: <Q seqlock> then SNAPSHOT. The seqlock counter is odd while the writer is inside.
+SEQLOCK = struct.Struct("<Q")
+SNAPSHOT = struct.Struct("<dQddQQddddBxxxIdQ")
+SHM_SIZE = SEQLOCK.size + SNAPSHOT.size
+PUBLISH_INTERVAL = 0.5
+HEARTBEAT_TIMEOUT = 5.0
+CALL_TIMEOUT = 2.0
+CALIBRATE_TIMEOUT = 120.0 # calibration runs benchmarks for several seconds
+MAX_RESTART_DELAY = 30.0
+NAN = float("nan")
+WORKER_LOG_FILE = "quantum_engine_worker.jsonl" # one rotating writer per file
+
+EngineSnapshot = namedtuple("EngineSnapshot", ["ts", "seq", "cpu", "ram", "ram_used", "ram_total",
+                                               "cpu_avg_1m", "cpu_peak_1m", "ram_avg_1m", "ram_peak_1m",
+                                               "is_active", "pid", "heartbeat", "event_seq"])
+
+# --- SEQLOCK ---
+class SeqlockWriter:
+    def __init__(self, buf):
+        self.buf = buf
+        self.seq = SEQLOCK.unpack_from(buf, 0)[0] & ~1 # a worker that died mid-write left it odd
+
+    def write(self, values):
+        self.seq += 1 # odd: readers retry
+        SEQLOCK.pack_into(self.buf, 0, self.seq)
+        SNAPSHOT.pack_into(self.buf, SEQLOCK.size, *values)
+        self.seq += 1
+        SEQLOCK.pack_into(self.buf, 0, self.seq)
+
+def seqlock_read(buf, retries=100):
+    for _ in range(retries):
+        before = SEQLOCK.unpack_from(buf, 0)[0]
+        if before & 1: continue
+        values = SNAPSHOT.unpack_from(buf, SEQLOCK.size)
+        if SEQLOCK.unpack_from(buf, 0)[0] == before: return values if before else None
+    return None
+
+# --- WORKER SIDE ---
+def publish(writer, nexus):
+    snap = nexus.sampler.snapshot()
+    ts = nexus.timeseries
+    history = [ts.mean("cpu", 60), ts.max("cpu", 60), ts.mean("ram", 60), ts.max("ram", 60)]
+    history = [NAN if v is None else v for v in history] # no history yet
+    writer.write((snap.ts, snap.seq, snap.cpu, snap.ram, snap.ram_used, snap.ram_total, *history,
+                  1 if nexus.is_active else 0, os.getpid(), time.time(), nexus.events.head()))
+
+def engine_main(shm_name, conn, api=None):
+    # Entry point of the worker process (module level so it also works with spawn on Windows)
+    from nexus_core import start_engine, calibrate_engine
+    from eventbus import setup_logging
+    setup_logging(WORKER_LOG_FILE)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    writer = SeqlockWriter(shm.buf)
+    titan, nexus = start_engine()
+    titan.scan_hardware()
+    nexus.scheduler.every("engine.publish", PUBLISH_INTERVAL, lambda: publish(writer, nexus), first_delay=0)
+    server = None
+    if api is not None:
+        # The query service lives next to the data it serves (TelemetryAPI keyword arguments)
+        from telemetry_api import TelemetryAPI
+        server = TelemetryAPI(nexus, **api).start()
+
+    commands = {
+        "ping": lambda: os.getpid(),
+        "scan_hardware": titan.scan_hardware,
+        "get_report": titan.get_report,
+        "hardware_specs": lambda: dict(titan.hardware_specs),
+        "force_ram_clean": nexus.force_ram_clean,
+        "optimize_network": nexus.optimize_network,
+        "set_modules": nexus.set_modules,
+        "set_active": lambda active: setattr(nexus, "is_active", bool(active)),
+        "events": lambda cursor, limit=None: drain_events(nexus, cursor, limit),
+        "mean": lambda metric, seconds: nexus.timeseries.mean(metric, seconds),
+        "max": lambda metric, seconds: nexus.timeseries.max(metric, seconds),
+        "calibrate": lambda: calibrate_engine(titan, nexus),
+        "diagnostics": nexus.diagnostics,
+        "profiler": lambda enabled: nexus.instruments.enable_profiler(bool(enabled)),
+    }
+    try:
+        while True:
+            try: request_id, name, args = conn.recv()
+            except (EOFError, OSError): break # UI went away
+            if name == "stop":
+                conn.send((request_id, True, None))
+                break
+            try: conn.send((request_id, True, commands[name](*args)))
+            except Exception as e: conn.send((request_id, False, f"{type(e).__name__}: {e}"))
+    finally:
+        nexus.scheduler.cancel("engine.publish")
+        if server is not None: server.stop()
+        nexus.save_memory()
+        nexus.archive.close()
+        shm.close()
+
+def drain_events(nexus, cursor, limit):
+    events, cursor, dropped = nexus.events.drain(cursor, limit)
+    return [e.as_dict() for e in events], cursor, dropped
+
+# --- UI SIDE ---
+class EngineProcess:
+    def __init__(self, call_timeout=CALL_TIMEOUT, heartbeat_timeout=HEARTBEAT_TIMEOUT, api=None):
+        self.api = api
+        self.call_timeout = call_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        self.shm = shared_memory.SharedMemory(create=True, size=SHM_SIZE)
+        self.shm.buf[:SHM_SIZE] = bytes(SHM_SIZE)
+        self.context = multiprocessing.get_context("spawn")
+        self.process = None
+        self.conn = None
+        self.request_id = 0
+        self.call_lock = threading.Lock()
+        self.running = False
+        self.watchdog = None
+        self.restart_delay = 1.0
+        self.stats = {"starts": 0, "restarts": 0, "call_errors": 0, "empty_reads": 0}
+
+    def start(self):
+        self.running = True
+        self.spawn()
+        self.watchdog = threading.Thread(target=self.watch, daemon=True)
+        self.watchdog.start()
+        return self
+
+    def spawn(self):
+        parent, child = self.context.Pipe()
+        self.process = self.context.Process(target=engine_main, args=(self.shm.name, child, self.api), daemon=True, name="nexus-engine")
+        self.process.start()
+        child.close()
+        self.conn = parent
+        self.started_at = time.time()
+        self.stats["starts"] += 1
+
+    def watch(self):
+        while self.running:
+            time.sleep(1.0)
+            if not self.running: break
+            snap = self.snapshot()
+            alive = self.process.is_alive()
+            stale = snap is None or snap.pid != self.process.pid or time.time() - snap.heartbeat > self.heartbeat_timeout
+            if alive and (not stale or time.time() - self.started_at < self.heartbeat_timeout * 2):
+                if not stale: self.restart_delay = 1.0 # healthy again
+                continue
+            self.restart()
+
+    def restart(self):
+        # Dead, or alive but not publishing (hung): replace it. Calls fail fast during the backoff.
+        with self.call_lock:
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(2.0)
+            if self.process.is_alive(): # frozen (e.g. stopped) workers ignore SIGTERM
+                self.process.kill()
+                self.process.join(2.0)
+            try: self.conn.close()
+            except OSError: pass
+            self.conn = None
+        time.sleep(self.restart_delay)
+        self.restart_delay = min(self.restart_delay * 2, MAX_RESTART_DELAY)
+        with self.call_lock:
+            if not self.running: return
+            self.spawn()
+            self.stats["restarts"] += 1
+
+    def snapshot(self):
+        # Lock-free read from the shared block (None until the first publish)
+        values = seqlock_read(self.shm.buf)
+        if values is None:
+            self.stats["empty_reads"] += 1 # not published yet, or a writer kept it busy
+            return None
+        return EngineSnapshot(*values)
+
+    def call(self, name, *args, default=None, timeout=None):
+        # Round trip over the pipe; any failure returns `default` (the watchdog handles restarts)
+        with self.call_lock:
+            if self.conn is None:
+                self.stats["call_errors"] += 1
+                return default
+            self.request_id += 1
+            deadline = time.monotonic() + (timeout or self.call_timeout)
+            try:
+                self.conn.send((self.request_id, name, args))
+                while True:
+                    if not self.conn.poll(max(0.0, deadline - time.monotonic())):
+                        self.stats["call_errors"] += 1
+                        return default
+                    request_id, ok, result = self.conn.recv()
+                    if request_id == self.request_id: break # older ids: late replies to timed-out calls
+            except (EOFError, OSError):
+                self.stats["call_errors"] += 1
+                return default
+        if not ok: self.stats["call_errors"] += 1
+        return result if ok else default
+
+    def stop(self):
+        self.running = False
+        try: self.call("stop")
+        except Exception: pass
+        if self.process is not None:
+            self.process.join(5.0)
+            if self.process.is_alive(): self.process.terminate()
+        self.shm.close()
+        try: self.shm.unlink()
+        except FileNotFoundError: pass
+
+# --- PROXIES (what QuantumUI expects from titan / nexus) ---
+class RemoteEvent:
+    __slots__ = ("seq", "ts", "source", "level", "text", "count")
+
+    def __init__(self, data):
+        for key in self.__slots__: setattr(self, key, data[key])
+
+    def render(self):
+        return self.text if self.count == 1 else f"{self.text} ×{self.count}"
+
+class RemoteSampler:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def snapshot(self):
+        return self.engine.snapshot()
+
+def from_slot(value):
+    return None if value != value else value # NaN slot = None
+
+class RemoteTimeSeries:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def mean(self, metric, seconds):
+        snap = self.engine.snapshot()
+        if seconds == 60 and snap is not None: return from_slot(getattr(snap, f"{metric}_avg_1m"))
+        return self.engine.call("mean", metric, seconds)
+
+    def max(self, metric, seconds):
+        snap = self.engine.snapshot()
+        if seconds == 60 and snap is not None: return from_slot(getattr(snap, f"{metric}_peak_1m"))
+        return self.engine.call("max", metric, seconds)
+
+class RemoteEvents:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def drain(self, cursor=0, limit=None):
+        snap = self.engine.snapshot()
+        if snap is not None and snap.event_seq <= cursor: return [], cursor, 0 # nothing new: no round trip
+        events, cursor, dropped = self.engine.call("events", cursor, limit, default=([], cursor, 0))
+        return [RemoteEvent(e) for e in events], cursor, dropped
+
+class RemoteTitan:
+    def __init__(self, engine):
+        self.engine = engine
+
+    @property
+    def hardware_specs(self):
+        return self.engine.call("hardware_specs", default={})
+
+    def scan_hardware(self):
+        return self.engine.call("scan_hardware", default=False)
+
+    def get_report(self):
+        return self.engine.call("get_report", default="")
+
+    def calibrate(self):
+        return self.engine.call("calibrate", timeout=CALIBRATE_TIMEOUT)
+
+    def on_update(self, callback):
+        pass # the worker refreshes its manifest itself; hardware_specs is fetched on every access
+
+class RemoteNexus:
+    def __init__(self, engine):
+        self.engine = engine
+        self.sampler = RemoteSampler(engine)
+        self.timeseries = RemoteTimeSeries(engine)
+        self.events = RemoteEvents(engine)
+
+    @property
+    def is_active(self):
+        snap = self.engine.snapshot()
+        return bool(snap and snap.is_active)
+
+    def force_ram_clean(self):
+        return self.engine.call("force_ram_clean")
+
+    def optimize_network(self):
+        return self.engine.call("optimize_network")
+
+    def set_modules(self, cortex, sentinel, oracle):
+        return self.engine.call("set_modules", cortex, sentinel, oracle)
+
+    def diagnostics(self):
+        return self.engine.call("diagnostics")
+
+def start_engine_process(api=None):
+    # Same shape as nexus_core.start_engine(), but the engine lives in a supervised worker
+    engine = EngineProcess(api=api).start()
+    return engine, RemoteTitan(engine), RemoteNexus(engine)
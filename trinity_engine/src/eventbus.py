@@ -0,0 +1,168 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+# Bounded event bus for the Nexus feed.
+# Events live in a fixed-size ring; each consumer (dashboard, daemon, API) keeps its own
+# cursor and drains in batches, and anything overwritten before a consumer got to it is
+# counted as dropped. Repeats of the same message (numbers ignored) within COALESCE_S are
+# folded into one event and re-published once as "text ×N" when the window closes.
+# Log records go through a bounded QueueHandler to a QueueListener thread that writes
+# rotated JSONL, so a spike storm never blocks the engine on file I/O.
+CAPACITY = 512
+COALESCE_S = 10.0
+LOG_FILE = "quantum_logs.jsonl"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+LOG_QUEUE = 10000
+
+DIGITS = re.compile(r"\d+(\.\d+)?")
+event_log = logging.getLogger("nexus.events")
+
+class Event:
+    __slots__ = ("seq", "ts", "source", "level", "text", "count", "key")
+
+    def __init__(self, seq, ts, source, level, text, count=1, key=None):
+        self.seq = seq
+        self.ts = ts
+        self.source = source
+        self.level = level
+        self.text = text
+        self.count = count
+        self.key = key
+
+    def render(self):
+        return self.text if self.count == 1 else f"{self.text} ×{self.count}"
+
+    def as_dict(self):
+        return {"seq": self.seq, "ts": self.ts, "source": self.source, "level": self.level, "text": self.text, "count": self.count}
+
+class EventBus:
+    def __init__(self, capacity=CAPACITY, coalesce_s=COALESCE_S, clock=time.time):
+        self.ring = deque(maxlen=capacity)
+        self.coalesce_s = coalesce_s
+        self.clock = clock
+        self.seq = 0
+        self.open = {} # key -> [first Event, repeats, last text, last ts] for the current window
+        self.lock = threading.Lock()
+        self.counts = {"published": 0, "coalesced": 0, "dropped": 0, "summaries": 0}
+
+    def publish(self, text, source=None, level=logging.INFO):
+        now = self.clock()
+        if source is None:
+            head, sep, _ = text.partition(":")
+            source = head if sep and head.isupper() and len(head) <= 16 else "NEXUS"
+        key = (source, DIGITS.sub("#", text))
+        with self.lock:
+            self.counts["published"] += 1
+            self.expire_locked(now)
+            window = self.open.get(key)
+            if window is not None:
+                window[1] += 1
+                window[2], window[3] = text, now
+                self.counts["coalesced"] += 1
+                return None
+            event = self.append_locked(now, source, level, text, 1, key)
+            self.open[key] = [event, 0, text, now]
+        event_log.log(level, text, extra={"source": source, "count": 1})
+        return event
+
+    def put(self, text):
+        # Drop-in for the old msg_queue.put (ActionExecutor notify, legacy callers)
+        self.publish(text)
+
+    def append_locked(self, ts, source, level, text, count, key):
+        self.seq += 1
+        event = Event(self.seq, ts, source, level, text, count, key)
+        self.ring.append(event)
+        return event
+
+    def expire_locked(self, now):
+        # Close coalescing windows; repeats become one summary event
+        summaries = []
+        for key in [k for k, w in self.open.items() if now - w[0].ts >= self.coalesce_s]:
+            first, repeats, text, ts = self.open.pop(key)
+            if repeats:
+                summaries.append(self.append_locked(ts, first.source, first.level, text, repeats + 1, key))
+                self.counts["summaries"] += 1
+        for event in summaries:
+            event_log.log(event.level, event.text, extra={"source": event.source, "count": event.count})
+
+    def drain(self, cursor=0, limit=None):
+        # Events after `cursor` (oldest first) -> (events, new cursor, dropped since cursor)
+        with self.lock:
+            self.expire_locked(self.clock())
+            if not self.ring: return [], cursor, 0
+            oldest = self.ring[0].seq
+            dropped = max(0, oldest - cursor - 1)
+            self.counts["dropped"] += dropped
+            start = max(0, cursor - oldest + 1)
+            events = [self.ring[i] for i in range(start, len(self.ring))]
+        if limit is not None and len(events) > limit: events = events[:limit]
+        return events, events[-1].seq if events else max(cursor, oldest - 1), dropped
+
+    def head(self):
+        # Newest seq (expired windows closed first): a cheap "anything new?" check for remote consumers
+        with self.lock:
+            self.expire_locked(self.clock())
+            return self.seq
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, buffered=len(self.ring), capacity=self.ring.maxlen, coalescing=len(self.open),
+                        log=logging_stats())
+
+# --- ASYNC JSONL LOGGING ---
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name,
+                 "source": getattr(record, "source", None), "msg": record.getMessage()}
+        count = getattr(record, "count", 1)
+        if count != 1: entry["count"] = count
+        if record.exc_info: entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    # Never blocks the caller: when the writer falls behind, records are dropped and counted
+    def __init__(self, maxsize=LOG_QUEUE):
+        logging.handlers.QueueHandler.__init__(self, queue.Queue(maxsize))
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try: self.queue.put_nowait(record)
+        except queue.Full: self.dropped += 1
+
+_listener = None
+_handler = None
+
+def setup_logging(path=LOG_FILE, level=logging.INFO, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    # Replaces logging.basicConfig(filename=...): root logger -> queue -> listener thread -> rotated JSONL
+    global _listener, _handler
+    if _listener is not None: return _handler
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+    file_handler.setFormatter(JsonLineFormatter())
+    _handler = BoundedQueueHandler()
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(_handler.queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _handler
+
+def stop_logging():
+    # Flushes whatever is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def logging_stats():
+    if _handler is None: return {"queued": 0, "dropped": 0}
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
@@ -0,0 +1,153 @@
+import ctypes
+import os
+import psutil # type: ignore
+import threading
+from diagnostics import count_psutil
+
+# Foreground-app resolution with pluggable backends.
+#   WindowsForegroundBackend - GetForegroundWindow / GetWindowThreadProcessId
+#   LinuxForegroundBackend   - /proc based (tty foreground group) or an injected pid source
+#   FakeForegroundBackend    - scripted pids/names for tests and trace replay
+# Names are cached by (pid, create_time), and a ProcessTable entry is only trusted when its
+# create time matches the live process, so a reused pid never reports the old name. A
+# repeated lookup of the same foreground process costs one create-time read, no name fetch.
+
+class ForegroundBackend:
+    name = "base"
+
+    def foreground_pid(self):
+        raise NotImplementedError
+
+    def describe(self, pid):
+        # (create_time, name) for a pid
+        count_psutil("foreground.describe", 2)
+        p = psutil.Process(pid)
+        with p.oneshot():
+            return p.create_time(), p.name()
+
+    def create_time(self, pid):
+        count_psutil("foreground.create_time")
+        return psutil.Process(pid).create_time()
+
+class WindowsForegroundBackend(ForegroundBackend):
+    name = "windows"
+
+    def foreground_pid(self):
+        hwnd = ctypes.windll.user32.GetForegroundWindow() # type: ignore
+        if not hwnd: return None
+        pid = ctypes.c_ulong()
+        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid)) # type: ignore
+        return pid.value or None
+
+class LinuxForegroundBackend(ForegroundBackend):
+    name = "linux"
+
+    def __init__(self, pid_source=None, proc_root="/proc"):
+        # pid_source: optional callable (or path to a file holding a pid) that a desktop
+        # hook can feed; otherwise the foreground process group of our controlling tty is used
+        self.pid_source = pid_source
+        self.proc_root = proc_root
+        self.btime = None # boot time, read once (psutil's create_time = btime + starttime)
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def foreground_pid(self):
+        if callable(self.pid_source): return self.pid_source()
+        if isinstance(self.pid_source, str):
+            try:
+                with open(self.pid_source, 'r') as f: return int(f.read().strip() or 0) or None
+            except (OSError, ValueError): return None
+        return self.tty_foreground_pid()
+
+    def tty_foreground_pid(self):
+        try:
+            with open(os.path.join(self.proc_root, "self", "stat"), 'r') as f: stat = f.read()
+            # Fields after the ")" of comm: state ppid pgrp session tty_nr tpgid
+            tpgid = int(stat.rsplit(")", 1)[1].split()[5])
+            # Our own group in the foreground means the engine itself: nothing to report
+            return tpgid if tpgid > 0 and tpgid != os.getpgrp() else None
+        except (OSError, ValueError, IndexError): return None
+
+    def create_time(self, pid):
+        # starttime (field 22) straight from /proc, no Process object; on psutil's scale so it
+        # compares with ProcessTable entries
+        try:
+            with open(os.path.join(self.proc_root, str(pid), "stat"), 'r') as f: stat = f.read()
+            return float(stat.rsplit(")", 1)[1].split()[19]) / self.ticks + self.boot_time()
+        except (OSError, ValueError, IndexError, StopIteration): raise psutil.NoSuchProcess(pid)
+
+    def boot_time(self):
+        if self.btime is None:
+            with open(os.path.join(self.proc_root, "stat"), 'r') as f:
+                self.btime = next(float(line.split()[1]) for line in f if line.startswith("btime"))
+        return self.btime
+
+    def describe(self, pid):
+        create_time = self.create_time(pid)
+        count_psutil("foreground.describe")
+        return create_time, psutil.Process(pid).name()
+
+class FakeForegroundBackend(ForegroundBackend):
+    name = "fake"
+
+    def __init__(self, processes=None, pid=None):
+        self.processes = dict(processes or {}) # pid -> (create_time, name)
+        self.pid = pid
+        self.lookups = 0
+
+    def set_foreground(self, pid, name=None, create_time=0.0):
+        if name is not None: self.processes[pid] = (create_time, name)
+        self.pid = pid
+
+    def foreground_pid(self):
+        return self.pid
+
+    def describe(self, pid):
+        self.lookups += 1
+        if pid not in self.processes: raise psutil.NoSuchProcess(pid)
+        return self.processes[pid]
+
+    def create_time(self, pid):
+        if pid not in self.processes: raise psutil.NoSuchProcess(pid)
+        return self.processes[pid][0]
+
+class ForegroundResolver:
+    def __init__(self, backend=None, proctable=None):
+        self.backend = backend or default_backend()
+        self.proctable = proctable # optional: its cached entries validate for free
+        self.cache = {} # (pid, create_time) -> name
+        self.lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0}
+
+    def resolve_pid(self):
+        try: pid = self.backend.foreground_pid()
+        except Exception: return None, None
+        if not pid: return None, None
+        return pid, self.name_for(pid)
+
+    def resolve(self):
+        return self.resolve_pid()[1]
+
+    def name_for(self, pid):
+        self.stats["lookups"] += 1
+        try:
+            create_time = self.backend.create_time(pid)
+            with self.lock: name = self.cache.get((pid, create_time))
+            if name is None and self.proctable is not None:
+                entry = self.proctable.lookup(pid)
+                if entry is not None and entry.create_time == create_time: name = entry.name # same process, not a reused pid
+            if name is not None:
+                self.stats["hits"] += 1
+                return name
+            create_time, name = self.backend.describe(pid)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+        self.stats["misses"] += 1
+        with self.lock:
+            if len(self.cache) > 512: self.cache.clear()
+            self.cache[(pid, create_time)] = name
+        return name
+
+def default_backend():
+    if os.name == 'nt': return WindowsForegroundBackend()
+    if os.path.isdir("/proc"): return LinuxForegroundBackend()
+    return FakeForegroundBackend()
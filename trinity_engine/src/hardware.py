@@ -0,0 +1,253 @@
+import psutil # type: ignore
+import glob
+import json
+import os
+import platform
+import struct
+import time
+from calibration import machine_id
+
+# Hardware manifest without subprocesses (no wmic / lscpu / dmidecode).
+#   Linux    /proc/cpuinfo, /sys/devices/system/cpu (SMT siblings, packages, caches, max freq,
+#            hybrid P/E cores), /sys/devices/system/node (NUMA), SMBIOS type 17 (memory speed,
+#            root only), /sys/class/drm (GPU vendor + driver)
+#   Windows  registry (CPU name, display adapter); psutil counts for the rest
+# The manifest is persisted keyed by machine + boot id: startup reads it instantly, and a
+# missing or stale one (new boot, or older than MAX_AGE) is rescanned in the background.
+MANIFEST_FILE = "nexus_hardware.json"
+MANIFEST_VERSION = 1
+MAX_AGE = 7 * 86400.0
+PROC_ROOT = "/proc"
+SYS_CPU = "/sys/devices/system/cpu"
+SYS_NODE = "/sys/devices/system/node"
+SYS_DMI = "/sys/firmware/dmi/entries"
+SYS_DRM = "/sys/class/drm"
+SYS_ATOM = "/sys/devices/cpu_atom/cpus" # Intel hybrid: the E-cores
+CPU_FLAGS = ("sse4_2", "avx", "avx2", "avx512f", "aes", "sha_ni", "ht", "hypervisor")
+PCI_VENDORS = {"0x10de": "NVIDIA", "0x1002": "AMD", "0x8086": "Intel", "0x1af4": "VirtIO", "0x15ad": "VMware", "0x1234": "QEMU"}
+EFFICIENCY_RATIO = 0.8 # cores below 80% of the fastest max freq / capacity count as efficiency cores
+
+def read_text(path):
+    try:
+        with open(path) as f: return f.read().strip()
+    except (OSError, UnicodeDecodeError): return None
+
+def parse_cpulist(text):
+    # "0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]
+    cpus = []
+    for part in (text or "").split(","):
+        if not part.strip(): continue
+        lo, _, hi = part.partition("-")
+        cpus.extend(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+def parse_size_kb(text):
+    # "48K" / "2048K" / "32M" -> kB
+    if not text: return None
+    unit = text[-1].upper()
+    if unit.isdigit(): return int(text) // 1024
+    return int(text[:-1]) * (1024 if unit == "M" else 1)
+
+def boot_id(proc_root=PROC_ROOT):
+    return read_text(os.path.join(proc_root, "sys/kernel/random/boot_id")) or str(int(psutil.boot_time()))
+
+def identity():
+    return {"machine": machine_id(), "boot": boot_id()}
+
+# --- LINUX SOURCES ---
+def read_cpuinfo(proc_root=PROC_ROOT):
+    text = read_text(os.path.join(proc_root, "cpuinfo"))
+    if not text: return {}
+    info, mhz = {}, []
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if not sep: continue
+        key, value = key.strip(), value.strip()
+        if key in ("model name", "Model", "Hardware") and "model" not in info: info["model"] = value
+        elif key == "vendor_id" and "vendor" not in info: info["vendor"] = value
+        elif key == "cpu MHz":
+            try: mhz.append(float(value))
+            except ValueError: pass
+        elif key in ("flags", "Features") and "flags" not in info:
+            present = set(value.split())
+            info["flags"] = [flag for flag in CPU_FLAGS if flag in present]
+    if mhz: info["mhz"] = round(sum(mhz) / len(mhz))
+    return info
+
+def read_topology(sys_cpu=SYS_CPU):
+    # SMT sibling groups (physical cores), packages, per-CPU max freq / capacity, hybrid split
+    online = parse_cpulist(read_text(os.path.join(sys_cpu, "online"))) or list(range(psutil.cpu_count(logical=True) or 1))
+    cores, packages, freq, capacity = {}, set(), {}, {}
+    for cpu in online:
+        base = os.path.join(sys_cpu, f"cpu{cpu}")
+        siblings = read_text(os.path.join(base, "topology/core_cpus_list")) or read_text(os.path.join(base, "topology/thread_siblings_list"))
+        group = tuple(parse_cpulist(siblings)) if siblings else (cpu,)
+        cores[group] = True
+        package = read_text(os.path.join(base, "topology/physical_package_id"))
+        if package is not None: packages.add(package)
+        value = read_text(os.path.join(base, "cpufreq/cpuinfo_max_freq"))
+        if value: freq[cpu] = int(value) // 1000
+        value = read_text(os.path.join(base, "cpu_capacity"))
+        if value: capacity[cpu] = int(value)
+    topology = {"cpus": online, "cores": [list(g) for g in sorted(cores)], "packages": max(1, len(packages)),
+                "smt": any(len(g) > 1 for g in cores)}
+    if freq: topology["max_mhz"] = max(freq.values())
+    topology["efficiency"] = efficiency_cpus(online, freq, capacity)
+    return topology
+
+def efficiency_cpus(online, freq, capacity, atom_path=SYS_ATOM):
+    # Intel hybrid exposes cpu_atom; ARM big.LITTLE exposes cpu_capacity; otherwise a clear max-freq gap
+    atom = read_text(atom_path)
+    if atom: return parse_cpulist(atom)
+    for values in (capacity, freq):
+        if len(values) == len(online) and values:
+            top = max(values.values())
+            slow = [cpu for cpu in online if values[cpu] < top * EFFICIENCY_RATIO]
+            if slow: return slow
+    return []
+
+def read_caches(sys_cpu=SYS_CPU, cpus=None):
+    # Sizes from cpu0 plus the last-level-cache domains (which CPUs share an LLC)
+    sizes, llc_level, llc_groups = {}, 0, {}
+    for index in sorted(glob.glob(os.path.join(sys_cpu, "cpu0/cache/index*"))):
+        level, kind = read_text(os.path.join(index, "level")), read_text(os.path.join(index, "type"))
+        size = parse_size_kb(read_text(os.path.join(index, "size")))
+        if not level or size is None: continue
+        name = f"L{level}" + ({"Data": "d", "Instruction": "i"}.get(kind, ""))
+        sizes[name] = size
+        llc_level = max(llc_level, int(level))
+    if llc_level:
+        for cpu in cpus or []:
+            for index in glob.glob(os.path.join(sys_cpu, f"cpu{cpu}/cache/index*")):
+                if read_text(os.path.join(index, "level")) != str(llc_level): continue
+                shared = read_text(os.path.join(index, "shared_cpu_list"))
+                if shared: llc_groups[tuple(parse_cpulist(shared))] = True
+    return {"sizes_kb": sizes, "llc": [list(g) for g in sorted(llc_groups)]}
+
+def read_numa(sys_node=SYS_NODE):
+    nodes = []
+    for path in sorted(glob.glob(os.path.join(sys_node, "node[0-9]*")), key=lambda p: int(p.rsplit("node", 1)[1])):
+        cpus = parse_cpulist(read_text(os.path.join(path, "cpulist")))
+        mem_kb = None
+        for line in (read_text(os.path.join(path, "meminfo")) or "").splitlines():
+            if "MemTotal:" in line: mem_kb = int(line.split()[-2])
+        nodes.append({"node": int(path.rsplit("node", 1)[1]), "cpus": cpus, "mem_gb": round(mem_kb / 1048576, 2) if mem_kb else None})
+    return nodes
+
+def read_memory_modules(sys_dmi=SYS_DMI):
+    # SMBIOS type 17 (memory device): size at 0x0C, speed at 0x15, configured speed at 0x20 (MT/s)
+    modules = []
+    for path in glob.glob(os.path.join(sys_dmi, "17-*", "raw")):
+        try:
+            with open(path, 'rb') as f: raw = f.read()
+        except OSError: return None # root only: unknown, not "no modules"
+        if len(raw) < 0x17 or raw[0] != 17: continue
+        size = struct.unpack_from("<H", raw, 0x0C)[0]
+        if size in (0, 0xFFFF): continue # empty slot / unknown
+        speed = struct.unpack_from("<H", raw, 0x15)[0]
+        if len(raw) >= 0x22: speed = struct.unpack_from("<H", raw, 0x20)[0] or speed
+        modules.append(speed)
+    if not modules: return None
+    return {"modules": len(modules), "speed_mts": max(modules)}
+
+def read_gpu_linux(sys_drm=SYS_DRM):
+    gpus = []
+    for card in sorted(glob.glob(os.path.join(sys_drm, "card[0-9]"))):
+        device = os.path.join(card, "device")
+        vendor = read_text(os.path.join(device, "vendor"))
+        if vendor is None: continue
+        driver = os.path.basename(os.path.realpath(os.path.join(device, "driver"))) if os.path.exists(os.path.join(device, "driver")) else "?"
+        gpus.append(f"{PCI_VENDORS.get(vendor, vendor)} {read_text(os.path.join(device, 'device')) or ''} ({driver})".strip())
+    return ", ".join(gpus) or "Unknown"
+
+# --- WINDOWS SOURCES ---
+def read_registry(path, value):
+    try:
+        import winreg # type: ignore
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path) as key: return str(winreg.QueryValueEx(key, value)[0]).strip()
+    except (ImportError, OSError): return None
+
+def read_gpu_windows():
+    # Display adapter class key; replaces `wmic path win32_videocontroller get name`
+    base = r"SYSTEM\CurrentControlSet\Control\Class\{4d36e968-e325-11ce-bfc1-08002be10318}"
+    names = [read_registry(f"{base}\\{i:04d}", "DriverDesc") for i in range(4)]
+    return ", ".join(n for n in names if n) or "Unknown"
+
+# --- MANIFEST ---
+def scan_manifest():
+    vm = psutil.virtual_memory()
+    manifest = {"os": f"{platform.system()} {platform.release()}", "cpu_physical": psutil.cpu_count(logical=False),
+                "cpu_logical": psutil.cpu_count(logical=True), "ram_total": round(vm.total / (1024**3), 2)}
+    if os.name == 'nt':
+        manifest["cpu_model"] = read_registry(r"HARDWARE\DESCRIPTION\System\CentralProcessor\0", "ProcessorNameString") or platform.processor()
+        manifest["gpu"] = read_gpu_windows()
+        return manifest
+    info = read_cpuinfo()
+    manifest["cpu_model"] = info.get("model") or platform.processor() or platform.machine()
+    manifest["cpu_vendor"] = info.get("vendor")
+    manifest["cpu_mhz"] = info.get("mhz")
+    manifest["cpu_flags"] = info.get("flags", [])
+    if os.path.isdir(SYS_CPU):
+        topology = read_topology()
+        topology.update(read_caches(cpus=topology["cpus"]))
+        topology["numa"] = read_numa()
+        manifest["topology"] = topology
+    manifest["memory"] = read_memory_modules()
+    manifest["gpu"] = read_gpu_linux()
+    return manifest
+
+def quick_specs():
+    # What Titan shows before the first manifest exists: psutil counts only, no file reads
+    vm = psutil.virtual_memory()
+    return {"os": f"{platform.system()} {platform.release()}", "cpu_physical": psutil.cpu_count(logical=False),
+            "cpu_logical": psutil.cpu_count(logical=True), "ram_total": round(vm.total / (1024**3), 2), "gpu": "Unknown"}
+
+def load_manifest(path=MANIFEST_FILE):
+    try:
+        with open(path) as f: record = json.load(f)
+    except (OSError, ValueError): return None
+    return record if record.get("version") == MANIFEST_VERSION else None
+
+def save_manifest(manifest, ident, path=MANIFEST_FILE):
+    record = {"version": MANIFEST_VERSION, "machine": ident["machine"], "boot": ident["boot"], "scanned": time.time(), "manifest": manifest}
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f: json.dump(record, f, indent=1)
+    os.replace(tmp, path)
+    return record
+
+def is_fresh(record, ident, now=None):
+    if record is None or record["machine"] != ident["machine"] or record["boot"] != ident["boot"]: return False
+    return (now or time.time()) - record["scanned"] < MAX_AGE
+
+def cached_topology(path=MANIFEST_FILE):
+    # For consumers outside the engine (Trinity's priority manager): whatever is on disk, no scan
+    record = load_manifest(path)
+    if record is None or record["machine"] != machine_id(): return None
+    return record["manifest"].get("topology")
+
+# --- TOPOLOGY-AWARE CORE SPLIT ---
+def split_topology(topology, cpus):
+    # (foreground cpus, spare cpus) along physical boundaries: hogs go to efficiency cores when the
+    # CPU is hybrid, otherwise to whole physical cores (both SMT siblings) at the far end of the
+    # last NUMA node / LLC domain, so they never share a core or cache with the foreground
+    allowed = set(cpus)
+    efficiency = set(topology.get("efficiency") or []) & allowed
+    if efficiency and efficiency != allowed: return frozenset(allowed - efficiency), frozenset(efficiency)
+    domain = {}
+    for rank, group in enumerate((n["cpus"] for n in topology.get("numa") or [])):
+        for cpu in group: domain[cpu] = (rank, 0)
+    for rank, group in enumerate(topology.get("llc") or []):
+        for cpu in group: domain[cpu] = (domain.get(cpu, (0, 0))[0], rank)
+    cores = [[cpu for cpu in group if cpu in allowed] for group in topology.get("cores") or []]
+    cores = sorted((c for c in cores if c), key=lambda c: (domain.get(c[0], (0, 0)), c[0]))
+    if len(cores) < 2: return None
+    spare = max(1, len(cores) // 4)
+    return frozenset(cpu for c in cores[:-spare] for cpu in c), frozenset(cpu for c in cores[-spare:] for cpu in c)
+
+def format_topology(manifest):
+    t = manifest.get("topology")
+    if not t: return "n/a"
+    caches = " ".join(f"{name} {size // 1024 if size >= 1024 else size}{'MB' if size >= 1024 else 'kB'}" for name, size in sorted(t.get("sizes_kb", {}).items()))
+    hybrid = f", {len(t['cpus']) - len(t['efficiency'])}P+{len(t['efficiency'])}E threads" if t.get("efficiency") else ""
+    return (f"{t['packages']} pkg, {len(t['cores'])} cores / {len(t['cpus'])} threads{' (SMT)' if t['smt'] else ''}{hybrid}, "
+            f"{len(t.get('llc') or []) or 1} LLC domain(s), {len(t.get('numa') or []) or 1} NUMA node(s) | {caches}")
@@ -0,0 +1,190 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from sketches import apply_profile_event, profile_of, encode_profiles, decode_profiles, merge_memory
+
+# Write-ahead journal for the Nexus memory.
+# Spike events are appended as JSON lines and flushed in batches by a debounced
+# background writer. Every COMPACT_EVERY events the state is compacted into an
+# atomic snapshot ({"version": 2, "seq": N, "apps": {...}}) and the journal is reset.
+FLUSH_DELAY = 2.0
+COMPACT_EVERY = 5000
+SNAPSHOT_VERSION = 2
+
+class MemoryJournal:
+    def __init__(self, snapshot_path, apply_event, journal_path=None, flush_delay=FLUSH_DELAY, compact_every=COMPACT_EVERY, durable=True, encode=encode_profiles, decode=decode_profiles):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or snapshot_path + ".journal"
+        self.apply_event = apply_event # reducer: apply_event(state, event)
+        self.flush_delay = flush_delay
+        self.compact_every = compact_every
+        self.durable = durable # fsync batches and snapshots
+        self.encode = encode # json default= hook for non-JSON state (per-app sketches)
+        self.decode = decode # decode(state) -> state, inverse of encode after loading a snapshot
+
+        self.state = {}
+        self.seq = 0 # last event applied to self.state
+        self.snapshot_seq = 0 # last event contained in the snapshot file
+        self.journal_events = 0 # events sitting in the journal file
+        self.pending = []
+
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.writer = None
+        self.closed = False
+        self.stats = {"batches": 0, "events": 0, "compactions": 0, "recovered": 0, "torn": 0}
+
+    # --- RECOVERY ---
+    def load(self):
+        state, seq = {}, 0
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r') as f: data = json.load(f)
+                if isinstance(data, dict) and data.get("version") == SNAPSHOT_VERSION:
+                    state, seq = data.get("apps", {}), data.get("seq", 0)
+                elif isinstance(data, dict):
+                    state = data # legacy plain JSON memory
+            except Exception: state = {}
+            if self.decode:
+                try: state = self.decode(state)
+                except Exception: pass
+
+        replayed = 0
+        events = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try: record = json.loads(line)
+                    except ValueError:
+                        # Torn tail from a crash mid-write: everything before it is intact
+                        self.stats["torn"] += 1
+                        break
+                    events += 1
+                    if record.get("seq", 0) <= seq: continue # already folded into the snapshot
+                    self.apply_event(state, record["event"])
+                    seq = record["seq"]
+                    replayed += 1
+
+        with self.lock:
+            self.state = state
+            self.seq = self.snapshot_seq = seq
+            self.journal_events = events
+            self.stats["recovered"] = replayed
+        if self.stats["torn"]:
+            # Drop the torn tail so later appends start on a clean line
+            self.compact()
+        return state
+
+    # --- WRITE PATH ---
+    def append(self, event):
+        # Applies the event in memory immediately; the disk write is batched
+        with self.lock:
+            self.apply_event(self.state, event)
+            self.seq += 1
+            self.pending.append({"seq": self.seq, "event": event})
+            if self.writer is None and not self.closed:
+                self.writer = threading.Thread(target=self.writer_loop, daemon=True)
+                self.writer.start()
+                atexit.register(self.close)
+            self.wakeup.notify()
+
+    def writer_loop(self):
+        while True:
+            with self.lock:
+                self.wakeup.wait_for(lambda: self.pending or self.closed)
+                if self.closed and not self.pending: return
+            # Debounce: let a burst of spikes collapse into one batch
+            if not self.closed: time.sleep(self.flush_delay)
+            try: self.flush()
+            except Exception: pass
+
+    def flush(self):
+        with self.io_lock:
+            with self.lock:
+                batch, self.pending = self.pending, []
+            if not batch: return 0
+            data = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch)
+            with open(self.journal_path, 'a') as f:
+                f.write(data)
+                f.flush()
+                if self.durable: os.fsync(f.fileno())
+            self.stats["batches"] += 1
+            self.stats["events"] += len(batch)
+            self.journal_events += len(batch)
+            if self.journal_events >= self.compact_every: self.compact_locked()
+            return len(batch)
+
+    # --- MERGE ---
+    def merge(self, other):
+        # Fold another session's / machine's memory in; not an event, so it lands as a snapshot
+        with self.lock: merge_memory(self.state, other)
+        self.compact()
+        return self.state
+
+    # --- COMPACTION ---
+    def compact(self):
+        with self.io_lock:
+            self.compact_locked()
+
+    def compact_locked(self):
+        with self.lock:
+            # Pending events are folded in too; once written they replay as no-ops (seq <= snapshot)
+            seq = self.seq
+            payload = json.dumps({"version": SNAPSHOT_VERSION, "seq": seq, "apps": self.state}, separators=(",", ":"), default=self.encode)
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write(payload)
+            f.flush()
+            if self.durable: os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # A crash before this truncate is harmless: replay skips seq <= snapshot seq
+        open(self.journal_path, 'w').close()
+        self.snapshot_seq = seq
+        self.journal_events = 0
+        self.stats["compactions"] += 1
+
+    def close(self):
+        with self.lock:
+            if self.closed: return
+            self.closed = True
+            self.wakeup.notify_all()
+        try: self.flush()
+        except Exception: pass
+
+# --- REDUCERS ---
+# Events: {"app", "type", "ts", "cpu", "ram", "start"?} per spike tick, {"app", "end": seconds}
+# when an episode closes. Per-app distributions live in entry["profile"] (see sketches.py).
+def apply_quantum_spike(history, event):
+    # nexus_quantum_memory.json: {"app": {"spikes": n, "type": "CPU"|"RAM"|..., "profile": {...}}}
+    entry = history.setdefault(event["app"], {"spikes": 0, "type": "unknown"})
+    if not apply_profile_event(entry, event): return
+    entry["spikes"] += 1
+    entry["type"] = profile_of(entry).dominant()
+
+def apply_trinity_lag(stats, event):
+    # nexus_memory.json: {"app": {"lag_count": n, "bottleneck_type": "CPU"|"RAM"|..., "profile": {...}}}
+    entry = stats.setdefault(event["app"], {"lag_count": 0, "bottleneck_type": "none"})
+    if not apply_profile_event(entry, event): return
+    entry["lag_count"] += 1
+    entry["bottleneck_type"] = profile_of(entry).dominant()
+
+if __name__ == "__main__":
+    # python journal.py merge [--trinity] <memory.json> <other.json> [...]
+    #   folds other sessions' / machines' memory into the first file (--trinity: nexus_memory.json format)
+    args = [a for a in sys.argv[1:] if a != "--trinity"]
+    if len(args) >= 3 and args[0] == "merge":
+        reducer = apply_trinity_lag if "--trinity" in sys.argv else apply_quantum_spike
+        target = MemoryJournal(args[1], reducer)
+        target.load()
+        for path in args[2:]:
+            source = MemoryJournal(path, reducer)
+            target.merge(source.load())
+            print(f"Merged {len(source.state)} apps from {path}.")
+        target.close()
+        print(f"{args[1]}: {len(target.state)} apps.")
+    else:
+        print("usage: python journal.py merge [--trinity] <memory.json> <other.json> [...]")
@@ -0,0 +1,150 @@
+import psutil # type: ignore
+import time
+from collections import deque
+from diagnostics import measured
+
+# Launch profiles.
+# A cheap pid-list diff against the process table (ProcessTable.poll, every LAUNCH_POLL s)
+# spots new processes by (pid, create_time) between full refreshes. When one belongs to an
+# app with a learned heavy profile, its session profile is applied at once: priority and
+# affinity (pinned in the PriorityManager, so foreground boosts do not undo them), a
+# pre-emptive memory trim and tighter sampling. Everything is reverted when the app's last
+# process exits. Launch-to-apply latency is measured against create_time (target 500 ms).
+LAUNCH_POLL = 0.25
+LAUNCH_TARGET_MS = 500.0
+LATENCY_HISTORY = 256
+
+def derive_profile(app, stats, profile=None, cpu_limit=85, ram_limit=85):
+    # What to do on launch, from the app's lag memory; None = nothing learned worth acting on
+    if not stats: return None
+    if profile is not None and profile.episodes:
+        if not profile.is_heavy(cpu_limit, ram_limit): return None
+        dominant = profile.dominant()
+    else:
+        if stats.get("lag_count", 0) <= 2: return None
+        dominant = stats.get("bottleneck_type")
+    return {"app": app, "dominant": dominant, "level": "high",
+            "isolate": dominant == "CPU", # main cores for CPU-bound apps, hogs stay off them
+            "trim": dominant in ("RAM", "SWAP"), # make room before it starts allocating
+            "fast": True}
+
+def create_time_skew():
+    # psutil's create_time rests on the whole-second boot time of /proc/stat on Linux, so it
+    # reads up to 1 s early - enough to swamp a 500 ms budget. CLOCK_BOOTTIME gives the real one.
+    try: return psutil.boot_time() - (time.time() - time.clock_gettime(time.CLOCK_BOOTTIME))
+    except (AttributeError, OSError): return 0.0
+
+def describe(profile):
+    parts = [f"{profile['level'].upper()} priority"]
+    if profile["isolate"]: parts.append("main cores")
+    if profile["trim"]: parts.append("RAM pre-trimmed")
+    if profile["fast"]: parts.append("fast sampling")
+    return ", ".join(parts)
+
+class LaunchProfiles:
+    def __init__(self, proctable, scheduler, lookup, priority=None, trim=None, tighten=None, notify=None,
+                 clock=time.time, interval=LAUNCH_POLL, target_ms=LAUNCH_TARGET_MS):
+        self.proctable = proctable
+        self.scheduler = scheduler
+        self.lookup = lookup # callback(name) -> profile dict (derive_profile) or None
+        self.priority = priority # optional PriorityManager (pin/unpin)
+        self.trim = trim # optional callback() - pre-emptive memory trim
+        self.tighten = tighten # optional callback(bool) - fast sampling on (first session) / off (last exit)
+        self.notify = notify # optional callback(str)
+        self.clock = clock
+        self.interval = interval
+        self.target_ms = target_ms
+        self.sessions = {} # app -> {"profile", "keys": set of (pid, create_time), "started"}
+        self.by_key = {} # (pid, create_time) -> app
+        self.generation = None
+        self.started = None
+        self.skew = 0.0 # create_time error (create_time_skew), real clock only
+        self.latencies = deque(maxlen=LATENCY_HISTORY) # launch -> applied, ms
+        self.stats = {"polls": 0, "launches": 0, "applied": 0, "reverted": 0, "late": 0, "poll_ms_last": 0.0, "poll_ms_max": 0.0}
+
+    def start(self):
+        # Baseline first: already-running profiled apps get their profile, without a latency sample
+        self.started = self.clock()
+        if self.clock is time.time and psutil.LINUX: self.skew = create_time_skew()
+        self.proctable.poll()
+        self.generation = self.proctable.generation
+        for entry in self.proctable.values():
+            self.launched((entry.pid, entry.create_time), entry.name, measure=False)
+        self.scheduler.every("launch.watch", self.interval, self.poll, replace=True)
+        return self
+
+    def stop(self):
+        self.scheduler.cancel("launch.watch")
+        for app in list(self.sessions): self.end(app)
+
+    @measured("launch_watch")
+    def poll(self):
+        t0 = time.perf_counter()
+        new_keys, gone = self.proctable.poll()
+        if self.proctable.generation != self.generation:
+            # A full refresh ran since the last poll: take its diff too (catches pid reuse)
+            self.generation = self.proctable.generation
+            new_keys = new_keys + self.proctable.new_keys
+            gone = gone + self.proctable.exited
+        for key in gone:
+            app = self.by_key.pop(key, None)
+            if app is None: continue
+            session = self.sessions.get(app)
+            if session is None: continue
+            session["keys"].discard(key)
+            if self.priority is not None: self.priority.unpin(key)
+            if not session["keys"]: self.end(app)
+        for key in new_keys:
+            entry = self.proctable.lookup(key[0])
+            if entry is not None and entry.create_time == key[1]: self.launched(key, entry.name)
+        ms = (time.perf_counter() - t0) * 1000
+        self.stats["polls"] += 1
+        self.stats["poll_ms_last"] = ms
+        self.stats["poll_ms_max"] = max(self.stats["poll_ms_max"], ms)
+
+    def launched(self, key, name, measure=True):
+        if key in self.by_key: return
+        session = self.sessions.get(name)
+        profile = session["profile"] if session else self.lookup(name)
+        if profile is None: return
+        self.stats["launches"] += 1
+        fast_before = any(s["profile"]["fast"] for s in self.sessions.values())
+        first = session is None
+        if first: session = self.sessions[name] = {"profile": profile, "keys": set(), "started": self.clock()}
+        session["keys"].add(key)
+        self.by_key[key] = name
+        try:
+            if self.priority is not None: self.priority.pin(key, profile["level"], isolate=profile["isolate"])
+            if first and profile["trim"] and self.trim: self.trim()
+            if first and profile["fast"] and self.tighten and not fast_before: self.tighten(True)
+        except Exception: pass
+        self.stats["applied"] += 1
+        latency_ms = None
+        launched_at = key[1] - self.skew
+        if measure and launched_at >= (self.started or 0):
+            latency_ms = max(0.0, (self.clock() - launched_at) * 1000)
+            self.latencies.append(latency_ms)
+            if latency_ms > self.target_ms: self.stats["late"] += 1
+        if first and self.notify:
+            after = f" ({latency_ms:.0f} ms after launch)" if latency_ms is not None else ""
+            self.notify(f"PROFILE: '{name}' started -> {describe(profile)}{after}.")
+
+    def end(self, app):
+        session = self.sessions.pop(app)
+        for key in session["keys"]:
+            self.by_key.pop(key, None)
+            if self.priority is not None: self.priority.unpin(key)
+        if session["profile"]["fast"] and self.tighten and not any(s["profile"]["fast"] for s in self.sessions.values()):
+            try: self.tighten(False)
+            except Exception: pass
+        self.stats["reverted"] += 1
+        if self.notify: self.notify(f"PROFILE: '{app}' exited after {self.clock() - session['started']:.0f}s -> profile reverted.")
+
+    def latency(self):
+        ordered = sorted(self.latencies)
+        if not ordered: return {"samples": 0, "p50_ms": None, "p90_ms": None, "max_ms": None, "target_ms": self.target_ms}
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+        return {"samples": len(ordered), "p50_ms": pick(0.5), "p90_ms": pick(0.9), "max_ms": round(ordered[-1], 1), "target_ms": self.target_ms}
+
+    def summary(self):
+        return dict(self.stats, active=sorted(self.sessions), latency=self.latency())
@@ -0,0 +1,487 @@
+import os
+import ctypes
+import subprocess
+import threading
+import time
+from telemetry import get_sampler
+from timeseries import TimeSeriesStore
+from journal import MemoryJournal, apply_quantum_spike
+from proctable import ProcessTable
+from foreground import ForegroundResolver
+from binlog import HistoryLog, import_json_memory, KIND_BY_TYPE
+from scheduler import get_scheduler
+from adaptive import AdaptiveRate
+from sentinel import ActionExecutor
+from oracle import Oracle
+from signals import SignalSources
+from eventbus import EventBus
+from diagnostics import get_instruments, measured
+from calibration import run_calibration, record_run, latest_run, format_run
+from policy import Policy, POLICY_FILE, DEFAULT_LIMITS, app_fields
+from hardware import identity, load_manifest, save_manifest, scan_manifest, quick_specs, is_fresh, split_topology, format_topology
+
+# Headless engine layer (Titan + Nexus). Must never import GUI toolkits:
+# quantum_engine.py (the dashboard) and nexus_daemon.py both build on this module.
+
+# Windows API Constants
+CREATE_NO_WINDOW = 0x08000000
+
+# Engine Config
+NEURAL_INTERVAL = 2.0
+NEURAL_INTERVALS = {"IDLE": 10.0, "NORMAL": NEURAL_INTERVAL, "FAST": 1.0} # follows the adaptive sampling state
+AI_MEMORY_FILE = "nexus_quantum_memory.json"
+HISTORY_FILE = "nexus_history.bin"
+LEGACY_MEMORY_FILES = [AI_MEMORY_FILE, "nexus_memory.json"]
+DEFAULT_PATHS = {"memory": AI_MEMORY_FILE, "history": HISTORY_FILE, "legacy": LEGACY_MEMORY_FILES, "policy": POLICY_FILE}
+
+def format_bytes(value):
+    for unit in ("B", "kB", "MB", "GB"):
+        if value < 1000: return f"{value:.1f} {unit}"
+        value /= 1000.0
+    return f"{value:.1f} TB"
+
+# --- ENGINE 1: TITAN HARDWARE CORE ---
+class TitanHardwareCore:
+    def __init__(self):
+        self.hardware_specs = {}
+        self.calibration = None # last calibration run (calibration.py), measured capacity + derived limits
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.refresher = None
+
+    def scan_hardware(self, wait=False):
+        # Instant: the persisted manifest (keyed by machine + boot id, no subprocess anywhere);
+        # a missing or stale one is rescanned in the background and listeners are told
+        try:
+            ident = identity()
+            record = load_manifest()
+            if record is not None and record['machine'] == ident['machine']: self.set_specs(record['manifest'])
+            elif not self.hardware_specs: self.set_specs(quick_specs())
+            if not is_fresh(record, ident):
+                if wait: self.refresh_manifest(ident)
+                else: self.refresh_async(ident)
+            return True
+        except Exception:
+            return False
+
+    def set_specs(self, manifest):
+        specs = dict(manifest)
+        if self.calibration: specs['calibration'] = self.calibration
+        self.hardware_specs = specs
+
+    def refresh_manifest(self, ident=None):
+        try:
+            manifest = scan_manifest()
+            save_manifest(manifest, ident or identity())
+        except Exception: return None
+        self.set_specs(manifest)
+        for callback in list(self.listeners):
+            try: callback(self.hardware_specs)
+            except Exception: pass
+        return manifest
+
+    def refresh_async(self, ident=None):
+        with self.lock:
+            if self.refresher is not None and self.refresher.is_alive(): return
+            self.refresher = threading.Thread(target=self.refresh_manifest, args=(ident,), name="titan-manifest", daemon=True)
+            self.refresher.start()
+
+    def on_update(self, callback):
+        # callback(specs) from the refresh thread once a background rescan finished
+        self.listeners.append(callback)
+
+    def core_split(self):
+        # (foreground cpus, spare cpus) along the scanned topology, None without one
+        topology = self.hardware_specs.get('topology')
+        return split_topology(topology, topology['cpus']) if topology else None
+
+    def calibrate(self, timeseries=None):
+        # Microbenchmarks + idle baseline (several seconds, never on the UI thread); persisted and compared
+        self.calibration = record_run(run_calibration(timeseries))
+        self.hardware_specs['calibration'] = self.calibration
+        return self.calibration
+
+    def load_calibration(self):
+        # Last persisted run for this machine, no benchmarks
+        try: self.calibration = latest_run()
+        except: self.calibration = None
+        if self.calibration: self.hardware_specs['calibration'] = self.calibration
+        return self.calibration
+
+    def get_report(self):
+        s = self.hardware_specs
+        if self.calibration: return self.get_calibrated_report()
+        return f"""
+[SYSTEM HARDWARE MANIFEST]
+==========================
+OS:       {s.get('os', 'Unknown')}
+CPU:      {s.get('cpu_physical', '?')} Cores / {s.get('cpu_logical', '?')} Threads
+RAM:      {s.get('ram_total', '?')} GB
+GPU:      {s.get('gpu', 'Unknown')}
+{self.topology_report()}
+==========================
+TITAN ANALYSIS:
+> CPU Bottleneck Risk: {'HIGH' if s.get('cpu_physical', 4) < 4 else 'LOW'} # type: ignore
+> RAM Bottleneck Risk: {'HIGH' if s.get('ram_total', 8) < 16 else 'LOW'} # type: ignore
+{self.split_report()}
+        """
+
+    def topology_report(self):
+        s = self.hardware_specs
+        memory = s.get('memory') or {}
+        speed = f"{memory['modules']} modules @ {memory['speed_mts']} MT/s" if memory else "speed n/a"
+        return f"""MODEL:    {s.get('cpu_model', 'Unknown')}{f" @ {s['cpu_mhz']} MHz" if s.get('cpu_mhz') else ''}
+TOPOLOGY: {format_topology(s)}
+MEMORY:   {speed}"""
+
+    def split_report(self):
+        split = self.core_split()
+        if not split: return "> Boost Split: none (single core)"
+        main, spare = split
+        return f"> Boost Split: foreground on {len(main)} CPUs, background hogs on {len(spare)} ({','.join(map(str, sorted(spare)))})"
+
+    def get_calibrated_report(self):
+        # Risk from measured capacity instead of core-count / GB cut-offs
+        s, c = self.hardware_specs, self.calibration
+        derived, base = c['derived'], c['baseline']
+        cpu_risk = 'HIGH' if derived['cpu_limit_soft'] < 85 or (base['cpu_p90'] or 0) > 50 else 'LOW'
+        ram_risk = 'HIGH' if derived['ram_limit_soft'] < 85 or (base['ram_p90'] or 0) > derived['ram_limit_soft'] - 15 else 'LOW'
+        regressions = ", ".join(c.get('regressions', [])) or "none"
+        return f"""
+[SYSTEM HARDWARE MANIFEST]
+==========================
+OS:       {s.get('os', c['os'])}
+CPU:      {c['cpu_physical']} Cores / {c['cpu_logical']} Threads
+RAM:      {c['ram_total']} GB
+GPU:      {s.get('gpu', 'Unknown')}
+{self.topology_report()}
+==========================
+TITAN CALIBRATION ({time.strftime('%Y-%m-%d %H:%M', time.localtime(c['ts']))}):
+{format_run(c)}
+==========================
+TITAN ANALYSIS:
+> CPU Bottleneck Risk: {cpu_risk}
+> RAM Bottleneck Risk: {ram_risk}
+> Regressions vs previous runs: {regressions}
+{self.split_report()}
+        """
+
+# --- ENGINE 2: NEXUS HIVE MIND (AI CONTROLLER) ---
+class NexusHiveMind:
+    def __init__(self, titan_ref, sampler=None, scheduler=None, adaptive=True, clock=None, paths=None):
+        self.titan = titan_ref
+        self.scheduler = scheduler or get_scheduler()
+        self.sampler = sampler or get_sampler()
+        # None = real clocks; trace replay (replay.py) drives everything from one simulated clock
+        self.clock = clock
+        self.paths = dict(DEFAULT_PATHS, **(paths or {}))
+
+        # Rolling CPU/RAM history (fixed memory, 1s -> 10s -> 1min tiers)
+        self.timeseries = TimeSeriesStore(clock=clock or time.time)
+        self.sampler.subscribe(self.timeseries.record_snapshot)
+
+        # Short-horizon forecasts (system-wide + per app)
+        self.oracle = Oracle()
+        self.sampler.subscribe(self.oracle.observe_snapshot)
+
+        # Every process, not just the foreground window
+        self.proctable = ProcessTable()
+        self.foreground = ForegroundResolver(proctable=self.proctable)
+        # Stall signals (PSI, disk, swap, NIC) for bottleneck types beyond CPU/RAM
+        self.signals = SignalSources()
+        self.events = EventBus(clock=clock or time.time) # bounded, coalescing feed (dashboard / daemon drain it by cursor)
+        self.is_active = True
+        self.recorder = None # optional TraceRecorder (replay.py), fed after every neural tick
+        self.active_app = None
+        self.foreground_pid = None
+        
+        # Sub-Modules
+        self.module_cortex = True # Pattern Rec
+        self.module_sentinel = True # Active Defense
+        self.module_oracle = True # Prediction
+
+        # Memory: snapshot + write-ahead journal of spike events, per-app sketches inside
+        self.journal = MemoryJournal(self.paths["memory"], apply_quantum_spike)
+        self.history = self.load_memory()
+        self.episodes = {} # app -> ts its current spike episode started
+        self.sampler.subscribe(self.archive.append_snapshot)
+        
+        # Hardware limits (Calibrated by Titan); limits set explicitly in the policy file win
+        self.base_limits = dict(DEFAULT_LIMITS)
+        self.cpu_limit_soft = 85
+        self.ram_limit_soft = 85
+        self.cpu_critical = 90
+
+        # Declarative rules: conditions on metrics / app stats / processes -> actions (policy.py)
+        self.policy = Policy(self.paths["policy"], on_reload=lambda policy: self.apply_limits(),
+                             on_error=lambda message: self.events.publish(f"POLICY: {message} - keeping previous rules."))
+        if clock is None: self.policy.watch(self.scheduler) # replay: the policy under test is fixed
+
+        # Own cost: loop timings, scheduler jitter, CPU/RSS/threads, psutil calls per tick
+        self.instruments = get_instruments()
+        if clock is None: self.instruments.attach(self.scheduler, self.sampler) # replay: loop timings only
+
+        # Neural tick runs on the shared scheduler (no thread of its own)
+        self.scheduler.every("nexus.neural", NEURAL_INTERVAL, self.neural_tick)
+
+        # Sentinel actions: hysteresis + cooldown + measured effect
+        self.actions = ActionExecutor(self.sampler, self.scheduler, clock=clock or time.monotonic, notify=self.events.put)
+        self.actions.register("flux_capacitor", self.deploy_flux_capacitor, metric="ram", enter=lambda: self.ram_limit_soft, exit_margin=5, cooldown=30.0)
+
+        # Adaptive sampling: slow down when idle, speed up near the soft limits
+        self.adaptive = None
+        self.sampling_bands = None # calibrated intervals (ingest_hardware_data)
+        if adaptive: self.set_adaptive_sampling(True)
+
+    def load_memory(self):
+        # Long-term history is mmapped on demand, never parsed up front
+        self.archive = HistoryLog(self.paths["history"])
+        try: import_json_memory(self.paths["legacy"], self.archive) # one-time legacy import
+        except: pass
+
+        # Snapshot + journal replay (a torn tail from a crash is dropped)
+        try: return self.journal.load()
+        except: return {}
+
+    @measured("save_memory")
+    def save_memory(self):
+        # Force the pending journal batch to disk (normally done by the background writer)
+        try: self.journal.flush()
+        except: pass
+
+    def ingest_hardware_data(self, specs):
+        calibration = specs.get('calibration')
+        if calibration:
+            # Measured capacity wins over the size heuristics below
+            derived = calibration['derived']
+            self.base_limits.update(cpu_limit_soft=derived['cpu_limit_soft'], ram_limit_soft=derived['ram_limit_soft'])
+            self.apply_limits()
+            self.proctable.budget_ms = derived['scan_budget_ms']
+            self.sampling_bands = {"intervals": derived['intervals']}
+            if self.adaptive is not None: self.adaptive.set_bands(self.sampling_bands)
+            self.events.publish(f"TITAN: Calibrated limits CPU {self.cpu_limit_soft}% / RAM {self.ram_limit_soft}%, scan budget {derived['scan_budget_ms']:.0f} ms.")
+            for metric in calibration.get('regressions', []): self.events.publish(f"TITAN: {metric} regressed vs previous calibrations.")
+            return
+        ram = specs.get('ram_total', 16)
+        # Adapt thresholds based on hardware
+        if ram < 8: self.base_limits['ram_limit_soft'] = 75 # Be more aggressive on low RAM
+        if ram > 32: self.base_limits['ram_limit_soft'] = 92 # Relax on high RAM
+        self.apply_limits()
+
+    def apply_limits(self):
+        # Calibrated / size-derived limits, overridden by any the policy file sets (re-run on every reload)
+        limits = dict(self.base_limits, **self.policy.compiled.limits)
+        self.cpu_limit_soft = limits['cpu_limit_soft']
+        self.ram_limit_soft = limits['ram_limit_soft']
+        self.cpu_critical = limits['cpu_critical']
+
+    def set_adaptive_sampling(self, enabled, bands=None):
+        if enabled:
+            bands = bands or self.sampling_bands
+            if self.adaptive is not None:
+                self.adaptive.set_bands(bands)
+                return
+            self.adaptive = AdaptiveRate(lambda: (self.cpu_limit_soft, self.ram_limit_soft), bands, base_interval=self.sampler.base_interval,
+                                         clock=self.clock or time.monotonic)
+            self.adaptive.on_change(self.on_sampling_state)
+            self.sampler.set_adaptive(self.adaptive)
+        else:
+            self.adaptive = None
+            self.sampler.set_adaptive(None)
+            self.on_sampling_state("NORMAL")
+
+    def on_sampling_state(self, state):
+        self.scheduler.set_interval("nexus.neural", NEURAL_INTERVALS.get(state, NEURAL_INTERVAL), reschedule=True)
+
+    def set_modules(self, cortex, sentinel, oracle):
+        self.module_cortex = cortex
+        self.module_sentinel = sentinel
+        self.module_oracle = oracle
+
+    @measured("neural_tick")
+    def neural_tick(self):
+        if not self.is_active: return
+        try:
+            snap = self.sampler.snapshot()
+
+            # 1. CORTEX: Analyze State
+            if self.module_cortex:
+                self.proctable.refresh()
+                self.cortex_analyze(snap)
+            
+            # 2. ORACLE: Predict (acts before the spike)
+            if self.module_oracle:
+                self.oracle_predict(snap)
+
+            # 3. SENTINEL: React
+            if self.module_sentinel:
+                self.sentinel_react(snap)
+
+            if self.recorder is not None:
+                self.recorder.record_tick(snap)
+
+        except Exception:
+            pass
+
+    @measured("cortex_analyze")
+    def cortex_analyze(self, snap=None):
+        snap = snap or self.sampler.snapshot()
+        cpu = snap.cpu
+        ram = snap.ram
+        active_app = self.get_active_app()
+        usage = self.proctable.usage(active_app) if active_app else None
+        if usage:
+            # The app's own share of the machine (its processes only), same % scale as the system series
+            app_cpu, app_rss = usage
+            app_ram = app_rss * 100.0 / snap.ram_total if snap.ram_total else 0.0
+            self.timeseries.record_app(active_app, snap.ts, app_cpu, app_ram)
+            self.oracle.observe_app(active_app, snap.ts, app_cpu, app_ram)
+
+        culprit = None
+        self.signals.sample()
+        bottleneck = self.signals.classify(cpu, ram, self.cpu_limit_soft, self.ram_limit_soft)
+        if bottleneck:
+            # Top consumers across the whole process table (background hogs included)
+            if bottleneck == "IO": consumers = self.signals.top_io(self.proctable.processes(), 5)
+            else: consumers = self.proctable.top_names(5, "rss" if bottleneck in ("RAM", "SWAP") else "cpu")
+            culprit = active_app or (consumers[0][0] if consumers else None)
+        self.close_episodes(snap.ts, keep=culprit)
+        if culprit:
+            start = culprit not in self.episodes
+            if start: self.episodes[culprit] = snap.ts
+
+            # Record Pattern (journaled, flushed in the background; feeds the app's sketches)
+            self.journal.append({"app": culprit, "type": bottleneck, "ts": snap.ts, "cpu": cpu, "ram": ram, "start": start,
+                                 "top": [name for name, _ in consumers]})
+            self.archive.append(snap.ts, KIND_BY_TYPE[bottleneck], culprit, cpu, ram)
+
+            if bottleneck in ("CPU", "RAM"):
+                # Duration and trend from the rolling history
+                metric = bottleneck.lower()
+                limit = self.cpu_limit_soft if bottleneck == "CPU" else self.ram_limit_soft
+                sustained = self.timeseries.time_above(metric, limit)
+                trend = (self.timeseries.mean(metric, 10) or 0) - (self.timeseries.mean(metric, 60) or 0)
+                detail = f"{sustained:.0f}s sustained, trend {trend:+.0f}%"
+            else:
+                detail = self.describe_stall(bottleneck)
+            self.events.publish(f"CORTEX: Lag pattern detected in '{culprit}' ({bottleneck} Spike, {detail}).")
+            profile = self.app_profile(culprit)
+            if start and profile is not None and profile.is_heavy(self.cpu_limit_soft, self.ram_limit_soft):
+                p = profile.summary()
+                self.events.publish(f"CORTEX: '{culprit}' is a known heavy app ({p['episodes']} episodes, typically {p['duration_p50_s']:.0f}s, p90 CPU {p['cpu_p90']}% / RAM {p['ram_p90']}%, mostly {p['dominant']}).")
+            if consumers:
+                if bottleneck in ("CPU", "NET"): top = ", ".join(f"{name} {value:.0f}%" for name, value in consumers)
+                else: top = ", ".join(f"{name} {format_bytes(value)}" for name, value in consumers)
+                self.events.publish(f"CORTEX: Top consumers -> {top}")
+
+    def describe_stall(self, bottleneck):
+        s = self.signals.latest
+        if bottleneck == "IO": return f"disk busy {s['disk_busy'] or 0:.0f}%, I/O stall {s['psi_io_full'] or 0:.0f}%"
+        if bottleneck == "SWAP": return f"{s['swap_pages_s'] or 0:.0f} pages/s swapped, memory stall {s['psi_mem_some'] or 0:.0f}%"
+        return f"link {s['net_util'] or 0:.0f}% utilised"
+
+    def close_episodes(self, ts, keep=None):
+        # An episode ends on the first tick its app is no longer the spike culprit
+        for app in [a for a in self.episodes if a != keep]:
+            self.journal.append({"app": app, "end": max(0.0, ts - self.episodes.pop(app))})
+
+    def app_profile(self, app):
+        # Streaming spike distributions for `app` (None until it has spiked once)
+        entry = self.history.get(app)
+        return entry.get("profile") if entry else None
+
+    @measured("oracle_predict")
+    def oracle_predict(self, snap=None):
+        snap = snap or self.sampler.snapshot()
+        app = self.get_active_app()
+        for metric, limit in (("ram", self.ram_limit_soft), ("cpu", self.cpu_limit_soft)):
+            prediction = self.oracle.predict(metric, limit) or (self.oracle.predict(metric, limit, app) if app else None)
+            if not prediction: continue
+            eta, forecast = prediction
+            self.events.publish(f"ORACLE: {metric.upper()} predicted to cross {limit}% in {eta:.0f}s{f' ({app})' if app else ''}.")
+            # Pre-emptive strike: Sentinel sees the forecast instead of the current value
+            if metric == "ram" and self.module_sentinel:
+                self.actions.trigger("flux_capacitor", snap, value=forecast)
+
+    @measured("sentinel_react")
+    def sentinel_react(self, snap=None):
+        # Autonomous fixes: the policy decides what is wanted, the executor whether it may run now
+        snap = snap or self.sampler.snapshot()
+        policy = self.policy
+        ctx = policy.context(snap, cpu_limit_soft=self.cpu_limit_soft, ram_limit_soft=self.ram_limit_soft, cpu_critical=self.cpu_critical,
+                             **self.signals.latest)
+        if policy.uses("app."):
+            ctx.update(app_fields(self.active_app, self.app_profile(self.active_app), self.cpu_limit_soft, self.ram_limit_soft))
+        procs = ()
+        if policy.has_process_rules():
+            procs = policy.process_views(self.proctable, snap.ts, self.foreground_pid)
+        fired, matches = policy.evaluate(ctx, procs)
+        for name in policy.due_actions(fired, self.actions):
+            self.actions.trigger(name, snap)
+        for rule in fired:
+            for action in rule.then:
+                if action not in self.actions.actions: self.policy_action(action, rule)
+        for rule, proc in policy.fresh(matches, snap.ts):
+            for action in rule.then: self.policy_action(action, rule, proc)
+
+    def policy_action(self, action, rule, proc=None):
+        # Rule actions that are not Sentinel executor actions (unknown names are ignored)
+        if action == "notify":
+            target = f" for '{proc[1]}' (pid {proc[0]})" if proc else ""
+            self.events.publish(f"POLICY: Rule '{rule.name}' matched{target}.")
+        elif action == "trim" and proc:
+            self.force_ram_clean(proc[0])
+        elif action == "network_reset":
+            self.optimize_network()
+
+    def deploy_flux_capacitor(self):
+        self.events.publish("SENTINEL: RAM Critical. Deploying FLUX CAPACITOR...")
+        self.force_ram_clean()
+
+
+    def force_ram_clean(self, pid=None):
+        try:
+            if os.name == 'nt':
+                PID = pid or os.getpid()
+                handle = ctypes.windll.kernel32.OpenProcess(0x1F0FFF, False, PID) # type: ignore
+                success = ctypes.windll.psapi.EmptyWorkingSet(handle) # type: ignore
+                ctypes.windll.kernel32.CloseHandle(handle) # type: ignore
+                if success:
+                     self.events.publish("SENTINEL: RAM Purge Successful.")
+                else:
+                     self.events.publish("SENTINEL: RAM Purge Failed (Access Denied?).")
+        except Exception as e:
+            self.events.publish(f"SENTINEL ERROR: {e}")
+
+    def optimize_network(self):
+         try:
+            if os.name == 'nt':
+                subprocess.run(["ipconfig", "/flushdns"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=CREATE_NO_WINDOW) # type: ignore
+                self.events.publish("SENTINEL: Network Reset Complete.")
+         except Exception as e:
+            self.events.publish(f"SENTINEL ERROR: {e}")
+
+    def diagnostics(self):
+        # Machine-readable self-overhead dump (see diagnostics.py)
+        return dict(self.instruments.dump(), policy=dict(self.policy.stats, error=self.policy.error, rules=len(self.policy.compiled.rules)))
+
+    def get_active_app(self):
+        # Platform backend + pid->name cache (see foreground.py); last answer kept for the recorder
+        try: self.foreground_pid, self.active_app = self.foreground.resolve_pid()
+        except: self.foreground_pid, self.active_app = None, None
+        return self.active_app
+
+# --- ENGINE FACTORY ---
+def start_engine(sampler=None):
+    # Exactly one Titan + one Nexus (and one neural job) per process
+    titan = TitanHardwareCore()
+    nexus = NexusHiveMind(titan, sampler)
+    # Limits from the last calibration on this machine (python calibration.py / --calibrate); cheap file read
+    if titan.load_calibration(): nexus.ingest_hardware_data(titan.hardware_specs)
+    return titan, nexus
+
+def calibrate_engine(titan, nexus):
+    # Calibration mode: benchmark, persist, apply the derived limits to the running Nexus
+    titan.calibrate(nexus.timeseries)
+    nexus.ingest_hardware_data(titan.hardware_specs)
+    return titan.calibration
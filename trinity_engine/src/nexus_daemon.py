@@ -0,0 +1,77 @@
+import sys
+import time
+import logging
+from nexus_core import start_engine, calibrate_engine
+from eventbus import setup_logging
+from engine_process import start_engine_process
+from telemetry_api import TelemetryAPI, SOCKET_PATH, HTTP_PORT
+from replay import TraceRecorder, TRACE_FILE
+
+# Headless entry point: Titan + Nexus with no GUI imports at all.
+#   python nexus_daemon.py          run the engine, Nexus feed goes to the log/stdout
+#   python nexus_daemon.py --gui    same engine, dashboard attached on top (lazy import)
+#   add --process to run the engine in a supervised worker process (restarted if it crashes)
+#   add --api to serve telemetry on a Unix socket, --http [PORT] for localhost HTTP / Prometheus
+#   add --profile to sample stacks of loops that overrun their budget (see diagnostics.py)
+#   add --record [TRACE] to write a replayable trace (see replay.py; in-process engine only)
+#   add --calibrate to benchmark this machine first and derive the limits from it (see calibration.py)
+def run_headless(titan, nexus):
+    titan.scan_hardware()
+    logging.info(titan.get_report())
+    cursor = 0
+    try:
+        while True:
+            # Drain the Nexus feed the way the dashboard would (events are already in the JSONL log)
+            events, cursor, dropped = nexus.events.drain(cursor)
+            if dropped: print(f"... {dropped} events dropped", flush=True)
+            for event in events: print(event.render(), flush=True)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+
+def attach_gui(titan, nexus):
+    # Only now do customtkinter / pystray / PIL get imported
+    from quantum_engine import QuantumUI
+    app = QuantumUI(titan, nexus)
+    app.mainloop()
+
+def api_options(argv):
+    # --api -> Unix socket, --http [PORT] -> localhost HTTP; None when neither is asked for
+    http_port = None
+    if "--http" in argv:
+        i = argv.index("--http")
+        http_port = int(argv[i + 1]) if i + 1 < len(argv) and argv[i + 1].isdigit() else HTTP_PORT
+    if "--api" not in argv and http_port is None: return None
+    return {"socket_path": SOCKET_PATH if "--api" in argv else None, "http_port": http_port}
+
+def trace_path(argv):
+    i = argv.index("--record")
+    return argv[i + 1] if i + 1 < len(argv) and not argv[i + 1].startswith("--") else TRACE_FILE
+
+def main(argv):
+    setup_logging() # async, rotated JSONL (quantum_logs.jsonl)
+    api = api_options(argv)
+    if "--process" in argv:
+        engine, titan, nexus = start_engine_process(api)
+        shutdown = engine.stop # the worker saves memory and closes the archive itself
+        if "--profile" in argv: engine.call("profiler", True)
+        if "--calibrate" in argv: titan.calibrate()
+    else:
+        titan, nexus = start_engine()
+        server = TelemetryAPI(nexus, **api).start() if api else None
+        if "--profile" in argv: nexus.instruments.enable_profiler()
+        if "--calibrate" in argv: calibrate_engine(titan, nexus)
+        recorder = TraceRecorder(nexus, trace_path(argv)).start() if "--record" in argv else None
+        def shutdown():
+            if recorder is not None: recorder.stop()
+            if server is not None: server.stop()
+            nexus.save_memory()
+            nexus.archive.close()
+    try:
+        if "--gui" in argv: attach_gui(titan, nexus)
+        else: run_headless(titan, nexus)
+    finally:
+        shutdown()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,151 @@
+import sys
+import threading
+import time
+
+# ORACLE: short-horizon forecasting.
+# Holt's linear smoothing (level + trend per second), updated incrementally on every
+# sample, so each tick costs O(1) per tracked series instead of a refit over history.
+# A crossing is predicted when the projected value reaches the limit within HORIZON
+# seconds while the level is already inside the approach band.
+ALPHA = 0.5           # level smoothing
+BETA = 0.3            # trend smoothing
+HORIZON = 8.0         # seconds ahead we care about
+APPROACH_BAND = 20.0  # only predict when level >= limit - band
+MIN_SLOPE = 0.5       # pts/s; flatter trends are noise
+MAX_TRACKED_APPS = 64
+
+class HoltSeries:
+    __slots__ = ("level", "trend", "ts", "n")
+
+    def __init__(self):
+        self.level = 0.0
+        self.trend = 0.0
+        self.ts = None
+        self.n = 0
+
+    def update(self, ts, value, alpha=ALPHA, beta=BETA):
+        if self.ts is None:
+            self.level, self.ts, self.n = value, ts, 1
+            return
+        dt = ts - self.ts
+        if dt <= 0: return
+        projected = self.level + self.trend * dt
+        level = alpha * value + (1 - alpha) * projected
+        self.trend = beta * (level - self.level) / dt + (1 - beta) * self.trend
+        self.level = level
+        self.ts = ts
+        self.n += 1
+
+    def forecast(self, seconds):
+        return self.level + self.trend * seconds
+
+    def time_to(self, limit):
+        # Seconds until the trend line reaches `limit` (None if it never does)
+        if self.level >= limit: return 0.0
+        if self.trend <= 0: return None
+        return (limit - self.level) / self.trend
+
+class Oracle:
+    def __init__(self, horizon=HORIZON, approach_band=APPROACH_BAND, min_slope=MIN_SLOPE, max_apps=MAX_TRACKED_APPS):
+        self.horizon = horizon
+        self.approach_band = approach_band
+        self.min_slope = min_slope
+        self.max_apps = max_apps
+        self.system = {"cpu": HoltSeries(), "ram": HoltSeries()}
+        self.apps = {} # app -> {"cpu": HoltSeries, "ram": HoltSeries}
+        self.lock = threading.Lock()
+        self.stats = {"updates": 0, "predictions": 0, "cost_us_avg": 0.0, "cost_us_max": 0.0}
+
+    def observe_snapshot(self, snap):
+        # Sampler subscriber
+        t0 = time.perf_counter()
+        with self.lock:
+            self.system["cpu"].update(snap.ts, snap.cpu)
+            self.system["ram"].update(snap.ts, snap.ram)
+        self.account(t0)
+
+    def observe_app(self, app, ts, cpu, ram):
+        t0 = time.perf_counter()
+        with self.lock:
+            series = self.apps.get(app)
+            if series is None:
+                if len(self.apps) >= self.max_apps:
+                    stale = min(self.apps, key=lambda name: self.apps[name]["cpu"].ts or 0)
+                    del self.apps[stale]
+                series = self.apps[app] = {"cpu": HoltSeries(), "ram": HoltSeries()}
+            series["cpu"].update(ts, cpu)
+            series["ram"].update(ts, ram)
+        self.account(t0)
+
+    def account(self, t0):
+        cost = (time.perf_counter() - t0) * 1e6
+        s = self.stats
+        s["updates"] += 1
+        s["cost_us_avg"] = cost if s["updates"] == 1 else s["cost_us_avg"] * 0.95 + cost * 0.05
+        if cost > s["cost_us_max"]: s["cost_us_max"] = cost
+
+    def predict(self, metric, limit, app=None):
+        # Returns (seconds_to_cross, forecast_at_horizon) or None
+        with self.lock:
+            if app is None: series = self.system[metric]
+            else:
+                entry = self.apps.get(app)
+                if entry is None: return None
+                series = entry[metric]
+            if series.n < 3 or series.level >= limit: return None # already crossed: Sentinel's job
+            if series.level < limit - self.approach_band or series.trend < self.min_slope: return None
+            eta = series.time_to(limit)
+            if eta is None or eta > self.horizon: return None
+            self.stats["predictions"] += 1
+            return eta, series.forecast(self.horizon)
+
+# --- ACCURACY AGAINST RECORDED TRACES ---
+def evaluate(trace, limit, horizon=HORIZON, **oracle_args):
+    # trace: iterable of (ts, value). A prediction is a hit if the series crosses
+    # `limit` within horizon seconds (+ one sample of slack) after it was made.
+    oracle = Oracle(horizon=horizon, **oracle_args)
+    series = oracle.system["cpu"]
+    open_predictions = [] # ts of predictions still waiting for a crossing
+    leads, false_pos, crossings, missed = [], 0, 0, 0
+    below = True
+    last_ts = None
+    cost, steps = 0.0, 0
+    for ts, value in trace:
+        slack = (ts - last_ts) if last_ts is not None else 0.0
+        last_ts = ts
+        # Expire predictions whose window passed without a crossing
+        keep = []
+        for p in open_predictions:
+            if ts - p > horizon + slack: false_pos += 1
+            else: keep.append(p)
+        open_predictions = keep
+
+        t0 = time.perf_counter()
+        series.update(ts, value)
+        prediction = oracle.predict("cpu", limit) if value <= limit else None
+        cost += time.perf_counter() - t0
+        steps += 1
+        if value > limit and below:
+            crossings += 1
+            if open_predictions: leads.append(ts - open_predictions[0])
+            else: missed += 1
+            open_predictions = []
+        below = value <= limit
+        if prediction is not None: open_predictions.append(ts)
+    false_pos += len(open_predictions)
+    leads.sort()
+    return {"crossings": crossings, "predicted": len(leads), "missed": missed, "false_positives": false_pos,
+            "lead_s_median": leads[len(leads) // 2] if leads else None, "lead_s_min": leads[0] if leads else None,
+            "cost_us_per_tick": round(cost / steps * 1e6, 2) if steps else None}
+
+if __name__ == "__main__":
+    # python oracle.py [history.bin] [cpu|ram] [limit]  - replay recorded samples through the Oracle
+    from binlog import HistoryLog, KIND_SAMPLE, HISTORY_FILE
+    path = sys.argv[1] if len(sys.argv) > 1 else HISTORY_FILE
+    metric = sys.argv[2] if len(sys.argv) > 2 else "ram"
+    limit = float(sys.argv[3]) if len(sys.argv) > 3 else 85.0
+    log = HistoryLog(path)
+    rows = log.query(0, float("inf"), kinds={KIND_SAMPLE})
+    trace = [(ts, cpu if metric == "cpu" else ram) for ts, _, _, cpu, ram, _ in rows]
+    print(f"{len(trace)} samples, {metric} limit {limit}: {evaluate(trace, limit)}")
+    log.close()
@@ -0,0 +1,366 @@
+import json
+import operator
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+# Declarative policy: thresholds, skip-list and "conditions -> actions" rules in one JSON file.
+#   {"limits": {"cpu_limit_soft": 85, ...}, "skip": ["explorer.exe", ...],
+#    "rules": [{"name": "...", "when": [[field, op, value], ...], "then": "action" | [...]}]}
+# `when` is a list (all of) or {"all": [...]} / {"any": [...]} / {"not": cond}. Fields are sampler
+# metrics and stall signals (cpu, ram, psi_io_full, ...), foreground app stats (app.heavy,
+# app.episodes, app.cpu_p90, ...), host state (boost.trinity, ...) and process attributes
+# (proc.name, proc.cpu, proc.rss, proc.age, proc.pid, proc.foreground). A value of "$name" is
+# read at evaluation time (limits, the skip set, live calibrated limits the host passes in).
+# Each rule is compiled once into closures: the conjuncts that only read the context become a
+# per-tick gate; of the proc.* conjuncts one is turned into an index - proc.name ==/in/startswith
+# into hash tables, proc.<number> </> constant into a sorted threshold list (bisect) - and the rest
+# into a residual closure. A tick then costs one gate call per rule plus, per process, a name lookup
+# (memoised per distinct name) and a bisect per threshold group; only the candidates run a closure.
+# The file is re-read when its mtime/size changes (a scheduler job); a broken edit keeps the
+# previous rules and is reported, never half-applied.
+POLICY_FILE = "nexus_policy.json"
+RELOAD_INTERVAL = 2.0
+PROC_COOLDOWN = 30.0 # s before the same rule acts on the same process again ("cooldown" per rule)
+
+DEFAULT_LIMITS = {"cpu_limit_soft": 85, "ram_limit_soft": 85, "cpu_critical": 90}
+DEFAULT_SKIP = ["explorer.exe", "searchui.exe", "lockapp.exe", "python.exe"]
+DEFAULT_RULES = [
+    {"name": "ram-critical", "when": [["ram", ">", "$ram_limit_soft"]], "then": "flux_capacitor"},
+    {"name": "cpu-critical", "when": [["cpu", ">", "$cpu_critical"], ["boost.trinity", "!=", True]], "then": "temp_clean"},
+]
+
+# Process views are tuples (built once per tick): field -> index
+PROC_FIELDS = {"pid": 0, "name": 1, "cpu": 2, "rss": 3, "age": 4, "foreground": 5}
+NUMERIC_FIELDS = ("cpu", "rss", "age", "pid")
+NAME_FIELDS = ("proc.name", "app.name")
+
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne,
+       "in": lambda a, b: a in b, "not_in": lambda a, b: a not in b,
+       "matches": lambda a, b: isinstance(a, str) and b.search(a) is not None,
+       "startswith": lambda a, b: isinstance(a, str) and a.startswith(b)}
+ORDERED = (">", ">=", "<", "<=")
+SCALARS = (str, int, float, bool, type(None))
+
+class PolicyError(ValueError):
+    pass
+
+def proc_view(entry, now, foreground_pid=None):
+    return (entry.pid, entry.name.lower(), entry.cpu, entry.rss, now - entry.create_time, entry.pid == foreground_pid)
+
+# --- COMPILER ---
+def compile_value(field, op, value):
+    # -> (constant, None) or (None, ref name) for "$ref" values; names compare case-insensitively
+    if isinstance(value, str) and value.startswith("$"): return None, value[1:]
+    fold = field in NAME_FIELDS
+    if op in ("in", "not_in"):
+        if not isinstance(value, (list, tuple)) or not all(isinstance(v, SCALARS) for v in value): raise PolicyError(f"{field} {op}: expects a list of names/numbers")
+        return frozenset(v.lower() if fold and isinstance(v, str) else v for v in value), None
+    if op == "matches":
+        try: return re.compile(value, re.IGNORECASE), None
+        except (re.error, TypeError) as e: raise PolicyError(f"{field} matches: {e}")
+    if not isinstance(value, SCALARS): raise PolicyError(f"{field} {op}: expects a name, number, true/false or null")
+    if op in ORDERED and not isinstance(value, (int, float)): raise PolicyError(f"{field} {op}: expects a number")
+    if op == "startswith" and not isinstance(value, str): raise PolicyError(f"{field} startswith: expects a string")
+    if fold and isinstance(value, str): return value.lower(), None
+    return value, None
+
+def compile_leaf(leaf):
+    # [field, op, value] -> (fn, uses proc) where fn(ctx, proc)
+    if not isinstance(leaf, (list, tuple)) or len(leaf) != 3: raise PolicyError(f"bad condition: {leaf!r}")
+    field, op, value = leaf
+    if not isinstance(field, str): raise PolicyError(f"field must be a name in {leaf!r}")
+    if not isinstance(op, str) or op not in OPS: raise PolicyError(f"unknown operator {op!r} in {leaf!r}")
+    test = OPS[op]
+    const, ref = compile_value(field, op, value)
+    if field.startswith("proc."):
+        if field[5:] not in PROC_FIELDS: raise PolicyError(f"unknown process field {field!r}")
+        i = PROC_FIELDS[field[5:]]
+        if ref is None: return (lambda ctx, p: test(p[i], const)), True
+        return (lambda ctx, p: ctx.get(ref) is not None and test(p[i], ctx[ref])), True
+    if ref is None:
+        def fn(ctx, p=None):
+            v = ctx.get(field)
+            return v is not None and test(v, const)
+    else:
+        def fn(ctx, p=None):
+            v, bound = ctx.get(field), ctx.get(ref)
+            return v is not None and bound is not None and test(v, bound)
+    return fn, False
+
+def compile_node(node):
+    if isinstance(node, dict):
+        if len(node) != 1: raise PolicyError(f"bad condition: {node!r}")
+        (kind, body), = node.items()
+        if kind == "not":
+            fn, uses = compile_node(body)
+            return (lambda ctx, p=None: not fn(ctx, p)), uses
+        if kind not in ("all", "any"): raise PolicyError(f"unknown combinator {kind!r}")
+        if not isinstance(body, list): raise PolicyError(f"{kind}: expects a list of conditions")
+        parts = [compile_node(child) for child in body]
+        fns = [fn for fn, _ in parts]
+        uses = any(u for _, u in parts)
+        if kind == "all": return conjunction(fns), uses
+        return (lambda ctx, p=None: any(f(ctx, p) for f in fns)), uses
+    if isinstance(node, (list, tuple)) and node and isinstance(node[0], (list, tuple, dict)):
+        return compile_node({"all": list(node)})
+    return compile_leaf(node)
+
+def conjunction(fns):
+    if not fns: return lambda ctx, p=None: True
+    if len(fns) == 1: return fns[0]
+    if len(fns) == 2:
+        a, b = fns
+        return lambda ctx, p=None: a(ctx, p) and b(ctx, p)
+    return lambda ctx, p=None: all(f(ctx, p) for f in fns)
+
+def conjuncts(when):
+    if isinstance(when, dict) and set(when) == {"all"} and isinstance(when["all"], list): return list(when["all"])
+    if isinstance(when, (list, tuple)) and when and isinstance(when[0], (list, tuple, dict)): return list(when)
+    return [when] if when else []
+
+def index_key(leaf):
+    # A proc.* leaf an index can answer: ("name", set), ("prefix", str) or ("range", field, op, threshold)
+    if not isinstance(leaf, (list, tuple)) or len(leaf) != 3: return None
+    field, op, value = leaf
+    if not isinstance(field, str) or not field.startswith("proc.") or (isinstance(value, str) and value.startswith("$")): return None
+    name = field[5:]
+    if name == "name" and op == "==" and isinstance(value, str): return ("name", frozenset([value.lower()]))
+    if name == "name" and op == "in" and isinstance(value, (list, tuple)): return ("name", frozenset(str(v).lower() for v in value))
+    if name == "name" and op == "startswith" and isinstance(value, str) and value: return ("prefix", value.lower())
+    if name in NUMERIC_FIELDS and op in (">", ">=", "<", "<=") and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return ("range", PROC_FIELDS[name], op, float(value))
+    return None
+
+class Rule:
+    __slots__ = ("index", "name", "then", "cooldown", "gate", "match", "key", "scope", "fields")
+
+    def __init__(self, index, spec):
+        if not isinstance(spec, dict) or "then" not in spec: raise PolicyError(f"rule {index}: needs 'then'")
+        self.index = index
+        self.name = spec.get("name") or f"rule{index}"
+        if not isinstance(self.name, str): raise PolicyError(f"rule {index}: 'name' must be a string")
+        then = spec["then"]
+        self.then = tuple(then) if isinstance(then, (list, tuple)) else (then,)
+        if not self.then or not all(isinstance(action, str) for action in self.then): raise PolicyError(f"{self.name}: 'then' must name actions")
+        cooldown = spec.get("cooldown", PROC_COOLDOWN)
+        if not isinstance(cooldown, (int, float)): raise PolicyError(f"{self.name}: 'cooldown' must be seconds")
+        self.cooldown = float(cooldown)
+        gate, proc, key = [], [], None
+        for node in conjuncts(spec.get("when")):
+            try: fn, uses_proc = compile_node(node)
+            except PolicyError as e: raise PolicyError(f"{self.name}: {e}")
+            if not uses_proc:
+                gate.append(fn)
+                continue
+            if key is None:
+                key = index_key(node)
+                if key is not None: continue # answered by the index, no closure needed
+            proc.append(fn)
+        self.gate = conjunction(gate) if gate else None
+        self.match = conjunction(proc) if proc else None
+        self.key = key
+        self.scope = "process" if (proc or key) else "system"
+        self.fields = sorted(set(collect_fields(spec.get("when"))))
+
+def collect_fields(node):
+    if isinstance(node, dict):
+        for body in node.values(): yield from collect_fields(body)
+    elif isinstance(node, (list, tuple)) and node:
+        if isinstance(node[0], (list, tuple, dict)):
+            for child in node: yield from collect_fields(child)
+        elif isinstance(node[0], str):
+            yield node[0]
+            if isinstance(node[2], str) and node[2].startswith("$"): yield node[2]
+
+class CompiledPolicy:
+    # Immutable once built: evaluate() reads it without locks, reload swaps the whole object
+    def __init__(self, spec):
+        if not isinstance(spec, dict): raise PolicyError("policy must be a JSON object")
+        limits, skip, rules = spec.get("limits") or {}, spec.get("skip", DEFAULT_SKIP), spec.get("rules", DEFAULT_RULES)
+        if not isinstance(limits, dict) or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in limits.values()):
+            raise PolicyError("'limits' must map names to numbers")
+        if not isinstance(skip, list) or not all(isinstance(name, str) for name in skip): raise PolicyError("'skip' must be a list of process names")
+        if not isinstance(rules, list): raise PolicyError("'rules' must be a list")
+        self.limits = dict(limits)
+        self.skip = frozenset(name.lower() for name in skip)
+        self.rules = [Rule(i, rule) for i, rule in enumerate(rules)]
+        self.system = [r for r in self.rules if r.scope == "system"]
+        self.by_name = {} # process name -> [rule index]
+        self.by_prefix = {} # name prefix -> [rule index]
+        ranges = {} # (field, op) -> [(threshold, rule index)]
+        self.scan = [] # process rules no index can answer
+        for r in self.rules:
+            if r.scope != "process": continue
+            if r.key is None: self.scan.append(r.index)
+            elif r.key[0] == "name":
+                for name in r.key[1]: self.by_name.setdefault(name, []).append(r.index)
+            elif r.key[0] == "prefix": self.by_prefix.setdefault(r.key[1], []).append(r.index)
+            else: ranges.setdefault(r.key[1:3], []).append((r.key[3], r.index))
+        self.ranges = []
+        for (field, op), items in ranges.items():
+            items.sort()
+            self.ranges.append((field, op, [t for t, _ in items], [i for _, i in items]))
+        self.prefix_lengths = sorted({len(prefix) for prefix in self.by_prefix})
+        self.has_process = any(r.scope == "process" for r in self.rules)
+        self.fields = {f for r in self.rules for f in r.fields}
+
+    def uses(self, prefix):
+        return any(f.startswith(prefix) or f.startswith("$" + prefix) for f in self.fields)
+
+    def evaluate(self, ctx, procs=()):
+        # -> (system rules that hold, [(rule, proc view)] for process rules)
+        rules = self.rules
+        active = [r.gate is None or r.gate(ctx) for r in rules]
+        fired = [r for r in self.system if active[r.index]]
+        matches = []
+        if not self.has_process or not procs: return fired, matches
+        scan = [i for i in self.scan if active[i]]
+        ranges = self.ranges
+        named = {} # name -> active name/prefix-indexed rules (names repeat: svchost.exe, chrome.exe, ...)
+        append = matches.append
+        for p in procs:
+            candidates = named.get(p[1])
+            if candidates is None: candidates = named[p[1]] = self.name_candidates(p[1], active)
+            for r in candidates:
+                if r.match is None or r.match(ctx, p): append((r, p))
+            for field, op, thresholds, ids in ranges:
+                v = p[field]
+                if op == ">": candidates = ids[:bisect_left(thresholds, v)]
+                elif op == ">=": candidates = ids[:bisect_right(thresholds, v)]
+                elif op == "<": candidates = ids[bisect_right(thresholds, v):]
+                else: candidates = ids[bisect_left(thresholds, v):]
+                for i in candidates:
+                    if active[i]:
+                        r = rules[i]
+                        if r.match is None or r.match(ctx, p): append((r, p))
+            for i in scan:
+                r = rules[i]
+                if r.match(ctx, p): append((r, p))
+        return fired, matches
+
+    def name_candidates(self, name, active):
+        ids = list(self.by_name.get(name, ()))
+        for length in self.prefix_lengths:
+            ids.extend(self.by_prefix.get(name[:length], ()))
+        return [self.rules[i] for i in ids if active[i]]
+
+# --- HOT RELOAD ---
+class Policy:
+    def __init__(self, path=POLICY_FILE, on_reload=None, on_error=None):
+        self.path = path
+        self.on_reload = on_reload # callback(policy) after a successful (re)load
+        self.on_error = on_error # callback(message) when an edit is rejected
+        self.signature = None
+        self.lock = threading.Lock()
+        self.error = None
+        self.compiled = CompiledPolicy({})
+        self.last_acted = {} # (rule name, pid) -> ts it last acted on that process
+        self.stats = {"loads": 0, "errors": 0, "evals": 0, "eval_ms_last": 0.0, "eval_ms_max": 0.0, "matches_last": 0}
+        self.reload(force=True)
+
+    @property
+    def limits(self):
+        # Defaults overlaid with what the file sets
+        return dict(DEFAULT_LIMITS, **self.compiled.limits)
+
+    @property
+    def skip(self):
+        return self.compiled.skip
+
+    def file_signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError: return None
+
+    def reload(self, force=False):
+        # True when new rules are in effect
+        with self.lock:
+            signature = self.file_signature()
+            if not force and signature == self.signature: return False
+            self.signature = signature
+            try:
+                spec = {}
+                if signature is not None:
+                    with open(self.path) as f: spec = json.load(f)
+                compiled = CompiledPolicy(spec)
+            except (OSError, ValueError, TypeError, AttributeError, KeyError) as e: # PolicyError / JSON syntax are ValueErrors; the rest: shapes we did not foresee
+                self.error = f"{self.path}: {e}"
+                self.stats["errors"] += 1
+                if self.on_error:
+                    try: self.on_error(self.error)
+                    except Exception: pass
+                return False
+            self.compiled = compiled
+            self.error = None
+            self.stats["loads"] += 1
+        if self.on_reload:
+            try: self.on_reload(self)
+            except Exception: pass
+        return True
+
+    def watch(self, scheduler, interval=RELOAD_INTERVAL):
+        scheduler.every("policy.reload", interval, self.reload, replace=True)
+        return self
+
+    def evaluate(self, ctx, procs=()):
+        t0 = time.perf_counter()
+        fired, matches = self.compiled.evaluate(ctx, procs)
+        ms = (time.perf_counter() - t0) * 1000
+        self.stats["evals"] += 1
+        self.stats["eval_ms_last"] = ms
+        self.stats["eval_ms_max"] = max(self.stats["eval_ms_max"], ms)
+        self.stats["matches_last"] = len(fired) + len(matches)
+        return fired, matches
+
+    def fresh(self, matches, now):
+        # Process matches whose rule has not acted on that pid within its cooldown
+        last = self.last_acted
+        out = []
+        for rule, p in matches:
+            key = (rule.name, p[0])
+            ts = last.get(key)
+            if ts is not None and now - ts < rule.cooldown: continue
+            last[key] = now
+            out.append((rule, p))
+        if len(last) > 4096: # drop expired entries (exited pids)
+            for key in [k for k, ts in last.items() if now - ts >= PROC_COOLDOWN * 4]: del last[key]
+        return out
+
+    def due_actions(self, fired, executor):
+        # Executor-backed actions to offer this tick: those a rule asked for, plus any still
+        # engaged (its exit band has to keep seeing the metric until it drops back out)
+        wanted = {name for rule in fired for name in rule.then}
+        referenced = {name for rule in self.compiled.system for name in rule.then}
+        return [name for name, action in executor.actions.items()
+                if name in wanted or (name in referenced and action.engaged)]
+
+    def has_process_rules(self):
+        return self.compiled.has_process
+
+    def uses(self, prefix):
+        return self.compiled.uses(prefix)
+
+    def process_views(self, proctable, now, foreground_pid=None):
+        # The table collects RSS lazily (RAM rankings only): fetch it when a rule reads proc.rss
+        if self.uses("proc.rss"): proctable.refresh_rss()
+        return [proc_view(entry, now, foreground_pid) for entry in proctable.values()]
+
+    def context(self, snap, **extra):
+        # Sampler metrics + limits (+ whatever the host adds: signals, app.*, boost.*)
+        ctx = self.limits
+        ctx["skip"] = self.compiled.skip
+        ctx.update(cpu=snap.cpu, ram=snap.ram, ram_used=snap.ram_used, ram_total=snap.ram_total)
+        ctx.update(extra)
+        return ctx
+
+def app_fields(app, profile, cpu_limit=85, ram_limit=85):
+    # Foreground app stats for rules (sketches.AppProfile summary); app.heavy uses the live limits
+    fields = {"app.name": app.lower() if app else None}
+    if profile is None: return fields
+    fields.update((f"app.{k}", v) for k, v in profile.summary().items() if not isinstance(v, dict))
+    fields["app.heavy"] = profile.is_heavy(cpu_limit, ram_limit)
+    return fields
@@ -0,0 +1,226 @@
+import atexit
+import os
+import psutil # type: ignore
+import threading
+from hardware import split_topology
+from diagnostics import count_psutil
+
+# Priority / affinity state manager.
+# Every process we touch is tracked by (pid, create_time) with its original and applied
+# priority + CPU affinity. apply() takes the full desired state and only issues the
+# syscalls that differ from what is already applied; anything no longer wanted (or the
+# whole set on disengage / interpreter exit) is rolled back to its original values.
+#   WindowsPriorityBackend - psutil priority classes + SetProcessAffinityMask
+#   LinuxPriorityBackend   - nice values (setpriority) + sched_setaffinity
+LEVEL_NORMAL = "normal"
+LEVEL_HIGH = "high"
+LEVEL_REALTIME = "realtime"
+LEVEL_BACKGROUND = "background"
+
+HOG_CPU = 25.0 # % of the machine before a background process counts as a hog
+MAX_HOGS = 3
+SKIP_NAMES = {"explorer.exe", "searchui.exe", "lockapp.exe", "python.exe"}
+
+class PriorityBackend:
+    name = "base"
+    levels = {}
+
+    def get_priority(self, pid):
+        return psutil.Process(pid).nice()
+
+    def set_priority(self, pid, value):
+        psutil.Process(pid).nice(value)
+
+    def get_affinity(self, pid):
+        return frozenset(psutil.Process(pid).cpu_affinity())
+
+    def set_affinity(self, pid, cpus):
+        psutil.Process(pid).cpu_affinity(sorted(cpus))
+
+    def can_restore(self, original, target):
+        # Whether a change to `target` could later be undone with our privileges
+        return True
+
+class WindowsPriorityBackend(PriorityBackend):
+    name = "windows"
+    levels = {LEVEL_NORMAL: 0x00000020, LEVEL_HIGH: 0x00000080, LEVEL_REALTIME: 0x00000100, LEVEL_BACKGROUND: 0x00004000}
+
+class LinuxPriorityBackend(PriorityBackend):
+    name = "linux"
+    levels = {LEVEL_NORMAL: 0, LEVEL_HIGH: -5, LEVEL_REALTIME: -10, LEVEL_BACKGROUND: 10}
+
+    def get_priority(self, pid):
+        return os.getpriority(os.PRIO_PROCESS, pid)
+
+    def set_priority(self, pid, value):
+        os.setpriority(os.PRIO_PROCESS, pid, value)
+
+    def get_affinity(self, pid):
+        return frozenset(os.sched_getaffinity(pid))
+
+    def set_affinity(self, pid, cpus):
+        os.sched_setaffinity(pid, cpus)
+
+    def can_restore(self, original, target):
+        # Raising nice is always allowed; lowering it back needs CAP_SYS_NICE or RLIMIT_NICE
+        if target <= original or os.geteuid() == 0: return True
+        try:
+            import resource
+            soft = resource.getrlimit(resource.RLIMIT_NICE)[0]
+        except (ImportError, AttributeError, OSError): return False
+        return soft == resource.RLIM_INFINITY or original >= 20 - soft
+
+def default_backend():
+    return WindowsPriorityBackend() if os.name == 'nt' else LinuxPriorityBackend()
+
+class Managed:
+    __slots__ = ("key", "role", "orig_priority", "orig_affinity", "priority", "affinity", "failed")
+
+    def __init__(self, key, role, priority, affinity):
+        self.key = key
+        self.role = role # "target" | "child" | "hog"
+        self.orig_priority = self.priority = priority
+        self.orig_affinity = self.affinity = affinity
+        self.failed = set() # (field, value) attempts that were refused; not retried every tick
+
+class PriorityManager:
+    def __init__(self, proctable=None, backend=None, cpus=None, topology=None):
+        self.proctable = proctable # optional ProcessTable for hog detection
+        self.topology = topology # optional Titan manifest topology: split along physical cores / P-E / LLC
+        self.skip_names = SKIP_NAMES # never parked as hogs (the policy file's "skip" list replaces it)
+        self.backend = backend or default_backend()
+        self.cpus = sorted(cpus) if cpus is not None else sorted(self.available_cpus())
+        self.managed = {} # (pid, create_time) -> Managed
+        self.desired = {} # targets of the last apply()
+        self.pinned = {} # launch profiles: kept under every apply() until unpinned
+        self.lock = threading.Lock()
+        self.exit_hook = False
+        self.stats = {"applied": 0, "noop": 0, "restored": 0, "gone": 0, "denied": 0, "unrestorable": 0}
+
+    def available_cpus(self):
+        try: return os.sched_getaffinity(0)
+        except AttributeError: return range(psutil.cpu_count(logical=True) or 1)
+
+    # --- PLANNING ---
+    def split_cores(self):
+        # (foreground cores, spare cores for hogs); no split on tiny machines
+        if len(self.cpus) < 2: return None, None
+        split = split_topology(self.topology, self.cpus) if self.topology else None
+        if split: return split
+        spare = max(1, len(self.cpus) // 4)
+        return frozenset(self.cpus[:-spare]), frozenset(self.cpus[-spare:])
+
+    def plan(self, pid, level, isolate=False):
+        # Desired state: the foreground tree at `level`; with isolate, the tree is pinned to
+        # the main cores and the top background hogs are niced onto the spare ones
+        levels = self.backend.levels
+        try:
+            root = psutil.Process(pid)
+            tree = [root] + root.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied): return {}
+        finally: count_psutil("priority.plan")
+        main, spare = self.split_cores() if isolate else (None, None)
+
+        targets = {}
+        for i, p in enumerate(tree):
+            try: targets[(p.pid, p.create_time())] = ("target" if i == 0 else "child", levels[level], main)
+            except (psutil.NoSuchProcess, psutil.AccessDenied): continue
+        count_psutil("priority.plan", len(tree))
+        if isolate and self.proctable is not None:
+            tree_pids = {key[0] for key in targets}
+            hogs = 0
+            for name, hog_pid, cpu, _ in self.proctable.top(MAX_HOGS + len(tree_pids)):
+                if hogs >= MAX_HOGS or cpu < HOG_CPU: break
+                if hog_pid in tree_pids or hog_pid <= 1 or name.lower() in self.skip_names: continue
+                entry = self.proctable.lookup(hog_pid)
+                if entry is None: continue
+                targets[(hog_pid, entry.create_time)] = ("hog", levels[LEVEL_BACKGROUND], spare)
+                hogs += 1
+        return targets
+
+    # --- APPLY (diff only) ---
+    def alive(self, key):
+        count_psutil("priority.alive")
+        try: return psutil.Process(key[0]).create_time() == key[1]
+        except (psutil.NoSuchProcess, psutil.AccessDenied): return False
+
+    def apply(self, targets):
+        # targets: {(pid, create_time): (role, priority or None, cpus or None)}; None = original
+        with self.lock:
+            self.desired = targets
+            targets = dict(self.pinned, **targets) # the foreground boost wins over a pin on the same process
+            if not self.exit_hook:
+                atexit.register(self.restore_all)
+                self.exit_hook = True
+            for key, (role, priority, cpus) in targets.items():
+                m = self.managed.get(key)
+                if m is None:
+                    if not self.alive(key): continue
+                    try: m = Managed(key, role, self.backend.get_priority(key[0]), self.backend.get_affinity(key[0]))
+                    except (psutil.Error, OSError):
+                        self.stats["denied"] += 1
+                        continue
+                    self.managed[key] = m
+                m.role = role
+                self.change(m, "priority", m.orig_priority if priority is None else priority)
+                self.change(m, "affinity", m.orig_affinity if cpus is None else frozenset(cpus))
+            for key in [k for k in self.managed if k not in targets]:
+                self.restore_locked(key)
+
+    def change(self, m, field, value):
+        if getattr(m, field) == value or (field, value) in m.failed:
+            self.stats["noop"] += 1
+            return
+        if field == "priority" and not self.backend.can_restore(m.orig_priority, value):
+            # Never make a change we could not roll back
+            self.stats["unrestorable"] += 1
+            m.failed.add((field, value))
+            return
+        try:
+            if field == "priority": self.backend.set_priority(m.key[0], value)
+            else: self.backend.set_affinity(m.key[0], value)
+            setattr(m, field, value)
+            self.stats["applied"] += 1
+        except (psutil.Error, OSError):
+            self.stats["denied"] += 1
+            m.failed.add((field, value))
+
+    # --- ROLLBACK ---
+    def restore_locked(self, key):
+        m = self.managed.pop(key)
+        if not self.alive(key):
+            # Exited (or pid reused): nothing of ours left to undo
+            self.stats["gone"] += 1
+            return
+        try:
+            if m.priority != m.orig_priority: self.backend.set_priority(key[0], m.orig_priority)
+            if m.affinity != m.orig_affinity: self.backend.set_affinity(key[0], m.orig_affinity)
+            self.stats["restored"] += 1
+        except (psutil.Error, OSError):
+            self.stats["denied"] += 1
+
+    def restore_all(self):
+        with self.lock:
+            self.desired = {}
+            self.pinned.clear()
+            for key in list(self.managed): self.restore_locked(key)
+
+    def pin(self, key, level, isolate=False):
+        main = self.split_cores()[0] if isolate else None
+        with self.lock: self.pinned[key] = ("pinned", self.backend.levels[level], main)
+        self.apply(self.desired)
+
+    def unpin(self, key):
+        with self.lock: found = self.pinned.pop(key, None) is not None
+        if found: self.apply(self.desired)
+
+    def boost(self, pid, level, isolate=False):
+        self.apply(self.plan(pid, level, isolate))
+
+    def snapshot(self):
+        with self.lock:
+            return [{"pid": m.key[0], "role": m.role, "priority": [m.orig_priority, m.priority],
+                     "affinity": [sorted(m.orig_affinity), sorted(m.affinity)]} for m in self.managed.values()]
+
+    def __len__(self):
+        return len(self.managed)
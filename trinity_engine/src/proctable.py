@@ -0,0 +1,219 @@
+import psutil # type: ignore
+import heapq
+import os
+import threading
+import time
+from diagnostics import count_psutil
+
+# Incremental process table.
+# Process objects are cached by (pid, create_time); each refresh only pulls cpu_times
+# for known processes. Name and create time are fetched once (inside oneshot()) when a
+# process first shows up, and RSS is only collected when someone asks for a RAM ranking.
+# CPU% is computed from our own deltas between refreshes.
+SCAN_BUDGET_MS = 40.0 # CPU time a single refresh may cost before the table backs off
+MAX_BACKOFF = 8
+
+class ProcEntry:
+    __slots__ = ("pid", "create_time", "name", "proc", "cpu_time", "cpu", "rss", "rss_gen", "seen")
+
+    def __init__(self, pid, create_time, name, proc):
+        self.pid = pid
+        self.create_time = create_time
+        self.name = name
+        self.proc = proc
+        self.cpu_time = None # user+system seconds at the last refresh
+        self.cpu = 0.0 # % of the whole machine since the last refresh
+        self.rss = 0
+        self.rss_gen = 0
+        self.seen = 0
+
+    def as_tuple(self):
+        return (self.name, self.pid, round(self.cpu, 1), self.rss)
+
+class ProcessTable:
+    def __init__(self, budget_ms=SCAN_BUDGET_MS, exclude_self=True):
+        self.entries = {} # (pid, create_time) -> ProcEntry
+        self.by_pid = {}
+        self.lock = threading.Lock()
+        self.cpu_count = psutil.cpu_count(logical=True) or 1
+        self.exclude_pid = os.getpid() if exclude_self else None
+        self.last_refresh = None
+        self.generation = 0
+        self.budget_ms = budget_ms
+        self.backoff = 1 # refresh every Nth call while over budget
+        self.calls = 0
+        self.stats = {"scans": 0, "skipped": 0, "new": 0, "exited": 0, "last_cpu_ms": 0.0, "last_wall_ms": 0.0, "max_cpu_ms": 0.0}
+        self.new_keys = []
+        self.exited = []
+        self.unreadable = set() # pids poll() could not open (not retried while they live)
+        self.fresh = [] # keys the last poll() added: re-named once (caught between fork and exec)
+
+    def refresh(self, force=False):
+        self.calls += 1
+        if not force and self.calls % self.backoff:
+            self.stats["skipped"] += 1
+            return False
+
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        now = time.monotonic()
+        elapsed = (now - self.last_refresh) if self.last_refresh else None
+        self.generation += 1
+        gen = self.generation
+        new_keys = []
+        calls = 1 # psutil calls, reported to the diagnostics once per refresh
+
+        with self.lock:
+            for p in psutil.process_iter():
+                pid = p.pid
+                if pid == self.exclude_pid: continue
+                entry = self.by_pid.get(pid)
+                try:
+                    if entry is None or entry.proc is not p:
+                        # New (or pid-reused) process: the only full attribute fetch
+                        calls += 2
+                        with p.oneshot():
+                            key = (pid, p.create_time())
+                            entry = self.entries.get(key)
+                            if entry is None:
+                                calls += 1
+                                entry = ProcEntry(pid, key[1], p.name(), p)
+                                self.entries[key] = entry
+                                new_keys.append(key)
+                            else: entry.proc = p # found by poll(): adopt the iterator's cached object
+                            self.by_pid[pid] = entry
+                            t = p.cpu_times()
+                    else:
+                        calls += 1
+                        t = p.cpu_times()
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+                total = t.user + t.system
+                if entry.cpu_time is not None and elapsed:
+                    entry.cpu = max(0.0, (total - entry.cpu_time) / elapsed * 100 / self.cpu_count)
+                entry.cpu_time = total
+                entry.seen = gen
+
+            # Diff: anything not seen this generation has exited
+            exited = [key for key, e in self.entries.items() if e.seen != gen]
+            for key in exited:
+                e = self.entries.pop(key)
+                if self.by_pid.get(e.pid) is e: del self.by_pid[e.pid]
+            self.new_keys = new_keys
+            self.exited = exited
+        count_psutil("proctable.refresh", calls)
+
+        self.last_refresh = now
+        cpu_ms = (time.process_time() - cpu0) * 1000
+        self.stats["scans"] += 1
+        self.stats["new"] += len(new_keys)
+        self.stats["exited"] += len(exited)
+        self.stats["last_cpu_ms"] = cpu_ms
+        self.stats["last_wall_ms"] = (time.perf_counter() - wall0) * 1000
+        self.stats["max_cpu_ms"] = max(self.stats["max_cpu_ms"], cpu_ms)
+        # Stay inside the CPU budget: refresh less often while scans are expensive
+        if cpu_ms > self.budget_ms: self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+        elif cpu_ms < self.budget_ms / 2 and self.backoff > 1: self.backoff //= 2
+        return True
+
+    def poll(self):
+        # Cheap launch/exit check between full refreshes: a pid-list diff, name + create time
+        # for new pids only. Returns (new keys, gone keys); pid reuse is left to refresh().
+        pids = set(psutil.pids())
+        new_keys, renamed = [], []
+        calls = 1
+        with self.lock:
+            for key in self.fresh:
+                e = self.entries.get(key)
+                if e is None: continue
+                calls += 1
+                try: name = psutil.Process(key[0]).name()
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess): continue
+                if name != e.name:
+                    e.name = name
+                    renamed.append(key)
+            for pid in pids:
+                if pid in self.by_pid or pid in self.unreadable or pid == self.exclude_pid: continue
+                calls += 2
+                try:
+                    p = psutil.Process(pid)
+                    with p.oneshot(): key, name = (pid, p.create_time()), p.name()
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    self.unreadable.add(pid)
+                    continue
+                entry = self.entries.get(key)
+                if entry is None:
+                    entry = self.entries[key] = ProcEntry(pid, key[1], name, p)
+                    new_keys.append(key)
+                entry.seen = self.generation
+                self.by_pid[pid] = entry
+            self.fresh = new_keys
+            self.unreadable &= pids
+            gone = [(pid, e.create_time) for pid, e in self.by_pid.items() if pid not in pids]
+            for key in gone:
+                e = self.entries.pop(key, None)
+                if e is not None and self.by_pid.get(key[0]) is e: del self.by_pid[key[0]]
+        count_psutil("proctable.poll", calls)
+        self.stats["new"] += len(new_keys)
+        self.stats["exited"] += len(gone)
+        return new_keys + renamed, gone # renamed: reported again under the name it exec'd into
+
+    def refresh_rss(self):
+        # Lazily collected: only RAM attribution needs it, once per generation
+        calls = 0
+        with self.lock:
+            for e in self.entries.values():
+                if e.rss_gen == self.generation: continue
+                calls += 1
+                try: e.rss = e.proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess): e.rss = 0
+                e.rss_gen = self.generation
+        if calls: count_psutil("proctable.rss", calls)
+
+    def top(self, n=5, key="cpu"):
+        if key == "rss": self.refresh_rss()
+        with self.lock:
+            ranked = heapq.nlargest(n, self.entries.values(), key=lambda e: e.rss if key == "rss" else e.cpu)
+            return [e.as_tuple() for e in ranked]
+
+    def top_names(self, n=5, key="cpu"):
+        # Aggregated by executable name (multi-process apps like browsers)
+        if key == "rss": self.refresh_rss()
+        totals = {}
+        with self.lock:
+            for e in self.entries.values():
+                totals[e.name] = totals.get(e.name, 0) + (e.rss if key == "rss" else e.cpu)
+        return heapq.nlargest(n, totals.items(), key=lambda item: item[1])
+
+    def usage(self, name):
+        # One app's own load: CPU% and RSS summed over its processes (RSS fetched for those only)
+        cpu, rss, found, calls = 0.0, 0, False, 0
+        with self.lock:
+            for e in self.entries.values():
+                if e.name != name: continue
+                found = True
+                cpu += e.cpu
+                if e.rss_gen != self.generation:
+                    calls += 1
+                    try: e.rss = e.proc.memory_info().rss
+                    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess): e.rss = 0
+                    e.rss_gen = self.generation
+                rss += e.rss
+        if calls: count_psutil("proctable.rss", calls)
+        return (cpu, rss) if found else None
+
+    def processes(self):
+        # [(pid, name)] for per-process sources that are read on demand (e.g. /proc/<pid>/io)
+        with self.lock:
+            return [(e.pid, e.name) for e in self.entries.values()]
+
+    def values(self):
+        # Live ProcEntry objects (policy rules read pid/name/cpu/rss/create_time off them)
+        with self.lock:
+            return list(self.entries.values())
+
+    def lookup(self, pid):
+        with self.lock:
+            return self.by_pid.get(pid)
+
+    def __len__(self):
+        return len(self.entries)
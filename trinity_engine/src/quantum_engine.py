@@ -1,38 +1,34 @@
 
 import customtkinter as ctk # type: ignore
-import psutil # type: ignore
 import os
 import ctypes
-import subprocess
 import threading
 import time
-import humanize # type: ignore
 import sys
-import shutil
-import json
-import logging
-import platform
 import pystray # type: ignore
 from PIL import Image, ImageDraw # type: ignore
 from datetime import datetime
+from nexus_core import start_engine
+from eventbus import setup_logging
+from viewmodel import ViewModel
+from diagnostics import get_instruments, measured, format_panel
 
 # Windows API Constants
-CREATE_NO_WINDOW = 0x08000000
 HIGH_PRIORITY_CLASS = 0x00000080
 REALTIME_PRIORITY_CLASS = 0x00000100
 
 # App Config
 HOME_DIR = os.getcwd()
-LOG_FILE = "quantum_logs.txt"
-AI_MEMORY_FILE = "nexus_quantum_memory.json"
+FEED_BATCH = 50 # Nexus events rendered per refresh
+DIAG_EVERY = 5 # diagnostics panel refresh, in live-feed ticks
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("dark-blue")
 
-# Setup Logging
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format='%(asctime)s - %(message)s')
+# Setup Logging (queued, rotated JSONL)
+setup_logging()
 
 class QuantumUI(ctk.CTk):
-    def __init__(self):
+    def __init__(self, titan=None, nexus=None):
         super().__init__()
 
         self.title("QUANTUM NEXUS - HYPERVISOR")
@@ -47,9 +43,15 @@ class QuantumUI(ctk.CTk):
         self.success_color = "#00ff88" # Stable Green
         self.configure(fg_color=self.bg_color)
 
-        # Core Engines
-        self.titan = TitanHardwareCore()
-        self.nexus = NexusHiveMind(self.titan)
+        # Core Engines (attach to a running headless engine, or start one)
+        if nexus is None: titan, nexus = start_engine()
+        self.titan = titan
+        self.nexus = nexus
+        self.feed_cursor = 0 # last Nexus event shown
+        self.feed_ticks = 0
+        self.hardware_stale = False # set by the manifest thread, picked up by update_live_feed
+        self.view = ViewModel() # live values -> widgets, diffed once per frame on the Tk thread
+        self.view.start(self)
         self.is_minimized = False
         
         # GUI Structure
@@ -74,11 +76,6 @@ class QuantumUI(ctk.CTk):
         # Start Boot Animation
         self.after(500, self.run_boot_sequence)
 
-        # Core Engines (Background)
-        self.titan = TitanHardwareCore()
-        self.nexus = NexusHiveMind(self.titan)
-        self.is_minimized = False
-        
         self.tray_icon = self.setup_tray()
         self.protocol("WM_DELETE_WINDOW", self.minimize_to_tray)
 
@@ -111,7 +108,9 @@ class QuantumUI(ctk.CTk):
         self.setup_sidebar()
         self.setup_main_area()
         
-        # Auto-Scan
+        # Auto-Scan (cached manifest; a background rescan updates the page when it lands)
+        # Runs on the titan-manifest thread: only raise the flag, Tk is touched from the Tk loop alone
+        self.titan.on_update(lambda specs: setattr(self, "hardware_stale", True))
         self.titan.scan_hardware()
         self.update_hardware_info()
         self.update_live_feed()
@@ -135,6 +134,15 @@ class QuantumUI(ctk.CTk):
         self.dash_ai_state = self.create_visual_stat_card(stats_frame, "AI ACTIVITY", "IDLE", self.success_color, is_bar=False)
         self.dash_ai_state.pack(side="left", fill="x", expand=True)
 
+        # Live bindings (update_live_feed only publishes values)
+        for card, metric in [(self.dash_cpu_bar, "cpu"), (self.dash_ram_bar, "ram")]:
+            self.view.bind(f"{metric}.text", card)
+            self.view.bind(f"{metric}.color", card, "text_color")
+            self.view.bind(f"{metric}.bar", card.bar_ref, "progress")
+            self.view.bind(f"{metric}.hist", card.hist_ref)
+        self.view.bind("ai.text", self.dash_ai_state)
+        self.view.bind("ai.color", self.dash_ai_state, "text_color")
+
         # Quick Actions
         ctk.CTkLabel(self.page_dashboard, text="QUICK PROTOCOLS", font=ctk.CTkFont(size=18, weight="bold"), text_color="gray").pack(anchor="w", pady=(30, 10))
         
@@ -148,6 +156,18 @@ class QuantumUI(ctk.CTk):
         ctk.CTkButton(action_frame, text="FLUSH MEMORY", height=50, fg_color="#333333", hover_color=self.accent_color, command=lambda: self.run_action(self.nexus.force_ram_clean, "Flushing Memory...")).pack(fill="x", pady=5)
         ctk.CTkButton(action_frame, text="NETWORK RESET", height=50, fg_color="#333333", hover_color=self.accent_color, command=lambda: self.run_action(self.nexus.optimize_network, "Resetting Network...")).pack(fill="x", pady=5)
 
+        # Engine Overhead (what the optimizer itself costs)
+        ctk.CTkLabel(self.page_dashboard, text="ENGINE OVERHEAD", font=ctk.CTkFont(size=18, weight="bold"), text_color="gray").pack(anchor="w", pady=(30, 10))
+        self.dash_diag = ctk.CTkLabel(self.page_dashboard, text="Collecting...", font=ctk.CTkFont("Consolas", 11), text_color="gray", justify="left", anchor="w")
+        self.dash_diag.pack(anchor="w", fill="x")
+        self.view.bind("diag.text", self.dash_diag)
+
+        # Nexus Feed (view.log lines land here, one insert per frame)
+        ctk.CTkLabel(self.page_dashboard, text="NEXUS FEED", font=ctk.CTkFont(size=18, weight="bold"), text_color="gray").pack(anchor="w", pady=(30, 10))
+        self.nexus_console = ctk.CTkTextbox(self.page_dashboard, height=160, fg_color="#000000", text_color=self.accent_color, font=ctk.CTkFont("Consolas", 12))
+        self.nexus_console.pack(fill="x")
+        self.view.bind_console(self.nexus_console)
+
     def create_visual_stat_card(self, parent, title, value, color, is_bar=True):
         frame = ctk.CTkFrame(parent, fg_color="#1a1a1a", height=120)
         ctk.CTkLabel(frame, text=title, font=ctk.CTkFont(size=12), text_color="gray").pack(pady=(15, 5))
@@ -159,199 +179,67 @@ class QuantumUI(ctk.CTk):
             bar.pack(pady=(5, 15))
             bar.set(0)
             lbl.bar_ref = bar # Attach reference
+            hist = ctk.CTkLabel(frame, text="1m avg -- | peak --", font=ctk.CTkFont(size=11), text_color="gray")
+            hist.pack(pady=(0, 10))
+            lbl.hist_ref = hist # Rolling history line
         
         return lbl 
 
     # ... (Titan/Nexus UI methods unchanged, logic below needs update for bars) ...
 
+    @measured("update_live_feed")
     def update_live_feed(self):
         # UI Updates
         try:
-             # CPU/RAM
-            cpu = psutil.cpu_percent(interval=None)
-            ram = psutil.virtual_memory()
-            
-            # Update Text
-            self.dash_cpu_bar.configure(text=f"{cpu}%")
-            self.dash_cpu_bar.configure(text_color=self.danger_color if cpu > 90 else "white")
-            if hasattr(self.dash_cpu_bar, 'bar_ref'): self.dash_cpu_bar.bar_ref.set(cpu / 100) # Update Bar
-            
-            self.dash_ram_bar.configure(text=f"{ram.percent}%")
-            self.dash_ram_bar.configure(text_color=self.danger_color if ram.percent > 90 else "white")
-            if hasattr(self.dash_ram_bar, 'bar_ref'): self.dash_ram_bar.bar_ref.set(ram.percent / 100) # Update Bar
+             # CPU/RAM (cached by the shared sampler)
+            snap = self.nexus.sampler.snapshot()
+            cpu = snap.cpu
+            ram = snap.ram
             
+            # Publish; the view model only touches widgets whose value changed
+            values = {}
+            for metric, value in (("cpu", cpu), ("ram", ram)):
+                values[f"{metric}.text"] = f"{value}%"
+                values[f"{metric}.color"] = self.danger_color if value > 90 else "white"
+                values[f"{metric}.bar"] = value / 100
+                # History (last minute from the time-series store)
+                avg = self.nexus.timeseries.mean(metric, 60)
+                peak = self.nexus.timeseries.max(metric, 60)
+                if avg is not None: values[f"{metric}.hist"] = f"1m avg {avg:.0f}% | peak {peak:.0f}%"
+
             # AI State
-            state = "ACTIVE" if self.nexus.is_active else "IDLE"
-            self.dash_ai_state.configure(text=state)
-            self.dash_ai_state.configure(text_color=self.success_color if self.nexus.is_active else "gray")
+            values["ai.text"] = "ACTIVE" if self.nexus.is_active else "IDLE"
+            values["ai.color"] = self.success_color if self.nexus.is_active else "gray"
+            self.view.update(values)
 
-            # Check Nexus Feed
-            while not self.nexus.msg_queue.empty():
-                msg = self.nexus.msg_queue.get_nowait()
-                self.log_nexus(msg)
+            # Check Nexus Feed (bounded batch per refresh; repeats arrive as "text ×N")
+            events, self.feed_cursor, dropped = self.nexus.events.drain(self.feed_cursor, limit=FEED_BATCH)
+            if dropped: self.log_nexus(f"... {dropped} events dropped (feed overflow)")
+            for event in events: self.log_nexus(event.render())
 
-        except: pass
-        
-        self.after(1000, self.update_live_feed)
+            self.feed_ticks += 1
+            if self.feed_ticks % DIAG_EVERY == 1: self.view.set("diag.text", format_panel(self.diagnostics()))
 
-# --- ENGINE 1: TITAN HARDWARE CORE ---
-class TitanHardwareCore:
-    def __init__(self):
-        self.hardware_specs = {}
+            # Background manifest rescan landed
+            if self.hardware_stale:
+                self.hardware_stale = False
+                self.update_hardware_info()
 
-    def scan_hardware(self):
-        specs = {}
-        try:
-            specs['os'] = f"{platform.system()} {platform.release()}"
-            specs['cpu_physical'] = psutil.cpu_count(logical=False)
-            specs['cpu_logical'] = psutil.cpu_count(logical=True)
-            specs['ram_total'] = round(psutil.virtual_memory().total / (1024**3), 2)
-            
-            # GPU Scan (Windows specific)
-            gpu_info = "Unknown"
-            if os.name == 'nt':
-                try:
-                    wmic = subprocess.check_output('wmic path win32_videocontroller get name', shell=True)
-                    gpu_info = wmic.decode().split('\n')[1].strip()
-                except: pass
-            specs['gpu'] = gpu_info
-            
-            self.hardware_specs = specs
-            return True
-        except Exception as e:
-            return False
-
-    def get_report(self):
-        s = self.hardware_specs
-        return f"""
-[SYSTEM HARDWARE MANIFEST]
-==========================
-OS:       {s.get('os', 'Unknown')}
-CPU:      {s.get('cpu_physical', '?')} Cores / {s.get('cpu_logical', '?')} Threads
-RAM:      {s.get('ram_total', '?')} GB
-GPU:      {s.get('gpu', 'Unknown')}
-==========================
-TITAN ANALYSIS:
-> CPU Bottleneck Risk: {'HIGH' if s.get('cpu_physical', 4) < 4 else 'LOW'} # type: ignore
-> RAM Bottleneck Risk: {'HIGH' if s.get('ram_total', 8) < 16 else 'LOW'} # type: ignore
-        """
-
-# --- ENGINE 2: NEXUS HIVE MIND (AI CONTROLLER) ---
-class NexusHiveMind:
-    def __init__(self, titan_ref):
-        self.titan = titan_ref
-        self.msg_queue = __import__('queue').Queue() # type: ignore
-        self.is_active = True
-        
-        # Sub-Modules
-        self.module_cortex = True # Pattern Rec
-        self.module_sentinel = True # Active Defense
-        self.module_oracle = True # Prediction
-
-        self.history = self.load_memory()
-        
-        # Hardware limits (Calibrated by Titan)
-        self.cpu_limit_soft = 85
-        self.ram_limit_soft = 85
-
-        # Background Thread
-        self.thread = threading.Thread(target=self.neural_loop, daemon=True)
-        self.thread.start()
-
-    def load_memory(self):
-        if os.path.exists(AI_MEMORY_FILE):
-            try:
-                with open(AI_MEMORY_FILE, 'r') as f: return json.load(f)
-            except: return {}
-        return {}
-
-    def save_memory(self):
-        try:
-            with open(AI_MEMORY_FILE, 'w') as f: json.dump(self.history, f)
         except: pass
+        
+        self.after(1000, self.update_live_feed)
 
-    def ingest_hardware_data(self, specs):
-        ram = specs.get('ram_total', 16)
-        # Adapt thresholds based on hardware
-        if ram < 8: self.ram_limit_soft = 75 # Be more aggressive on low RAM
-        if ram > 32: self.ram_limit_soft = 92 # Relax on high RAM
-
-    def set_modules(self, cortex, sentinel, oracle):
-        self.module_cortex = cortex
-        self.module_sentinel = sentinel
-        self.module_oracle = oracle
-
-    def neural_loop(self):
-        while True:
-            if self.is_active:
-                try:
-                    # 1. CORTEX: Analyze State
-                    if self.module_cortex:
-                        self.cortex_analyze()
-                    
-                    # 2. SENTINEL: React
-                    if self.module_sentinel:
-                        self.sentinel_react()
-
-                except Exception as e:
-                    pass
-            time.sleep(2)
-
-    def cortex_analyze(self):
-        cpu = psutil.cpu_percent(interval=None)
-        ram = psutil.virtual_memory().percent
-        active_app = self.get_active_app()
-
-        if active_app and (cpu > self.cpu_limit_soft or ram > self.ram_limit_soft):
-            # Record Pattern
-            if active_app not in self.history:
-                self.history[active_app] = {"spikes": 0, "type": "unknown"} # type: ignore
-            
-            self.history[active_app]["spikes"] += 1
-            bottleneck = "CPU" if cpu > self.cpu_limit_soft else "RAM"
-            self.history[active_app]["type"] = bottleneck
-            
-            self.save_memory()
-            self.msg_queue.put(f"CORTEX: Lag pattern detected in '{active_app}' ({bottleneck} Spike).")
-
-    def sentinel_react(self):
-        # Autonomous fixes
-        ram = psutil.virtual_memory().percent
-        if ram > self.ram_limit_soft:
-             self.msg_queue.put("SENTINEL: RAM Critical. Deploying FLUX CAPACITOR...")
-             self.force_ram_clean()
-
-
-    def force_ram_clean(self):
-        try:
-            if os.name == 'nt':
-                PID = os.getpid()
-                handle = ctypes.windll.kernel32.OpenProcess(0x1F0FFF, False, PID) # type: ignore
-                success = ctypes.windll.psapi.EmptyWorkingSet(handle) # type: ignore
-                ctypes.windll.kernel32.CloseHandle(handle) # type: ignore
-                if success:
-                     self.msg_queue.put("SENTINEL: RAM Purge Successful.")
-                else:
-                     self.msg_queue.put("SENTINEL: RAM Purge Failed (Access Denied?).")
-        except Exception as e:
-            self.msg_queue.put(f"SENTINEL ERROR: {e}")
-
-    def optimize_network(self):
-         try:
-            if os.name == 'nt':
-                subprocess.run(["ipconfig", "/flushdns"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=CREATE_NO_WINDOW) # type: ignore
-                self.msg_queue.put("SENTINEL: Network Reset Complete.")
-         except Exception as e:
-            self.msg_queue.put(f"SENTINEL ERROR: {e}")
-
-    def get_active_app(self):
-        try:
-            if os.name == 'nt':
-                hwnd = ctypes.windll.user32.GetForegroundWindow() # type: ignore
-                pid = ctypes.c_ulong()
-                ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid)) # type: ignore
-                return psutil.Process(pid.value).name()
-        except: return None
+    def diagnostics(self):
+        # Engine dump plus this UI's own loops (the engine may live in a worker process)
+        local = get_instruments().dump()
+        engine = self.nexus.diagnostics()
+        if not engine or engine["pid"] == local["pid"]: return local
+        engine["loops"].update(local["loops"])
+        return engine
+
+    def log_nexus(self, message):
+        # Batched into one console insert per frame, scrollback capped
+        self.view.log(message)
 
 def is_admin():
     try:
@@ -0,0 +1,411 @@
+import gzip
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from telemetry import TelemetrySnapshot
+from proctable import ProcessTable, ProcEntry
+from foreground import ForegroundResolver, FakeForegroundBackend
+from signals import SignalSources
+from scheduler import Scheduler
+
+# Trace record + accelerated replay.
+# TraceRecorder hooks a live engine and writes one JSON line per sampler snapshot and per
+# neural tick (foreground app, stall signals, I/O ranking and a diff of the process table).
+# replay() feeds a trace through a real NexusHiveMind - cortex_analyze, oracle_predict,
+# sentinel_react, adaptive sampling - on a simulated clock: the scheduler is never started,
+# replay() jumps the clock from deadline to deadline and runs due jobs inline. Actions are
+# replaced by stubs that only record that they fired (optionally with a simulated effect on
+# the metric), memory and history go to a temp dir, so a trace can be replayed against any
+# code or policy change and the runs compared: decisions, actions fired, engine CPU per
+# simulated hour.
+#
+# Records ("t" = type):
+#   meta  {version, started, host, cpu_count, interval, adaptive, limits: [cpu, ram]}
+#   snap  {ts, seq, cpu, ram, used, total}
+#   tick  {ts, fg: [pid, name] | null, sig: {signal: value}, io: [[name, bytes]],
+#          new: [[pid, create_time, name]], gone: [[pid, create_time]],
+#          cpu: [[pid, create_time, cpu%]], rss: [[pid, create_time, bytes]]}   (changes only)
+TRACE_VERSION = 1
+TRACE_FILE = "nexus_trace.jsonl.gz"
+CPU_STEP = 0.1 # per-process CPU% changes smaller than this are not recorded
+RSS_STEP = 1 << 20
+SETTLE_S = 30.0 # simulated time run past the last record (pending measurements, coalesced events)
+SIM_HOUR = 3600.0
+
+def open_trace(path, mode="rt"):
+    return gzip.open(path, mode, encoding="utf-8") if path.endswith(".gz") else open(path, mode, encoding="utf-8")
+
+def read_trace(path):
+    with open_trace(path) as f:
+        for line in f:
+            if line.strip(): yield json.loads(line)
+
+# --- RECORD ---
+class TraceRecorder:
+    def __init__(self, nexus, path=TRACE_FILE):
+        self.nexus = nexus
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock()
+        self.procs = {} # (pid, create_time) -> [cpu, rss] as last recorded
+        self.stats = {"snaps": 0, "ticks": 0, "bytes": 0}
+
+    def start(self):
+        nexus = self.nexus
+        self.file = open_trace(self.path, "wt")
+        self.write({"t": "meta", "version": TRACE_VERSION, "started": time.time(), "host": platform.node(),
+                    "cpu_count": nexus.proctable.cpu_count, "interval": nexus.sampler.base_interval,
+                    "adaptive": nexus.adaptive is not None, "limits": [nexus.cpu_limit_soft, nexus.ram_limit_soft]})
+        nexus.sampler.subscribe(self.on_snapshot)
+        nexus.recorder = self
+        return self
+
+    def stop(self):
+        self.nexus.sampler.unsubscribe(self.on_snapshot)
+        if self.nexus.recorder is self: self.nexus.recorder = None
+        with self.lock:
+            if self.file is not None: self.file.close()
+            self.file = None
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.lock:
+            if self.file is None: return
+            self.file.write(line)
+            self.stats["bytes"] += len(line)
+
+    def on_snapshot(self, snap):
+        # Sampler subscriber
+        self.stats["snaps"] += 1
+        self.write({"t": "snap", "ts": snap.ts, "seq": snap.seq, "cpu": snap.cpu, "ram": snap.ram, "used": snap.ram_used, "total": snap.ram_total})
+
+    def record_tick(self, snap):
+        # Called by NexusHiveMind.neural_tick after cortex / oracle / sentinel ran
+        nexus = self.nexus
+        table = nexus.proctable
+        new, cpu, rss, live = [], [], [], set()
+        with table.lock:
+            for key, e in table.entries.items():
+                live.add(key)
+                last = self.procs.get(key)
+                if last is None:
+                    last = self.procs[key] = [0.0, 0]
+                    new.append([e.pid, e.create_time, e.name])
+                if abs(e.cpu - last[0]) >= CPU_STEP:
+                    last[0] = round(e.cpu, 1)
+                    cpu.append([e.pid, e.create_time, last[0]])
+                if abs(e.rss - last[1]) >= RSS_STEP:
+                    last[1] = e.rss
+                    rss.append([e.pid, e.create_time, e.rss])
+        gone = [list(key) for key in self.procs if key not in live]
+        for pid, create_time in gone: del self.procs[(pid, create_time)]
+        signals = {k: round(v, 3) for k, v in nexus.signals.latest.items() if v is not None}
+        fg = [nexus.foreground_pid, nexus.active_app] if nexus.foreground_pid else None
+        self.stats["ticks"] += 1
+        self.write({"t": "tick", "ts": snap.ts, "fg": fg, "sig": signals, "io": getattr(nexus.signals, "last_top_io", []),
+                    "new": new, "gone": gone, "cpu": cpu, "rss": rss})
+        with self.lock:
+            if self.file is not None: self.file.flush()
+
+# --- REPLAY STAND-INS ---
+class SimClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class ReplaySampler:
+    # TelemetrySampler surface, fed from the trace instead of psutil
+    def __init__(self, interval=1.0):
+        self.base_interval = interval
+        self.interval = interval
+        self.adaptive = None
+        self.subscribers = []
+        self.latest = TelemetrySnapshot(0.0, 0, 0.0, 0.0, 0, 0)
+        self.offsets = [] # [until ts, metric, delta]: simulated effect of fired actions
+
+    def set_adaptive(self, controller):
+        self.adaptive = controller
+
+    def subscribe(self, callback):
+        if callback not in self.subscribers: self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers: self.subscribers.remove(callback)
+
+    def snapshot(self):
+        return self.latest
+
+    def publish(self, snap):
+        if self.offsets:
+            self.offsets = [o for o in self.offsets if o[0] > snap.ts]
+            for _, metric, delta in self.offsets:
+                snap = snap._replace(**{metric: min(100.0, max(0.0, getattr(snap, metric) + delta))})
+        if self.adaptive is not None: self.interval = self.adaptive.update(snap)
+        self.latest = snap
+        for callback in list(self.subscribers):
+            try: callback(snap)
+            except Exception: pass
+
+class ReplayProcessTable(ProcessTable):
+    # Same queries as ProcessTable; the content comes from trace diffs, refresh() is a no-op
+    def __init__(self, cpu_count=1):
+        self.entries = {}
+        self.by_pid = {}
+        self.lock = threading.Lock()
+        self.cpu_count = cpu_count
+        self.generation = 0
+        self.new_keys = []
+        self.exited = []
+        self.stats = {"scans": 0, "skipped": 0, "new": 0, "exited": 0, "last_cpu_ms": 0.0, "last_wall_ms": 0.0, "max_cpu_ms": 0.0}
+
+    def refresh(self, force=False):
+        return True
+
+    def refresh_rss(self):
+        pass
+
+    def usage(self, name):
+        with self.lock:
+            found = [e for e in self.entries.values() if e.name == name]
+        return (sum(e.cpu for e in found), sum(e.rss for e in found)) if found else None
+
+    def poll(self):
+        return [], []
+
+    def apply(self, record):
+        with self.lock:
+            self.generation += 1
+            exited = []
+            for pid, create_time in record["gone"]:
+                e = self.entries.pop((pid, create_time), None)
+                if e is None: continue
+                exited.append((pid, create_time))
+                if self.by_pid.get(pid) is e: del self.by_pid[pid]
+            new_keys = []
+            for pid, create_time, name in record["new"]:
+                e = self.entries[(pid, create_time)] = ProcEntry(pid, create_time, name, None)
+                self.by_pid[pid] = e
+                new_keys.append((pid, create_time))
+            for pid, create_time, cpu in record["cpu"]:
+                e = self.entries.get((pid, create_time))
+                if e is not None: e.cpu = cpu
+            for pid, create_time, rss in record["rss"]:
+                e = self.entries.get((pid, create_time))
+                if e is not None: e.rss = rss
+            self.new_keys = new_keys
+            self.exited = exited
+            self.stats["scans"] += 1
+            self.stats["new"] += len(new_keys)
+            self.stats["exited"] += len(exited)
+
+class ReplaySignals:
+    # SignalSources surface: the recorded rates, and the recorded I/O ranking
+    classify = SignalSources.classify
+
+    def __init__(self):
+        self.latest = {}
+        self.last_top_io = []
+
+    def apply(self, record):
+        self.latest = record["sig"]
+        self.last_top_io = [tuple(item) for item in record["io"]]
+
+    def sample(self):
+        return self.latest
+
+    def top_io(self, processes, n=5):
+        return self.last_top_io[:n]
+
+    def available(self):
+        return {}
+
+    def close(self):
+        pass
+
+# --- REPLAY ---
+def loop_totals(instruments):
+    with instruments.lock: return {name: (s.count, s.total) for name, s in instruments.loops.items()}
+
+def replay(path, configure=None, effects=None):
+    # configure(nexus): policy/code under test (thresholds, modules, ...) applied before the first record.
+    # effects: {action: (metric, delta, seconds)} - what a fired action does to the replayed metric.
+    from nexus_core import NexusHiveMind
+    records = read_trace(path)
+    meta = next(records)
+    if meta.get("t") != "meta": raise ValueError(f"{path}: not a Nexus trace")
+    clock = SimClock(meta["started"])
+    scheduler = Scheduler(clock=clock) # never started: replay() runs due jobs itself
+    sampler = ReplaySampler(meta.get("interval", 1.0))
+    tmp = tempfile.TemporaryDirectory(prefix="nexus_replay_")
+    nexus = NexusHiveMind(None, sampler, scheduler, adaptive=meta.get("adaptive", True), clock=clock,
+                          paths={"memory": os.path.join(tmp.name, "memory.json"), "history": os.path.join(tmp.name, "history.bin"), "legacy": []})
+    nexus.proctable = ReplayProcessTable(meta.get("cpu_count", 1))
+    backend = FakeForegroundBackend()
+    nexus.foreground = ForegroundResolver(backend, proctable=nexus.proctable)
+    nexus.signals = ReplaySignals()
+
+    actions = []
+    for name, action in nexus.actions.actions.items():
+        def fired(name=name):
+            actions.append([clock.now, name])
+            effect = (effects or {}).get(name)
+            if effect: sampler.offsets.append([clock.now + effect[2], effect[0], effect[1]])
+        action.fn = fired
+    spikes = {}
+    append = nexus.journal.append
+    def journal_append(event):
+        if "type" in event: spikes[event["type"]] = spikes.get(event["type"], 0) + 1
+        append(event)
+    nexus.journal.append = journal_append
+    if configure: configure(nexus)
+
+    decisions, cursor = [], 0
+    def run_until(ts):
+        # Jump deadline to deadline; every job sees the simulated time it was due at
+        while True:
+            wait = scheduler.run_due()
+            if wait is None or clock.now + wait > ts: break
+            clock.now += wait
+        clock.now = max(clock.now, ts)
+
+    before = loop_totals(nexus.instruments)
+    wall0, cpu = time.perf_counter(), 0.0
+    first = last = None
+    snaps = ticks = 0
+    for record in records:
+        kind = record["t"]
+        t0 = time.thread_time()
+        run_until(record["ts"])
+        if kind == "snap":
+            sampler.publish(TelemetrySnapshot(record["ts"], record["seq"], record["cpu"], record["ram"], record["used"], record["total"]))
+            snaps += 1
+        elif kind == "tick":
+            nexus.proctable.apply(record)
+            nexus.signals.apply(record)
+            if record["fg"]: backend.set_foreground(record["fg"][0], record["fg"][1])
+            else: backend.pid = None
+            ticks += 1
+        cpu += time.thread_time() - t0
+        events, cursor, _ = nexus.events.drain(cursor)
+        decisions.extend([e.ts, e.source, e.render()] for e in events)
+        if first is None: first = record["ts"]
+        last = record["ts"]
+    if first is None: first = last = meta["started"]
+    t0 = time.thread_time()
+    run_until(last + SETTLE_S)
+    cpu += time.thread_time() - t0
+    events, cursor, _ = nexus.events.drain(cursor)
+    decisions.extend([e.ts, e.source, e.render()] for e in events)
+    wall = time.perf_counter() - wall0
+    after = loop_totals(nexus.instruments)
+    nexus.journal.close()
+    nexus.archive.close()
+    tmp.cleanup()
+
+    sim = max(last - first, 1e-9)
+    loops = {}
+    for name, (count, total) in after.items():
+        count0, total0 = before.get(name, (0, 0.0))
+        if count > count0: loops[name] = {"runs": count - count0, "avg_ms": round((total - total0) / (count - count0) * 1000, 3)}
+    return {"trace": path, "sim_s": round(sim, 1), "wall_s": round(wall, 3), "speedup": round(sim / wall, 1) if wall else None,
+            "snapshots": snaps, "ticks": ticks, "engine_cpu_s": round(cpu, 4), "cpu_s_per_sim_hour": round(cpu / sim * SIM_HOUR, 4),
+            "decisions": decisions, "actions": actions, "spikes": spikes, "loops": loops,
+            "sentinel": nexus.actions.stats(), "sampling": nexus.adaptive.stats() if nexus.adaptive else None}
+
+# --- COMPARE ---
+def counts(items, index):
+    out = {}
+    for item in items: out[item[index]] = out.get(item[index], 0) + 1
+    return out
+
+def compare(base, other):
+    # Where two replays of the same trace part ways
+    divergence = None
+    for i, (a, b) in enumerate(zip(base["decisions"], other["decisions"])):
+        if a[1:] != b[1:]:
+            divergence = {"index": i, "ts": a[0], "base": a[2], "other": b[2]}
+            break
+    if divergence is None and len(base["decisions"]) != len(other["decisions"]):
+        i = min(len(base["decisions"]), len(other["decisions"]))
+        longer = base if len(base["decisions"]) > i else other
+        divergence = {"index": i, "ts": longer["decisions"][i][0], "base": None, "other": None,
+                      ("base" if longer is base else "other"): longer["decisions"][i][2]}
+    spikes = {k: [base["spikes"].get(k, 0), other["spikes"].get(k, 0)] for k in sorted(set(base["spikes"]) | set(other["spikes"]))}
+    return {"decisions": [len(base["decisions"]), len(other["decisions"])],
+            "by_source": pair_counts(base["decisions"], other["decisions"], 1),
+            "actions": pair_counts(base["actions"], other["actions"], 1),
+            "spikes": spikes,
+            "cpu_s_per_sim_hour": [base["cpu_s_per_sim_hour"], other["cpu_s_per_sim_hour"]],
+            "first_divergence": divergence}
+
+def pair_counts(a, b, index):
+    a, b = counts(a, index), counts(b, index)
+    return {k: [a.get(k, 0), b.get(k, 0)] for k in sorted(set(a) | set(b))}
+
+def format_result(result):
+    lines = [f"{result['trace']}: {result['sim_s'] / 3600:.2f} simulated h in {result['wall_s']:.2f}s ({result['speedup']}x), "
+             f"{result['snapshots']} snapshots, {result['ticks']} ticks",
+             f"  engine CPU {result['cpu_s_per_sim_hour']:.3f}s per simulated hour",
+             f"  decisions {len(result['decisions'])} {counts(result['decisions'], 1)}",
+             f"  actions fired {len(result['actions'])} {counts(result['actions'], 1)}",
+             f"  spike ticks {result['spikes']}"]
+    for name, loop in sorted(result["loops"].items()):
+        lines.append(f"  {name:<16} {loop['runs']:>6} runs  avg {loop['avg_ms']:.3f} ms")
+    return "\n".join(lines)
+
+# --- CLI ---
+def parse_overrides(args):
+    # key=value -> attribute on NexusHiveMind (cpu_limit_soft=80, module_oracle=0, ...); policy=FILE swaps the rules file
+    overrides = {}
+    for arg in args:
+        key, _, value = arg.partition("=")
+        overrides[key] = value
+    def configure(nexus):
+        for key, value in overrides.items():
+            if key == "policy":
+                nexus.policy.path = value
+                nexus.policy.reload(force=True)
+                if nexus.policy.error: raise SystemExit(nexus.policy.error)
+                continue
+            if not hasattr(nexus, key): raise SystemExit(f"unknown setting: {key}")
+            setattr(nexus, key, type(getattr(nexus, key))(float(value)))
+    return configure if overrides else None
+
+def main(argv):
+    #   python replay.py record [TRACE] [SECONDS]     record the live engine (Ctrl+C stops)
+    #   python replay.py replay TRACE [key=value ...] replay; with overrides, also compare against the baseline
+    if not argv or argv[0] not in ("record", "replay"):
+        print("usage: replay.py record [TRACE] [SECONDS] | replay TRACE [key=value ...]")
+        return 2
+    if argv[0] == "record":
+        from nexus_core import start_engine
+        path = argv[1] if len(argv) > 1 else TRACE_FILE
+        seconds = float(argv[2]) if len(argv) > 2 else None
+        titan, nexus = start_engine()
+        recorder = TraceRecorder(nexus, path).start()
+        try: time.sleep(seconds) if seconds else threading.Event().wait()
+        except KeyboardInterrupt: pass
+        finally:
+            recorder.stop()
+            nexus.save_memory()
+            nexus.archive.close()
+        print(f"{path}: {recorder.stats}")
+        return 0
+    base = replay(argv[1])
+    print(format_result(base))
+    configure = parse_overrides(argv[2:])
+    if configure:
+        other = replay(argv[1], configure)
+        print(format_result(other))
+        print(json.dumps(compare(base, other), indent=1))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
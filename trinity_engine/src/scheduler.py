@@ -0,0 +1,188 @@
+import heapq
+import itertools
+import threading
+import time
+
+# Single heap-based timer that owns every periodic task in the engine.
+# Jobs are keyed by name: scheduling an existing name reuses the job instead of
+# starting a second copy, so toggling a mode on/off/on never duplicates loops.
+# Periodic jobs are drift-corrected (next = previous deadline + interval) and every
+# run records its jitter (actual start - deadline).
+
+class Job:
+    __slots__ = ("name", "fn", "interval", "deadline", "token", "cancelled", "runs", "errors",
+                 "jitter_last", "jitter_max", "jitter_avg", "duration_last", "duration_max", "skipped")
+
+    def __init__(self, name, fn, interval):
+        self.name = name
+        self.fn = fn
+        self.interval = interval # None = one-shot
+        self.deadline = 0.0
+        self.token = 0
+        self.cancelled = False
+        self.runs = 0
+        self.errors = 0
+        self.jitter_last = 0.0
+        self.jitter_max = 0.0
+        self.jitter_avg = 0.0
+        self.duration_last = 0.0
+        self.duration_max = 0.0
+        self.skipped = 0 # missed deadlines dropped instead of run back-to-back
+
+    def stats(self):
+        return {"interval": self.interval, "runs": self.runs, "errors": self.errors, "skipped": self.skipped,
+                "jitter_ms": round(self.jitter_last * 1000, 2), "jitter_max_ms": round(self.jitter_max * 1000, 2),
+                "jitter_avg_ms": round(self.jitter_avg * 1000, 2), "duration_ms": round(self.duration_last * 1000, 2),
+                "duration_max_ms": round(self.duration_max * 1000, 2)}
+
+class Scheduler:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.heap = []
+        self.jobs = {}
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.wakeups = 0
+
+    # --- JOB CONTROL ---
+    def every(self, name, interval, fn, first_delay=None, replace=False):
+        with self.cond:
+            job = self.jobs.get(name)
+            if job is not None and not replace:
+                # De-duplicate: keep the running job, just adopt the new interval
+                job.interval = interval
+                return job
+            if job is not None: job.cancelled = True
+            job = Job(name, fn, interval)
+            self.jobs[name] = job
+            self.push(job, self.clock() + (interval if first_delay is None else first_delay))
+            return job
+
+    def call_later(self, name, delay, fn):
+        # One-shot; a pending call with the same name is not scheduled twice
+        with self.cond:
+            job = self.jobs.get(name)
+            if job is not None and not job.cancelled: return job
+            job = Job(name, fn, None)
+            self.jobs[name] = job
+            self.push(job, self.clock() + delay)
+            return job
+
+    def cancel(self, name):
+        with self.cond:
+            job = self.jobs.pop(name, None)
+            if job is None: return False
+            job.cancelled = True
+            job.token += 1
+            self.cond.notify()
+            return True
+
+    def set_interval(self, name, interval, reschedule=False):
+        with self.cond:
+            job = self.jobs.get(name)
+            if job is None or job.interval == interval: return
+            job.interval = interval
+            if reschedule and self.clock() + interval < job.deadline:
+                # Tightening: pull the pending deadline in right away
+                self.push(job, self.clock() + interval)
+
+    def is_scheduled(self, name):
+        with self.cond:
+            return name in self.jobs
+
+    def push(self, job, deadline):
+        job.token += 1
+        job.deadline = deadline
+        heapq.heappush(self.heap, (deadline, next(self.seq), job, job.token))
+        self.cond.notify()
+
+    # --- EXECUTION ---
+    def run_due(self, now=None):
+        # Runs every job whose deadline has passed; returns seconds until the next one
+        while True:
+            with self.cond:
+                now = self.clock() if now is None else now
+                while self.heap and (self.heap[0][2].cancelled or self.heap[0][3] != self.heap[0][2].token):
+                    heapq.heappop(self.heap) # stale entry (cancelled or rescheduled)
+                if not self.heap: return None
+                deadline, _, job, token = self.heap[0]
+                if deadline > now: return deadline - now
+                heapq.heappop(self.heap)
+            self.execute(job, deadline, token, now)
+            now = None
+
+    def execute(self, job, deadline, token, now):
+        jitter = max(0.0, now - deadline)
+        t0 = time.perf_counter()
+        try: job.fn()
+        except Exception: job.errors += 1
+        duration = time.perf_counter() - t0
+        job.runs += 1
+        job.jitter_last = jitter
+        job.jitter_max = max(job.jitter_max, jitter)
+        job.jitter_avg = jitter if job.runs == 1 else job.jitter_avg * 0.9 + jitter * 0.1
+        job.duration_last = duration
+        job.duration_max = max(job.duration_max, duration)
+
+        with self.cond:
+            if job.cancelled or self.jobs.get(job.name) is not job: return
+            if job.interval is None:
+                del self.jobs[job.name]
+                return
+            # Drift correction: anchor on the deadline, not on when we happened to run
+            nxt = deadline + job.interval
+            now = self.clock()
+            if nxt <= now:
+                missed = int((now - nxt) // job.interval) + 1
+                job.skipped += missed
+                nxt += missed * job.interval
+            if job.token == token: self.push(job, nxt) # else: already re-pushed by set_interval
+
+    def loop(self):
+        while True:
+            with self.cond:
+                if not self.running: return
+            self.run_due()
+            with self.cond:
+                if not self.running: return
+                # Deadline re-read under the same lock as the wait: a job pushed since run_due()
+                # returned (its notify() happened before we waited) is not slept through
+                self.cond.wait(self.next_wait_locked())
+                self.wakeups += 1
+
+    def next_wait_locked(self):
+        while self.heap and (self.heap[0][2].cancelled or self.heap[0][3] != self.heap[0][2].token):
+            heapq.heappop(self.heap)
+        if not self.heap: return None
+        return max(0.0, self.heap[0][0] - self.clock())
+
+    def start(self):
+        with self.cond:
+            if self.running: return self
+            self.running = True
+        self.thread = threading.Thread(target=self.loop, name="nexus-scheduler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            jobs = {name: job.stats() for name, job in self.jobs.items()}
+        return {"wakeups": self.wakeups, "jobs": jobs}
+
+# --- SHARED INSTANCE ---
+_shared_scheduler = None
+_shared_lock = threading.Lock()
+
+def get_scheduler():
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = Scheduler().start()
+        return _shared_scheduler
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import deque
+
+# Sentinel action executor.
+# Each action has an enter/exit hysteresis band on one metric, a cooldown and a share
+# of a global concurrency cap. Every run is measured (metric before/after + latency);
+# actions that do not move the metric get an exponentially longer cooldown.
+SETTLE_SECONDS = 3.0   # wait before reading the "after" value
+MIN_EFFECT = 1.0       # pts a run must recover to count as helpful
+MAX_BACKOFF = 16       # cooldown multiplier cap
+HISTORY = 32           # measured runs kept per action
+
+class SentinelAction:
+    def __init__(self, name, fn, metric, enter, exit_margin, cooldown):
+        self.name = name
+        self.fn = fn
+        self.metric = metric # "cpu" | "ram"
+        self.enter = enter # number or callable -> threshold that arms the action
+        self.exit_margin = exit_margin # disarm only once metric < enter - exit_margin
+        self.cooldown = cooldown
+        self.backoff = 1
+        self.engaged = False
+        self.last_fired = None
+        self.running = False
+        self.history = deque(maxlen=HISTORY) # (ts, before, after, latency_ms)
+        self.counts = {"fired": 0, "cooldown": 0, "concurrency": 0, "helpful": 0, "useless": 0, "errors": 0}
+
+    def threshold(self):
+        return self.enter() if callable(self.enter) else self.enter
+
+    def stats(self):
+        effects = [before - after for _, before, after, _ in self.history if after is not None]
+        latencies = [lat for _, _, _, lat in self.history]
+        return dict(self.counts, engaged=self.engaged, cooldown_s=self.cooldown * self.backoff,
+                    avg_effect=round(sum(effects) / len(effects), 2) if effects else None,
+                    avg_latency_ms=round(sum(latencies) / len(latencies), 2) if latencies else None)
+
+class ActionExecutor:
+    def __init__(self, sampler, scheduler, max_concurrent=1, clock=time.monotonic, notify=None):
+        self.sampler = sampler
+        self.scheduler = scheduler
+        self.max_concurrent = max_concurrent
+        self.clock = clock
+        self.notify = notify # optional callback(str) for the UI feed
+        self.actions = {}
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def register(self, name, fn, metric="ram", enter=85, exit_margin=5, cooldown=30.0):
+        action = SentinelAction(name, fn, metric, enter, exit_margin, cooldown)
+        self.actions[name] = action
+        return action
+
+    def trigger(self, name, snap=None, value=None):
+        # Called every tick; decides whether the action may actually run.
+        # `value` overrides the observed metric (Oracle passes its forecast to act early).
+        action = self.actions[name]
+        snap = snap or self.sampler.snapshot()
+        if value is None: value = getattr(snap, action.metric)
+        limit = action.threshold()
+        now = self.clock()
+
+        with self.lock:
+            if not action.engaged:
+                if value <= limit: return False
+                action.engaged = True
+            elif value < limit - action.exit_margin:
+                action.engaged = False # left the band: re-arm for the next crossing
+                return False
+            if action.last_fired is not None and now - action.last_fired < action.cooldown * action.backoff:
+                action.counts["cooldown"] += 1
+                return False
+            if action.running or self.active >= self.max_concurrent:
+                action.counts["concurrency"] += 1
+                return False
+            action.running = True
+            action.last_fired = now
+            self.active += 1
+
+        return self.run(action, getattr(snap, action.metric), snap)
+
+    def run(self, action, before, snap):
+        t0 = time.perf_counter()
+        try:
+            action.fn()
+        except Exception:
+            action.counts["errors"] += 1
+        latency_ms = (time.perf_counter() - t0) * 1000
+        with self.lock:
+            action.running = False
+            self.active -= 1
+            action.counts["fired"] += 1
+        record = [snap.ts, before, None, latency_ms]
+        action.history.append(record)
+        self.scheduler.call_later(f"sentinel.measure.{action.name}", SETTLE_SECONDS, lambda: self.measure(action, record))
+        return True
+
+    def measure(self, action, record, retries=2):
+        snap = self.sampler.snapshot()
+        if snap.ts <= record[0] and retries:
+            # No fresh sample yet (slow adaptive rate): look again a little later
+            self.scheduler.call_later(f"sentinel.measure.{action.name}.retry{retries}", SETTLE_SECONDS, lambda: self.measure(action, record, retries - 1))
+            return
+        after = getattr(snap, action.metric)
+        record[2] = after
+        # deque holds lists, so patching the record in place updates the history
+        if record[1] - after >= MIN_EFFECT:
+            action.counts["helpful"] += 1
+            action.backoff = 1
+        else:
+            action.counts["useless"] += 1
+            if action.backoff < MAX_BACKOFF:
+                action.backoff *= 2
+                if self.notify: self.notify(f"SENTINEL: '{action.name}' had no measurable effect ({record[1]:.0f}% -> {after:.0f}%). Backing off to {action.cooldown * action.backoff:.0f}s.")
+
+    def stats(self):
+        return {name: action.stats() for name, action in self.actions.items()}
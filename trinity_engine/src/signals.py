@@ -0,0 +1,219 @@
+import os
+import time
+
+# Stall-aware signal sources (Linux): PSI, disk I/O, swap activity, NIC load, per-process I/O.
+# Every system-wide file is opened once and re-read with preadv from offset 0 into a
+# preallocated buffer: no open/close, no file objects and no readline per tick, only
+# one bytes copy per file for parsing. Rates come from deltas between two sample() calls.
+# Roots are injectable, so fixture trees can stand in for /proc and /sys. Missing sources
+# (Windows, old kernels, containers) read as None and the classifier falls back to plain
+# CPU%/RAM% limits.
+PROC_ROOT = "/proc"
+SYS_ROOT = "/sys"
+
+PSI_CPU_SOME = 40.0   # % of time some runnable task waited for a CPU
+PSI_MEM_FULL = 5.0    # % of time all tasks stalled on memory (reclaim / refault)
+PSI_IO_FULL = 10.0    # % of time all tasks stalled on I/O
+DISK_BUSY = 90.0      # % of time the busiest disk had requests in flight
+SWAP_PAGES_S = 256.0  # swap-in + swap-out pages per second (~1 MB/s)
+NET_UTIL = 90.0       # % of link speed on the busiest interface
+
+SKIP_DISKS = ("loop", "ram", "zram", "dm-", "md", "sr", "fd")
+HAVE_PREADV = hasattr(os, "preadv")
+
+class ProcFile:
+    __slots__ = ("path", "fd", "buf")
+
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.buf = bytearray(size)
+        try: self.fd = os.open(path, os.O_RDONLY)
+        except (OSError, AttributeError): self.fd = None
+
+    def read(self):
+        # Whole file from offset 0; the buffer doubles if the file outgrew it
+        if self.fd is None: return None
+        try:
+            while True:
+                if HAVE_PREADV:
+                    n = os.preadv(self.fd, [self.buf], 0)
+                    if n < len(self.buf): return bytes(memoryview(self.buf)[:n])
+                else:
+                    data = os.pread(self.fd, len(self.buf), 0)
+                    if len(data) < len(self.buf): return data
+                self.buf = bytearray(len(self.buf) * 2)
+        except OSError: return None
+
+    def close(self):
+        if self.fd is not None:
+            try: os.close(self.fd)
+            except OSError: pass
+            self.fd = None
+
+def read_once(path, size=1024):
+    # One-shot read (per-process files, sysfs attributes)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try: return os.pread(fd, size, 0)
+        finally: os.close(fd)
+    except (OSError, AttributeError): return None
+
+# --- PARSERS ---
+def parse_psi(data):
+    # "some avg10=.. avg60=.. avg300=.. total=N" (+ "full ..." for memory/io) -> {b"some": us, b"full": us}
+    totals = {}
+    for line in data.split(b"\n"):
+        if line: totals[line[:4]] = int(line.rsplit(b"=", 1)[1])
+    return totals
+
+def parse_keyed(data, keys):
+    # "key value" lines (vmstat, /proc/<pid>/io with ':'): only the requested keys
+    values = {}
+    for line in data.split(b"\n"):
+        key, _, value = line.partition(b" ")
+        key = key.rstrip(b":")
+        if key in keys: values[key] = int(value)
+    return values
+
+def parse_diskstats(data, disks):
+    # -> {name: (io_ticks_ms, sectors_read, sectors_written)}
+    stats = {}
+    for line in data.split(b"\n"):
+        fields = line.split()
+        if len(fields) > 12 and fields[2] in disks:
+            stats[fields[2]] = (int(fields[12]), int(fields[5]), int(fields[9]))
+    return stats
+
+def parse_netdev(data):
+    # -> {iface: (rx_bytes, tx_bytes)}
+    stats = {}
+    for line in data.split(b"\n")[2:]:
+        name, sep, rest = line.partition(b":")
+        if not sep: continue
+        fields = rest.split()
+        stats[name.strip()] = (int(fields[0]), int(fields[8]))
+    return stats
+
+class SignalSources:
+    def __init__(self, proc_root=PROC_ROOT, sys_root=SYS_ROOT, clock=time.monotonic):
+        self.proc_root = proc_root
+        self.sys_root = sys_root
+        self.clock = clock
+        self.psi = {name: ProcFile(os.path.join(proc_root, "pressure", name)) for name in ("cpu", "memory", "io")}
+        self.vmstat = ProcFile(os.path.join(proc_root, "vmstat"), 8192)
+        self.diskstats = ProcFile(os.path.join(proc_root, "diskstats"), 8192)
+        self.netdev = ProcFile(os.path.join(proc_root, "net", "dev"), 8192)
+        self.disks = self.list_disks()
+        self.link_bps = self.link_speeds()
+        self.prev = None
+        self.latest = {}
+        self.proc_io_prev = {} # pid -> read+write bytes at the last top_io()
+        self.last_top_io = [] # what the last top_io() returned (trace recorder)
+
+    def list_disks(self):
+        # Whole physical disks only (partitions and stacked devices would double count)
+        try: names = os.listdir(os.path.join(self.sys_root, "block"))
+        except OSError: return set()
+        return {name.encode() for name in names if not name.startswith(SKIP_DISKS)}
+
+    def link_speeds(self):
+        # iface -> capacity in bytes/s (interfaces without a reported speed are skipped)
+        speeds = {}
+        try: names = os.listdir(os.path.join(self.sys_root, "class", "net"))
+        except OSError: return speeds
+        for name in names:
+            if name == "lo": continue
+            data = read_once(os.path.join(self.sys_root, "class", "net", name, "speed"), 32)
+            try: mbps = int(data) if data else 0
+            except ValueError: mbps = 0
+            if mbps > 0: speeds[name.encode()] = mbps * 125000
+        return speeds
+
+    def available(self):
+        return {"psi": self.psi["cpu"].fd is not None, "vmstat": self.vmstat.fd is not None,
+                "diskstats": self.diskstats.fd is not None and bool(self.disks), "net": bool(self.link_bps)}
+
+    # --- SAMPLING ---
+    def read_raw(self):
+        raw = {"ts": self.clock()}
+        for name, f in self.psi.items():
+            data = f.read()
+            raw[name] = parse_psi(data) if data else None
+        data = self.vmstat.read()
+        raw["swap"] = parse_keyed(data, (b"pswpin", b"pswpout")) if data else None
+        data = self.diskstats.read()
+        raw["disk"] = parse_diskstats(data, self.disks) if data and self.disks else None
+        data = self.netdev.read() if self.link_bps else None
+        raw["net"] = parse_netdev(data) if data else None
+        return raw
+
+    def sample(self):
+        # Rates since the previous call (None on the first call or for missing sources)
+        raw = self.read_raw()
+        prev, self.prev = self.prev, raw
+        out = {"psi_cpu_some": None, "psi_cpu_full": None, "psi_mem_some": None, "psi_mem_full": None, "psi_io_some": None, "psi_io_full": None,
+               "disk_busy": None, "disk_read_bps": None, "disk_write_bps": None, "swap_pages_s": None, "net_util": None}
+        dt = (raw["ts"] - prev["ts"]) if prev else 0
+        if dt > 0:
+            for name, key in (("cpu", "psi_cpu"), ("memory", "psi_mem"), ("io", "psi_io")):
+                now, before = raw[name], prev[name]
+                if now is None or before is None: continue
+                for kind in (b"some", b"full"):
+                    if kind in now and kind in before:
+                        out[f"{key}_{kind.decode()}"] = min(100.0, (now[kind] - before[kind]) / (dt * 1e6) * 100)
+            if raw["swap"] and prev["swap"]:
+                moved = sum(raw["swap"].get(k, 0) - prev["swap"].get(k, 0) for k in (b"pswpin", b"pswpout"))
+                out["swap_pages_s"] = moved / dt
+            if raw["disk"] is not None and prev["disk"] is not None:
+                busy, rd, wr = 0.0, 0, 0
+                for name, (ticks, sectors_r, sectors_w) in raw["disk"].items():
+                    before = prev["disk"].get(name)
+                    if before is None: continue
+                    busy = max(busy, (ticks - before[0]) / (dt * 1000) * 100)
+                    rd += sectors_r - before[1]
+                    wr += sectors_w - before[2]
+                out["disk_busy"] = min(100.0, busy)
+                out["disk_read_bps"] = rd * 512 / dt
+                out["disk_write_bps"] = wr * 512 / dt
+            if raw["net"] is not None and prev["net"] is not None:
+                util = 0.0
+                for name, capacity in self.link_bps.items():
+                    now, before = raw["net"].get(name), prev["net"].get(name)
+                    if now is None or before is None: continue
+                    rate = max(now[0] - before[0], now[1] - before[1]) / dt # full duplex: the busier direction
+                    util = max(util, rate / capacity * 100)
+                out["net_util"] = util
+        self.latest = out
+        return out
+
+    def classify(self, cpu, ram, cpu_limit, ram_limit, signals=None):
+        # Most specific stall first: swapping explains the RAM/IO symptoms it causes
+        s = self.latest if signals is None else signals
+        def over(key, limit): return s.get(key) is not None and s[key] >= limit
+        if over("swap_pages_s", SWAP_PAGES_S) and (ram > ram_limit or over("psi_mem_some", PSI_MEM_FULL)): return "SWAP"
+        if over("psi_io_full", PSI_IO_FULL) or over("disk_busy", DISK_BUSY): return "IO"
+        if ram > ram_limit or over("psi_mem_full", PSI_MEM_FULL): return "RAM"
+        if cpu > cpu_limit or over("psi_cpu_some", PSI_CPU_SOME): return "CPU"
+        if over("net_util", NET_UTIL): return "NET"
+        return None
+
+    # --- PER-PROCESS I/O (on demand, only while an IO bottleneck is being attributed) ---
+    def top_io(self, processes, n=5):
+        # processes: iterable of (pid, name) -> [(name, bytes since last call)] aggregated by name
+        totals, seen = {}, {}
+        for pid, name in processes:
+            data = read_once(os.path.join(self.proc_root, str(pid), "io"), 512)
+            if not data: continue
+            try: values = parse_keyed(data, (b"read_bytes", b"write_bytes"))
+            except ValueError: continue
+            total = values.get(b"read_bytes", 0) + values.get(b"write_bytes", 0)
+            seen[pid] = total
+            before = self.proc_io_prev.get(pid)
+            totals[name] = totals.get(name, 0) + (total - before if before is not None else 0)
+        self.proc_io_prev = seen
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        self.last_top_io = [item for item in ranked[:n] if item[1] > 0]
+        return self.last_top_io
+
+    def close(self):
+        for f in list(self.psi.values()) + [self.vmstat, self.diskstats, self.netdev]: f.close()
@@ -0,0 +1,202 @@
+import base64
+import sys
+import time
+from array import array
+
+# Constant-memory streaming summaries per app (~1.2 KB each, independent of history length).
+# CPU/RAM are bounded percentages, so a 1-pt bucket histogram is an exact-to-1pt quantile
+# sketch that merges by simple addition (across sessions and across machines).
+# Durations and inter-spike gaps use log2 buckets: 1s, 2s, 4s ... 2048s+.
+PCT_BINS = 101
+LOG_BINS = 12
+BOTTLENECKS = ("CPU", "RAM", "IO", "SWAP", "NET")
+
+def encode_counts(counts):
+    data = array('I', counts)
+    if sys.byteorder == "big": data.byteswap() # persisted little-endian
+    return base64.b64encode(data.tobytes()).decode("ascii")
+
+def decode_counts(text, size):
+    data = array('I')
+    data.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big": data.byteswap()
+    if len(data) != size: raise ValueError("sketch size mismatch")
+    return data
+
+class Histogram:
+    __slots__ = ("counts", "total")
+
+    def __init__(self, size, counts=None):
+        self.counts = counts if counts is not None else array('I', bytes(4 * size))
+        self.total = sum(self.counts)
+
+    def add(self, index, n=1):
+        index = min(max(index, 0), len(self.counts) - 1)
+        self.counts[index] += n
+        self.total += n
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            if c: self.counts[i] += c
+        self.total += other.total
+
+    def quantile_bin(self, q):
+        if not self.total: return None
+        rank = q * (self.total - 1)
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen > rank: return i
+        return len(self.counts) - 1
+
+class PercentSketch(Histogram):
+    def __init__(self, counts=None):
+        Histogram.__init__(self, PCT_BINS, counts)
+
+    def observe(self, pct):
+        self.add(int(round(pct)))
+
+    def quantile(self, q):
+        return self.quantile_bin(q)
+
+class LogSketch(Histogram):
+    # Seconds, bucketed by powers of two
+    def __init__(self, counts=None):
+        Histogram.__init__(self, LOG_BINS, counts)
+
+    def observe(self, seconds):
+        self.add(max(0, int(seconds)).bit_length() - 1 if seconds >= 1 else 0)
+
+    def quantile(self, q):
+        # Lower edge of the bucket: "at least this long"
+        b = self.quantile_bin(q)
+        return None if b is None else float(2 ** b)
+
+class AppProfile:
+    def __init__(self):
+        self.cpu = PercentSketch()       # system CPU while this app was spiking
+        self.ram = PercentSketch()       # system RAM while this app was spiking
+        self.duration = LogSketch()      # spike episode length
+        self.interval = LogSketch()      # gap between episode starts
+        self.hours = Histogram(24)       # hour of day an episode started
+        self.mix = {name: 0 for name in BOTTLENECKS}
+        self.episodes = 0
+        self.last_start = None
+
+    # --- STREAM UPDATES ---
+    def observe_spike(self, ts, bottleneck, cpu, ram):
+        if cpu is not None: self.cpu.observe(cpu)
+        if ram is not None: self.ram.observe(ram)
+        self.mix[bottleneck] = self.mix.get(bottleneck, 0) + 1
+
+    def observe_start(self, ts):
+        if self.last_start is not None and ts > self.last_start: self.interval.observe(ts - self.last_start)
+        self.hours.add(time.localtime(ts).tm_hour)
+        self.last_start = ts
+        self.episodes += 1
+
+    def observe_end(self, duration):
+        self.duration.observe(duration)
+
+    def merge(self, other):
+        for mine, theirs in ((self.cpu, other.cpu), (self.ram, other.ram), (self.duration, other.duration),
+                             (self.interval, other.interval), (self.hours, other.hours)):
+            mine.merge(theirs)
+        for name, count in other.mix.items(): self.mix[name] = self.mix.get(name, 0) + count
+        self.episodes += other.episodes
+        if other.last_start is not None: self.last_start = max(self.last_start or 0, other.last_start)
+        return self
+
+    # --- QUERIES ---
+    def dominant(self):
+        name, count = max(self.mix.items(), key=lambda item: item[1])
+        return name if count else "unknown"
+
+    def is_heavy(self, cpu_limit=85, ram_limit=85, min_episodes=3):
+        # Heavy = recurring, and its spikes are real: long or deep, not one-tick blips
+        if self.episodes < min_episodes: return False
+        long_spikes = (self.duration.quantile(0.5) or 0) >= 4
+        deep_spikes = (self.cpu.quantile(0.9) or 0) >= cpu_limit or (self.ram.quantile(0.9) or 0) >= ram_limit
+        return long_spikes or deep_spikes
+
+    def summary(self):
+        return {"episodes": self.episodes, "dominant": self.dominant(),
+                "cpu_p50": self.cpu.quantile(0.5), "cpu_p90": self.cpu.quantile(0.9),
+                "ram_p50": self.ram.quantile(0.5), "ram_p90": self.ram.quantile(0.9),
+                "duration_p50_s": self.duration.quantile(0.5), "duration_p90_s": self.duration.quantile(0.9),
+                "interval_p50_s": self.interval.quantile(0.5), "mix": dict(self.mix)}
+
+    # --- PERSISTENCE ---
+    def to_json(self):
+        return {"cpu": encode_counts(self.cpu.counts), "ram": encode_counts(self.ram.counts),
+                "duration": encode_counts(self.duration.counts), "interval": encode_counts(self.interval.counts),
+                "hours": encode_counts(self.hours.counts), "mix": {k: v for k, v in self.mix.items() if v},
+                "episodes": self.episodes, "last_start": self.last_start}
+
+    @classmethod
+    def from_json(cls, data):
+        p = cls()
+        p.cpu = PercentSketch(decode_counts(data["cpu"], PCT_BINS))
+        p.ram = PercentSketch(decode_counts(data["ram"], PCT_BINS))
+        p.duration = LogSketch(decode_counts(data["duration"], LOG_BINS))
+        p.interval = LogSketch(decode_counts(data["interval"], LOG_BINS))
+        p.hours = Histogram(24, decode_counts(data["hours"], 24))
+        p.mix.update(data.get("mix", {}))
+        p.episodes = data.get("episodes", 0)
+        p.last_start = data.get("last_start")
+        return p
+
+# --- JOURNAL HOOKS ---
+def encode_profiles(obj):
+    # json.dumps(default=...) hook for journal snapshots
+    if isinstance(obj, AppProfile): return obj.to_json()
+    raise TypeError(f"not serializable: {type(obj).__name__}")
+
+def decode_profiles(state):
+    for entry in state.values():
+        if isinstance(entry, dict) and isinstance(entry.get("profile"), dict):
+            try: entry["profile"] = AppProfile.from_json(entry["profile"])
+            except (KeyError, ValueError): entry["profile"] = AppProfile()
+    return state
+
+def profile_of(entry):
+    profile = entry.get("profile")
+    if profile is None: profile = entry["profile"] = AppProfile()
+    return profile
+
+def apply_profile_event(entry, event):
+    # Shared by both reducers: spike ticks feed sketches, episode boundaries feed histograms
+    profile = profile_of(entry)
+    ts = event.get("ts") or time.time()
+    if "end" in event:
+        profile.observe_end(event["end"])
+        return False
+    if event.get("start"): profile.observe_start(ts)
+    profile.observe_spike(ts, event.get("type", "CPU"), event.get("cpu"), event.get("ram"))
+    return True
+
+def as_profile(value):
+    # Decoded AppProfile, or the JSON form straight from a memory file
+    if isinstance(value, AppProfile): return value
+    try: return AppProfile.from_json(value)
+    except (KeyError, ValueError, TypeError): return AppProfile()
+
+def merge_memory(state, other):
+    # Merge another session's / machine's memory (same reducer format) into `state`;
+    # profiles on either side may still be raw JSON (other is left untouched)
+    for app, entry in other.items():
+        if not isinstance(entry, dict): continue
+        mine = state.get(app)
+        if mine is None:
+            mine = state[app] = {k: v for k, v in entry.items() if k != "profile"}
+        else:
+            for counter in ("spikes", "lag_count"):
+                if counter in entry: mine[counter] = mine.get(counter, 0) + entry[counter]
+        if mine.get("profile") is not None: mine["profile"] = as_profile(mine["profile"])
+        if entry.get("profile") is not None: profile_of(mine).merge(as_profile(entry["profile"]))
+        if mine.get("profile") is not None:
+            # Derived fields follow the merged distribution, not whichever side came last
+            dominant = mine["profile"].dominant()
+            if "type" in mine: mine["type"] = dominant
+            if "bottleneck_type" in mine: mine["bottleneck_type"] = dominant
+    return state
@@ -0,0 +1,101 @@
+import psutil # type: ignore
+import threading
+import time
+from collections import namedtuple
+from scheduler import get_scheduler
+from diagnostics import count_psutil
+
+# One snapshot per tick, shared by every consumer (UI, Nexus, boost loops)
+TelemetrySnapshot = namedtuple("TelemetrySnapshot", ["ts", "seq", "cpu", "ram", "ram_used", "ram_total"])
+
+SAMPLER_INTERVAL = 1.0
+
+class TelemetrySampler:
+    def __init__(self, interval=SAMPLER_INTERVAL, scheduler=None):
+        self.interval = interval
+        self.scheduler = scheduler
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.tick_event = threading.Condition(self.lock)
+        self.running = False
+        self.seq = 0
+        self.base_interval = interval
+        self.adaptive = None # optional AdaptiveRate controller
+
+        # Prime the CPU delta so the first real tick is meaningful
+        psutil.cpu_percent(interval=None)
+        self.latest = self.sample_now()
+
+    def sample_now(self):
+        # The only place that is allowed to touch the CPU/RAM counters
+        vm = psutil.virtual_memory()
+        count_psutil("sampler", 2)
+        self.seq += 1
+        return TelemetrySnapshot(time.time(), self.seq, psutil.cpu_percent(interval=None), vm.percent, vm.used, vm.total)
+
+    def start(self):
+        with self.lock:
+            if self.running: return self
+            self.running = True
+        # Runs as a job on the shared scheduler, not on a thread of its own
+        self.scheduler = self.scheduler or get_scheduler()
+        self.scheduler.every("telemetry.sample", self.interval, self.tick)
+        return self
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            self.tick_event.notify_all()
+        if self.scheduler: self.scheduler.cancel("telemetry.sample")
+
+    def set_adaptive(self, controller):
+        # None switches back to the fixed base interval
+        self.adaptive = controller
+        if controller is None: self.retune(self.base_interval)
+
+    def retune(self, interval):
+        if interval == self.interval: return
+        self.interval = interval
+        if self.scheduler: self.scheduler.set_interval("telemetry.sample", interval, reschedule=True)
+
+    def tick(self):
+        snap = self.sample_now()
+        if self.adaptive is not None: self.retune(self.adaptive.update(snap))
+        with self.lock:
+            self.latest = snap
+            subscribers = list(self.subscribers)
+            self.tick_event.notify_all()
+        for callback in subscribers:
+            try: callback(snap)
+            except Exception: pass
+        return snap
+
+    def snapshot(self):
+        return self.latest
+
+    def wait_next(self, timeout=None):
+        # Block until a snapshot newer than the current one is published
+        with self.lock:
+            seq = self.latest.seq
+            self.tick_event.wait_for(lambda: self.latest.seq != seq or not self.running, timeout)
+            return self.latest
+
+    def subscribe(self, callback):
+        with self.lock:
+            if callback not in self.subscribers: self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers: self.subscribers.remove(callback)
+
+# --- SHARED INSTANCE ---
+_shared_sampler = None
+_shared_lock = threading.Lock()
+
+def get_sampler():
+    global _shared_sampler
+    with _shared_lock:
+        if _shared_sampler is None:
+            _shared_sampler = TelemetrySampler().start()
+        return _shared_sampler
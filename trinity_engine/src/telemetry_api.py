@@ -0,0 +1,325 @@
+import asyncio
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl
+from diagnostics import get_instruments
+
+# Local telemetry API: the engine's cached data for other tools on this machine.
+#   Unix socket  newline-delimited JSON: {"q": "window", "metric": "cpu", "seconds": 300}
+#                -> {"ok": true, "result": ...}
+#   HTTP         127.0.0.1 only: GET /v1/<query>?<params> (JSON), GET /metrics (Prometheus text)
+# Queries: current, window (metric, seconds, app, stat), apps, app (name), metrics, stats, diagnostics.
+# Every answer is built from what the engine already holds (sampler snapshot, time-series
+# rings, Cortex memory), never by sampling. Rendered answers are memoized per data version
+# (sampler seq / journal seq), so N clients asking between two ticks cost one render plus
+# N buffer writes. One asyncio loop on one thread serves all connections.
+SOCKET_PATH = os.path.join(tempfile.gettempdir(), "nexus_telemetry.sock")
+SOCKET_MODE = 0o660 # owner + group
+HTTP_HOST = "127.0.0.1" # never bound beyond localhost
+HTTP_PORT = 9470
+MAX_CLIENTS = 1024
+BACKLOG = 512 # pending connects (a burst of tools starting together)
+MAX_REQUEST = 8192
+IDLE_TIMEOUT = 60.0
+MAX_WINDOW_S = 7 * 24 * 3600
+MEMO_SIZE = 512
+
+METRICS = ("cpu", "ram")
+STATS = {"mean": None, "max": None, "p50": 50, "p90": 90, "p95": 95, "p99": 99, "raw": None}
+
+def encode(value):
+    return json.dumps(value, separators=(",", ":")).encode()
+
+def prom_labels(labels):
+    if not labels: return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+# --- QUERIES (answered from the engine's in-memory state) ---
+class QueryCache:
+    # Used from the API loop thread only
+    def __init__(self, nexus):
+        self.nexus = nexus
+        self.memo = {} # key -> (version, encoded result)
+        self.depth = 0
+        self.stats = {"hits": 0, "renders": 0, "render_s": 0.0}
+
+    def cached(self, key, version, build):
+        entry = self.memo.get(key)
+        if entry is not None and entry[0] == version:
+            self.stats["hits"] += 1
+            return entry[1]
+        if len(self.memo) >= MEMO_SIZE: self.memo.clear()
+        t0 = time.thread_time()
+        self.depth += 1
+        try: value = build()
+        finally: self.depth -= 1
+        self.memo[key] = (version, value)
+        self.stats["renders"] += 1
+        if not self.depth: self.stats["render_s"] += time.thread_time() - t0 # outermost render only
+        return value
+
+    def versions(self):
+        return self.nexus.sampler.snapshot().seq, self.nexus.journal.seq
+
+    def query(self, name, params):
+        # -> JSON-encoded result (bytes); ValueError/KeyError for bad queries
+        seq, journal_seq = self.versions()
+        if name == "current": return self.cached(("current",), seq, lambda: encode(self.current()))
+        if name == "window":
+            metric, seconds, app, kind = params.get("metric", "cpu"), float(params.get("seconds", 60)), params.get("app"), params.get("stat", "mean")
+            if metric not in METRICS: raise ValueError(f"unknown metric {metric!r}")
+            if kind not in STATS: raise ValueError(f"unknown stat {kind!r}")
+            if not 0 < seconds <= MAX_WINDOW_S: raise ValueError("seconds out of range")
+            return self.cached(("window", metric, seconds, app, kind), seq, lambda: encode(self.window(metric, seconds, app, kind)))
+        if name == "apps": return self.cached(("apps",), (seq, journal_seq), lambda: encode(self.apps()))
+        if name == "app":
+            app = params["name"]
+            return self.cached(("app", app), (seq, journal_seq), lambda: encode(self.app(app)))
+        if name == "metrics": return self.cached(("metrics.json",), (seq, journal_seq), lambda: encode(self.metrics_text().decode()))
+        raise KeyError(name)
+
+    def metrics_text(self):
+        # Prometheus exposition (text format 0.0.4), bytes ready to send
+        return self.cached(("metrics",), self.versions(), self.prometheus)
+
+    def current(self):
+        nexus = self.nexus
+        snap = nexus.sampler.snapshot()
+        data = {"ts": snap.ts, "seq": snap.seq, "cpu": snap.cpu, "ram": snap.ram, "ram_used": snap.ram_used, "ram_total": snap.ram_total,
+                "active": nexus.is_active, "limits": {"cpu": nexus.cpu_limit_soft, "ram": nexus.ram_limit_soft}}
+        for metric in METRICS:
+            data[f"{metric}_1m"] = {"mean": nexus.timeseries.mean(metric, 60), "max": nexus.timeseries.max(metric, 60)}
+        signals = getattr(nexus, "signals", None)
+        if signals is not None: data["signals"] = dict(signals.latest)
+        return data
+
+    def window(self, metric, seconds, app, kind):
+        ts = self.nexus.timeseries
+        values = ts.window(metric, seconds, app, column="peak" if kind == "max" else "avg")
+        out = {"metric": metric, "seconds": seconds, "app": app, "stat": kind, "samples": len(values)}
+        if kind == "raw": out["values"] = [round(v, 2) for v in values]
+        elif kind == "mean": out["value"] = sum(values) / len(values) if len(values) else None
+        elif kind == "max": out["value"] = max(values) if len(values) else None
+        else: out["value"] = ts.percentile(metric, seconds, STATS[kind], app)
+        return out
+
+    def cortex(self):
+        # Cortex memory (per-app spike counters + sketch summaries), copied under the journal lock
+        journal = self.nexus.journal
+        def build():
+            apps = {}
+            with journal.lock:
+                for app, entry in self.nexus.history.items():
+                    if not isinstance(entry, dict): continue
+                    info = {k: v for k, v in entry.items() if k != "profile"}
+                    profile = entry.get("profile")
+                    if profile is not None: info["profile"] = profile.summary()
+                    apps[app] = info
+            return apps
+        return self.cached(("cortex",), journal.seq, build)
+
+    def live(self):
+        # Latest per-app sample from the time-series store (foreground apps tracked by Nexus)
+        ts = self.nexus.timeseries
+        out = {}
+        with ts.lock:
+            for app, entry in ts.apps.items():
+                out[app] = {"seen": entry["seen"], "cpu": entry["cpu"].latest(), "ram": entry["ram"].latest()}
+        return out
+
+    def apps(self):
+        cortex, live = self.cortex(), self.live()
+        return {app: dict(cortex.get(app, {}), live=live.get(app)) for app in sorted(set(cortex) | set(live))}
+
+    def app(self, app):
+        ts = self.nexus.timeseries
+        data = dict(self.cortex().get(app, {}), live=self.live().get(app))
+        for metric in METRICS:
+            data[f"{metric}_10m"] = {"mean": ts.mean(metric, 600, app), "max": ts.max(metric, 600, app)}
+        return data
+
+    def prometheus(self):
+        snap = self.nexus.sampler.snapshot()
+        lines = []
+        def family(name, kind, help, samples):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if value is not None: lines.append(f"{name}{prom_labels(labels)} {value}")
+        family("nexus_cpu_percent", "gauge", "System CPU utilisation.", [(None, snap.cpu)])
+        family("nexus_ram_percent", "gauge", "System RAM utilisation.", [(None, snap.ram)])
+        family("nexus_ram_used_bytes", "gauge", "RAM in use.", [(None, snap.ram_used)])
+        family("nexus_ram_total_bytes", "gauge", "Installed RAM.", [(None, snap.ram_total)])
+        family("nexus_sample_seq", "counter", "Sampler tick counter.", [(None, snap.seq)])
+        ts = self.nexus.timeseries
+        family("nexus_percent_1m", "gauge", "Last-minute mean and peak utilisation.",
+               [({"metric": m, "stat": "mean"}, ts.mean(m, 60)) for m in METRICS] + [({"metric": m, "stat": "max"}, ts.max(m, 60)) for m in METRICS])
+        signals = getattr(self.nexus, "signals", None)
+        s = signals.latest if signals is not None else {}
+        family("nexus_pressure_stall_percent", "gauge", "Share of time tasks stalled (PSI).",
+               [({"resource": r, "kind": k}, s.get(f"psi_{r}_{k}")) for r in ("cpu", "mem", "io") for k in ("some", "full")])
+        family("nexus_disk_busy_percent", "gauge", "Busiest disk utilisation.", [(None, s.get("disk_busy"))])
+        family("nexus_swap_pages_per_second", "gauge", "Swap-in + swap-out pages per second.", [(None, s.get("swap_pages_s"))])
+        family("nexus_net_util_percent", "gauge", "Busiest interface utilisation.", [(None, s.get("net_util"))])
+        cortex = self.cortex()
+        family("nexus_app_spikes_total", "counter", "Spike ticks attributed to the app by Cortex.",
+               [({"app": app}, info.get("spikes", info.get("lag_count"))) for app, info in cortex.items()])
+        family("nexus_app_episodes_total", "counter", "Spike episodes recorded for the app.",
+               [({"app": app}, info["profile"]["episodes"]) for app, info in cortex.items() if "profile" in info])
+        live = self.live()
+        family("nexus_app_percent", "gauge", "Latest utilisation of tracked apps.",
+               [({"app": app, "metric": m}, info[m]) for app, info in live.items() for m in METRICS])
+        return ("\n".join(lines) + "\n").encode()
+
+# --- SERVER ---
+class TelemetryAPI:
+    def __init__(self, nexus, socket_path=SOCKET_PATH, http_port=None, max_clients=MAX_CLIENTS):
+        self.cache = QueryCache(nexus)
+        self.socket_path = socket_path # None = no Unix socket
+        self.http_port = http_port # None = no HTTP
+        self.max_clients = max_clients
+        self.loop = None
+        self.servers = []
+        self.thread = None
+        self.clients = 0
+        self.stats = {"connections": 0, "rejected": 0, "requests": 0, "errors": 0, "cpu_s": 0.0, "peak_clients": 0}
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self.thread is not None: return self
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(ready,), daemon=True, name="telemetry-api")
+        self.thread.start()
+        ready.wait(5.0)
+        return self
+
+    def run(self, ready):
+        loop = self.loop = asyncio.new_event_loop()
+        try: loop.run_until_complete(self.open())
+        except OSError as e: logging.warning(f"Telemetry API unavailable: {e}")
+        ready.set()
+        if self.servers: loop.run_forever()
+        for server in self.servers: server.close()
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks: task.cancel()
+        if tasks: loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+
+    async def open(self):
+        if self.socket_path and hasattr(asyncio, "start_unix_server"):
+            try:
+                if stat.S_ISSOCK(os.lstat(self.socket_path).st_mode): os.unlink(self.socket_path) # left by a crashed run
+            except FileNotFoundError: pass
+            self.servers.append(await asyncio.start_unix_server(self.handle_socket, self.socket_path, limit=MAX_REQUEST, backlog=BACKLOG))
+            os.chmod(self.socket_path, SOCKET_MODE)
+        if self.http_port is not None:
+            self.servers.append(await asyncio.start_server(self.handle_http, HTTP_HOST, self.http_port, limit=MAX_REQUEST, backlog=BACKLOG))
+
+    def address(self):
+        # Bound HTTP port (useful with http_port=0)
+        for server in self.servers:
+            for sock in server.sockets:
+                if isinstance(sock.getsockname(), tuple): return sock.getsockname()[1]
+        return None
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running(): self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None: self.thread.join(5.0)
+        self.thread = None
+        if self.socket_path:
+            try: os.unlink(self.socket_path)
+            except OSError: pass
+
+    # --- CONNECTIONS ---
+    def admit(self, writer):
+        if self.clients >= self.max_clients:
+            self.stats["rejected"] += 1
+            writer.close()
+            return False
+        self.clients += 1
+        self.stats["connections"] += 1
+        self.stats["peak_clients"] = max(self.stats["peak_clients"], self.clients)
+        return True
+
+    def release(self, writer):
+        self.clients -= 1
+        writer.close()
+
+    def query(self, name, params):
+        if name == "stats": return encode(self.snapshot_stats())
+        if name == "diagnostics": return encode(get_instruments().dump()) # the engine's own cost
+        return self.cache.query(name, params)
+
+    def answer(self, fn, *args):
+        # -> (ok, encoded result or error text); CPU time is accounted per request
+        t0 = time.thread_time()
+        try: result = (True, fn(*args))
+        except KeyError as e: result = (False, f"unknown query or missing parameter {e}")
+        except (ValueError, TypeError) as e: result = (False, str(e))
+        self.stats["requests"] += 1
+        if not result[0]: self.stats["errors"] += 1
+        self.stats["cpu_s"] += time.thread_time() - t0
+        return result
+
+    async def handle_socket(self, reader, writer):
+        if not self.admit(writer): return
+        try:
+            while True:
+                line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                if not line: break
+                try:
+                    request = json.loads(line)
+                    name = request.pop("q")
+                except (ValueError, KeyError, AttributeError, TypeError):
+                    ok, result = False, "expected a JSON object with a \"q\" field"
+                    self.stats["errors"] += 1
+                else: ok, result = self.answer(self.query, name, request)
+                if ok: writer.write(b'{"ok":true,"result":' + result + b'}\n')
+                else: writer.write(encode({"ok": False, "error": result}) + b"\n")
+                await writer.drain()
+        except (asyncio.TimeoutError, ValueError, ConnectionError): pass # idle, oversized line, client gone
+        finally: self.release(writer)
+
+    async def handle_http(self, reader, writer):
+        if not self.admit(writer): return
+        try:
+            while True:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, version = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    key, _, value = line.partition(":")
+                    if key: headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length: await reader.readexactly(min(length, MAX_REQUEST)) # bodies are ignored
+                status, ctype, body = self.route(method, target)
+                keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+                             f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode() + (b"" if method == "HEAD" else body))
+                await writer.drain()
+                if not keep: break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError): pass
+        finally: self.release(writer)
+
+    def route(self, method, target):
+        if method not in ("GET", "HEAD"): return "405 Method Not Allowed", "text/plain", b"GET only\n"
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        if url.path == "/metrics":
+            ok, result = self.answer(self.cache.metrics_text)
+            return ("200 OK", "text/plain; version=0.0.4", result) if ok else ("500 Internal Server Error", "text/plain", result.encode())
+        if url.path.startswith("/v1/"):
+            ok, result = self.answer(self.query, url.path[4:], params)
+            if ok: return "200 OK", "application/json", result
+            return ("404 Not Found" if result.startswith("unknown query") else "400 Bad Request"), "application/json", encode({"error": result})
+        return "404 Not Found", "text/plain", b"not found\n"
+
+    def snapshot_stats(self):
+        return dict(self.stats, clients=self.clients, cache=dict(self.cache.stats))
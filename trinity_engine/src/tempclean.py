@@ -0,0 +1,283 @@
+import fnmatch
+import json
+import os
+import re
+import stat
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Incremental temp-file cleaner.
+# The tree is walked with os.scandir; every directory's mtime and surviving files are
+# kept in a persisted index, so a repeat run only re-lists directories whose mtime
+# changed and re-checks cached files against the age policy without touching disk.
+# Deletes run on a small thread pool, re-stat each file first (the index may be stale),
+# and share an ops/s token bucket with the scan so a clean cannot worsen a spike.
+# The root is world-writable and we may run elevated: a directory swapped for a symlink or
+# junction after the scan must never lead a delete out of the root. On POSIX the parent is
+# opened component by component with O_NOFOLLOW and the file unlinked relative to it; on
+# Windows every component is checked not to be a reparse point right before the delete.
+DELETE_WORKERS = 4
+BATCH = 256
+INDEX_FILE = "nexus_temp_index.json"
+
+DEFAULT_POLICY = {
+    "min_age_s": 24 * 3600,   # only files untouched this long
+    "min_bytes": 0,           # ignore files smaller than this
+    "max_bytes": None,        # leave files larger than this (installers, downloads)
+    "include": ["*"],         # file name patterns eligible for deletion
+    "exclude": ["*.lock", "*.pid", "*.sock", ".X*-lock"],
+}
+
+DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+SAFE_UNLINK = os.unlink in os.supports_dir_fd and hasattr(os, "O_NOFOLLOW")
+
+def is_link(st):
+    return stat.S_ISLNK(st.st_mode) or bool(getattr(st, "st_file_attributes", 0) & getattr(stat, "FILE_ATTRIBUTE_REPARSE_POINT", 0))
+
+def parts_below(root, path):
+    rel = os.path.relpath(path, root)
+    if rel == os.curdir: return []
+    parts = rel.split(os.sep)
+    if os.pardir in parts or os.path.isabs(rel): raise PermissionError(f"{path} is outside {root}")
+    return parts
+
+def open_dir_nofollow(root, path):
+    # POSIX: fd of `path`, reached from `root` without following any link on the way
+    fd = os.open(root, DIR_FLAGS)
+    try:
+        for part in parts_below(root, path):
+            nxt = os.open(part, DIR_FLAGS | os.O_NOFOLLOW, dir_fd=fd)
+            os.close(fd)
+            fd = nxt
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+def check_dir_nolink(root, path):
+    # Windows: no component between root and path may be a symlink / junction
+    current = root
+    for part in parts_below(root, path):
+        current = os.path.join(current, part)
+        st = os.lstat(current)
+        if is_link(st) or not stat.S_ISDIR(st.st_mode): raise PermissionError(f"{current} is not a plain directory")
+
+class TokenBucket:
+    # Shared ops/s budget; rate None = unlimited
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or (rate or 0)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, n=1, deadline=None):
+        # Blocks until n tokens are available; False if that would pass the deadline
+        if not self.rate: return deadline is None or time.monotonic() < deadline
+        n = min(n, self.capacity) # a huge directory costs at most one full bucket
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return True
+                wait = (n - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline: return False
+            time.sleep(wait)
+
+class TempCleaner:
+    def __init__(self, root=None, policy=None, index_path=INDEX_FILE, workers=DELETE_WORKERS, ops_per_s=5000, max_seconds=None, pause_if=None):
+        self.root = root or tempfile.gettempdir()
+        self.policy = dict(DEFAULT_POLICY, **(policy or {}))
+        # One compiled regex per pattern list instead of an fnmatch call per pattern per file
+        flags = re.IGNORECASE if os.name == 'nt' else 0 # same case rules as fnmatch.fnmatch
+        self.include = re.compile("|".join(fnmatch.translate(pat) for pat in self.policy["include"]) or "(?!)", flags)
+        self.exclude = re.compile("|".join(fnmatch.translate(pat) for pat in self.policy["exclude"]) or "(?!)", flags)
+        self.index_path = index_path # None = in-memory only
+        self.workers = workers
+        self.ops_per_s = ops_per_s
+        self.max_seconds = max_seconds # wall budget per run; the index lets the next run continue
+        self.pause_if = pause_if # optional callable -> True while the machine is too busy
+        self.index = None # dir -> [mtime_ns, {name: [size, mtime]}, [subdirs]]
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.thread = None
+        self.last_report = None
+
+    # --- INDEX ---
+    def load_index(self):
+        if self.index is not None: return self.index
+        self.index = {}
+        if self.index_path and os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f: data = json.load(f)
+                if data.get("root") == self.root: self.index = data.get("dirs", {})
+            except (OSError, ValueError, AttributeError): self.index = {}
+        return self.index
+
+    def save_index(self):
+        if not self.index_path or not self.dirty: return
+        # dumps (C encoder) + one write is several times faster than dump() on a 500k-file index
+        payload = json.dumps({"root": self.root, "dirs": self.index}, separators=(",", ":"))
+        tmp = self.index_path + ".tmp"
+        with open(tmp, 'w') as f: f.write(payload)
+        os.replace(tmp, self.index_path)
+        self.dirty = False
+
+    # --- POLICY ---
+    def eligible(self, name, size, mtime, now):
+        p = self.policy
+        if now - mtime < p["min_age_s"] or size < p["min_bytes"]: return False
+        if p["max_bytes"] is not None and size > p["max_bytes"]: return False
+        return self.include.match(name) is not None and self.exclude.match(name) is None
+
+    # --- SCAN ---
+    def scan(self, report, bucket, deadline):
+        index = self.load_index()
+        now = time.time()
+        visited = set()
+        candidates = []
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            try: mtime_ns = os.stat(path).st_mtime_ns
+            except OSError: continue
+            visited.add(path)
+            cached = index.get(path)
+            if cached is not None and cached[0] == mtime_ns:
+                report["dirs_cached"] += 1
+                files, subdirs = cached[1], cached[2]
+            else:
+                files, subdirs = {}, []
+                try:
+                    with os.scandir(path) as it:
+                        for entry in it:
+                            try:
+                                if entry.is_dir(follow_symlinks=False): subdirs.append(entry.name)
+                                elif entry.is_file(follow_symlinks=False):
+                                    st = entry.stat(follow_symlinks=False)
+                                    files[entry.name] = [st.st_size, st.st_mtime]
+                            except OSError: report["errors"]["scan"] += 1
+                except OSError:
+                    report["errors"]["scan"] += 1
+                    continue
+                index[path] = [mtime_ns, files, subdirs]
+                self.dirty = True
+                report["dirs_scanned"] += 1
+                if not bucket.take(1 + len(files) + len(subdirs), deadline):
+                    report["partial"] = True
+                    break
+            report["files_seen"] += len(files)
+            for name, (size, mtime) in files.items():
+                if self.eligible(name, size, mtime, now): candidates.append((path, name, size))
+            stack.extend(os.path.join(path, d) for d in subdirs)
+        if not report["partial"]:
+            for path in [p for p in index if p not in visited]:
+                del index[path] # removed directories
+                self.dirty = True
+        return candidates
+
+    # --- DELETE ---
+    def delete_batch(self, batch, bucket, deadline, dry_run):
+        # Runs on a pool thread: results and error counts come back, nothing shared is mutated
+        now = time.time()
+        done, errors, partial = [], {"gone": 0, "in_use": 0, "unsafe": 0, "other": 0}, False
+        parents = {} # path -> dir fd (POSIX) / True (Windows, checked) / None (gone) / False (refused: a link)
+        try:
+            for path, name, _ in batch:
+                if not bucket.take(1, deadline):
+                    partial = True
+                    break
+                if self.pause_if is not None:
+                    while self.pause_if() and (deadline is None or time.monotonic() < deadline): time.sleep(0.25)
+                if path not in parents:
+                    try: parents[path] = open_dir_nofollow(self.root, path) if SAFE_UNLINK else check_dir_nolink(self.root, path) or True
+                    except FileNotFoundError: parents[path] = None
+                    except OSError: parents[path] = False
+                parent = parents[path]
+                if parent is None or parent is False:
+                    errors["gone" if parent is None else "unsafe"] += 1
+                    continue
+                try:
+                    # The index may be stale: re-check (without following links) before deleting
+                    if SAFE_UNLINK: st = os.stat(name, dir_fd=parent, follow_symlinks=False)
+                    else: st = os.lstat(os.path.join(path, name))
+                    if is_link(st) or not self.eligible(name, st.st_size, st.st_mtime, now): continue
+                    if not dry_run:
+                        if SAFE_UNLINK: os.unlink(name, dir_fd=parent)
+                        else: os.unlink(os.path.join(path, name))
+                    done.append((path, name, st.st_size))
+                except FileNotFoundError: errors["gone"] += 1
+                except PermissionError: errors["in_use"] += 1 # open handles on Windows
+                except OSError: errors["other"] += 1
+        finally:
+            for fd in parents.values():
+                if SAFE_UNLINK and fd is not None and fd is not False: os.close(fd)
+        return done, errors, partial
+
+    def run(self, dry_run=False):
+        t0 = time.perf_counter()
+        deadline = time.monotonic() + self.max_seconds if self.max_seconds else None
+        bucket = TokenBucket(self.ops_per_s)
+        report = {"root": self.root, "dry_run": dry_run, "partial": False, "dirs_scanned": 0, "dirs_cached": 0,
+                  "files_seen": 0, "candidates": 0, "deleted": 0, "bytes": 0,
+                  "errors": {"scan": 0, "gone": 0, "in_use": 0, "unsafe": 0, "other": 0}}
+        with self.lock:
+            candidates = self.scan(report, bucket, deadline)
+            report["candidates"] = len(candidates)
+            report["scan_s"] = round(time.perf_counter() - t0, 3)
+            batches = [candidates[i:i + BATCH] for i in range(0, len(candidates), BATCH)]
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(lambda b: self.delete_batch(b, bucket, deadline, dry_run), batches))
+            for done, errors, partial in results:
+                for kind, count in errors.items(): report["errors"][kind] += count
+                report["partial"] = report["partial"] or partial
+                for path, name, size in done:
+                    report["deleted"] += 1
+                    report["bytes"] += size
+                    if not dry_run:
+                        # Our own unlinks bump the dir mtime: drop the file and force a re-list next run
+                        entry = self.index.get(path)
+                        if entry is not None:
+                            entry[1].pop(name, None)
+                            entry[0] = None
+                            self.dirty = True
+            try: self.save_index()
+            except OSError: report["errors"]["other"] += 1
+        elapsed = time.perf_counter() - t0
+        report["elapsed_s"] = round(elapsed, 3)
+        report["files_per_s"] = round(report["deleted"] / elapsed) if elapsed else 0
+        report["mb_per_s"] = round(report["bytes"] / 1048576 / elapsed, 2) if elapsed else 0.0
+        self.last_report = report
+        return report
+
+    def start(self, dry_run=False, on_done=None):
+        # Background run (single flight); returns False if a run is already in progress
+        if self.thread is not None and self.thread.is_alive(): return False
+        def worker():
+            report = self.run(dry_run)
+            if on_done:
+                try: on_done(report)
+                except Exception: pass
+        self.thread = threading.Thread(target=worker, daemon=True)
+        self.thread.start()
+        return True
+
+def format_report(report):
+    mode = "DRY RUN: would reclaim" if report["dry_run"] else "Reclaimed"
+    errors = sum(report["errors"].values())
+    return (f"{mode} {report['bytes'] / 1048576:.1f} MB in {report['deleted']} files "
+            f"({report['mb_per_s']} MB/s, {report['files_per_s']} files/s, {report['elapsed_s']}s; "
+            f"{report['dirs_scanned']} dirs listed, {report['dirs_cached']} unchanged"
+            f"{', budget hit' if report['partial'] else ''}{f', {errors} skipped' if errors else ''})")
+
+if __name__ == "__main__":
+    # python tempclean.py [--dry-run] [root]
+    args = [a for a in sys.argv[1:] if a != "--dry-run"]
+    cleaner = TempCleaner(args[0] if args else None)
+    print(format_report(cleaner.run(dry_run="--dry-run" in sys.argv)))
@@ -0,0 +1,50 @@
+import unittest
+from calibration import METRICS, compare
+
+def make_run(**values):
+    # Every metric at 1000 unless given ("disk_write_mb_s" -> disk.write_mb_s)
+    run = {}
+    for section, key, _ in METRICS:
+        run.setdefault(section, {})[key] = values.get(f"{section}_{key}", 1000.0)
+    return run
+
+def record(runs, run):
+    run["compare"] = compare(run, runs)
+    runs.append(run)
+    return next(c for c in run["compare"] if c["metric"] == "disk.write_mb_s")
+
+class CompareTest(unittest.TestCase):
+    def test_lasting_regression_stays_reported(self):
+        runs = []
+        for value in (1000.0, 1150.0): record(runs, make_run(disk_write_mb_s=value))
+        results = [record(runs, make_run(disk_write_mb_s=600.0)) for _ in range(4)]
+        self.assertEqual([r["outside"] for r in results], [True] * 4)
+        self.assertEqual([r["regression"] for r in results], [False, True, True, True]) # the first one could be noise
+        self.assertEqual({r["band"] for r in results}, {0.2}) # the slow runs never widen the band
+        self.assertEqual({r["previous"] for r in results}, {1000.0})
+
+    def test_lasting_regression_after_a_long_baseline(self):
+        runs = []
+        for value in (1000.0, 1150.0, 980.0, 1050.0, 1020.0): record(runs, make_run(disk_write_mb_s=value))
+        results = [record(runs, make_run(disk_write_mb_s=600.0)) for _ in range(5)]
+        self.assertEqual([r["regression"] for r in results], [False, True, True, True, True])
+
+    def test_single_slow_run_is_not_a_regression(self):
+        runs = []
+        for value in (1000.0, 1150.0, 980.0): record(runs, make_run(disk_write_mb_s=value))
+        slow = record(runs, make_run(disk_write_mb_s=600.0))
+        back = record(runs, make_run(disk_write_mb_s=1010.0))
+        self.assertTrue(slow["outside"])
+        self.assertFalse(slow["regression"])
+        self.assertFalse(back["outside"])
+        self.assertEqual(back["previous"], 1000.0) # the outlier is not part of the baseline
+
+    def test_noisy_metric_gets_a_wider_band(self):
+        runs = []
+        for value in (1000.0, 1400.0, 700.0, 1300.0, 800.0): record(runs, make_run(disk_write_mb_s=value))
+        result = record(runs, make_run(disk_write_mb_s=750.0))
+        self.assertGreater(result["band"], 0.2)
+        self.assertFalse(result["outside"])
+
+if __name__ == "__main__":
+    unittest.main()
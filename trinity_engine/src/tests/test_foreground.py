@@ -0,0 +1,62 @@
+import unittest
+from foreground import FakeForegroundBackend, ForegroundResolver
+
+class Entry:
+    def __init__(self, pid, create_time, name):
+        self.pid, self.create_time, self.name = pid, create_time, name
+
+class FakeTable:
+    # The ProcessTable surface the resolver uses
+    def __init__(self, *entries):
+        self.by_pid = {e.pid: e for e in entries}
+
+    def lookup(self, pid):
+        return self.by_pid.get(pid)
+
+class ResolverTest(unittest.TestCase):
+    def test_resolves_the_foreground_process(self):
+        backend = FakeForegroundBackend({100: (1.0, "game.exe")}, pid=100)
+        self.assertEqual(ForegroundResolver(backend).resolve_pid(), (100, "game.exe"))
+
+    def test_repeated_lookup_fetches_the_name_once(self):
+        backend = FakeForegroundBackend({100: (1.0, "game.exe")}, pid=100)
+        resolver = ForegroundResolver(backend)
+        for _ in range(5): self.assertEqual(resolver.resolve(), "game.exe")
+        self.assertEqual(backend.lookups, 1)
+        self.assertEqual(resolver.stats, {"lookups": 5, "hits": 4, "misses": 1})
+
+    def test_switching_apps(self):
+        backend = FakeForegroundBackend({100: (1.0, "game.exe"), 200: (2.0, "editor.exe")}, pid=100)
+        resolver = ForegroundResolver(backend)
+        self.assertEqual(resolver.resolve(), "game.exe")
+        backend.set_foreground(200)
+        self.assertEqual(resolver.resolve(), "editor.exe")
+        backend.set_foreground(100)
+        self.assertEqual(resolver.resolve(), "game.exe")
+        self.assertEqual(backend.lookups, 2)
+
+    def test_reused_pid_is_not_served_from_the_cache(self):
+        backend = FakeForegroundBackend({100: (1.0, "game.exe")}, pid=100)
+        resolver = ForegroundResolver(backend)
+        self.assertEqual(resolver.resolve(), "game.exe")
+        backend.set_foreground(100, "installer.exe", create_time=9.0) # game exited, pid handed out again
+        self.assertEqual(resolver.resolve(), "installer.exe")
+
+    def test_proctable_entry_is_trusted_only_for_the_same_process(self):
+        backend = FakeForegroundBackend({100: (1.0, "game.exe")}, pid=100)
+        resolver = ForegroundResolver(backend, FakeTable(Entry(100, 1.0, "game.exe")))
+        self.assertEqual(resolver.resolve(), "game.exe")
+        self.assertEqual(backend.lookups, 0) # served by the table
+        backend.set_foreground(100, "installer.exe", create_time=9.0) # the table still has the old process
+        self.assertEqual(resolver.resolve(), "installer.exe")
+        self.assertEqual(backend.lookups, 1)
+
+    def test_no_foreground_or_gone(self):
+        backend = FakeForegroundBackend(pid=None)
+        resolver = ForegroundResolver(backend)
+        self.assertEqual(resolver.resolve_pid(), (None, None))
+        backend.set_foreground(300) # unknown pid: exited before we looked
+        self.assertEqual(resolver.resolve_pid(), (300, None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from policy import Policy, CompiledPolicy, PolicyError
+
+class Entry:
+    def __init__(self, pid, name, cpu=0.0, rss=0, create_time=0.0):
+        self.pid, self.name, self.cpu, self.rss, self.create_time = pid, name, cpu, rss, create_time
+
+class FakeTable:
+    # ProcessTable surface: RSS only appears once refresh_rss() ran, as in the real table
+    def __init__(self, entries, rss):
+        self.entries = entries
+        self.rss = rss # pid -> bytes
+        self.rss_refreshes = 0
+
+    def refresh_rss(self):
+        self.rss_refreshes += 1
+        for e in self.entries: e.rss = self.rss.get(e.pid, 0)
+
+    def values(self):
+        return list(self.entries)
+
+def view(pid, name, cpu=0.0, rss=0, age=100.0, foreground=False):
+    return (pid, name, cpu, rss, age, foreground)
+
+class CompiledPolicyTest(unittest.TestCase):
+    def matched(self, rules, procs, ctx=None):
+        fired, matches = CompiledPolicy({"rules": rules}).evaluate(dict(ctx or {}), procs)
+        return [r.name for r in fired], sorted((r.name, p[0]) for r, p in matches)
+
+    def test_system_rule_with_limit_reference(self):
+        rules = [{"name": "ram", "when": [["ram", ">", "$ram_limit_soft"]], "then": "flux_capacitor"}]
+        self.assertEqual(self.matched(rules, (), {"ram": 90, "ram_limit_soft": 85})[0], ["ram"])
+        self.assertEqual(self.matched(rules, (), {"ram": 80, "ram_limit_soft": 85})[0], [])
+
+    def test_name_index_is_case_insensitive(self):
+        rules = [{"name": "chrome", "when": [["proc.name", "==", "Chrome.exe"]], "then": "notify"}]
+        procs = [view(1, "chrome.exe"), view(2, "code.exe")]
+        self.assertEqual(self.matched(rules, procs)[1], [("chrome", 1)])
+
+    def test_threshold_index_with_residual_condition(self):
+        rules = [{"name": "hog", "when": [["proc.cpu", ">", 40], ["proc.foreground", "==", False]], "then": "notify"}]
+        procs = [view(1, "a", cpu=50), view(2, "b", cpu=50, foreground=True), view(3, "c", cpu=40)]
+        self.assertEqual(self.matched(rules, procs)[1], [("hog", 1)])
+
+    def test_gate_and_any_not(self):
+        rules = [{"name": "r", "when": {"all": [["cpu", ">", 90], {"any": [["proc.name", "startswith", "game"], {"not": ["proc.rss", "<", 100]}]}]},
+                  "then": "notify"}]
+        procs = [view(1, "game.exe", rss=1), view(2, "x", rss=500), view(3, "y", rss=1)]
+        self.assertEqual(self.matched(rules, procs, {"cpu": 95})[1], [("r", 1), ("r", 2)])
+        self.assertEqual(self.matched(rules, procs, {"cpu": 50})[1], [])
+
+    def test_wrongly_typed_specs_are_rejected(self):
+        for spec in ({"rules": {}}, {"skip": "chrome.exe"}, {"limits": {"ram_limit_soft": "high"}},
+                     {"rules": [{"name": "x", "when": [["proc.name", "in", "chrome.exe"]]}]},
+                     {"rules": [{"name": 3, "when": []}]}):
+            with self.assertRaises((PolicyError, TypeError, ValueError)): CompiledPolicy(spec)
+
+class PolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="nexus_policy_test_")
+        self.path = os.path.join(self.tmp, "policy.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, spec):
+        with open(self.path, 'w') as f: f.write(spec if isinstance(spec, str) else json.dumps(spec))
+        os.utime(self.path, ns=(os.stat(self.path).st_mtime_ns + 10**9,) * 2) # a new signature even within one mtime tick
+
+    def test_broken_edit_keeps_the_previous_rules(self):
+        self.write({"limits": {"ram_limit_soft": 70}})
+        policy = Policy(self.path)
+        self.assertEqual(policy.limits["ram_limit_soft"], 70)
+        self.write('{"limits": {"ram_limit_soft": ')
+        self.assertFalse(policy.reload())
+        self.assertEqual(policy.limits["ram_limit_soft"], 70)
+        self.assertIsNotNone(policy.error)
+        self.write({"limits": {"ram_limit_soft": 75}})
+        self.assertTrue(policy.reload())
+        self.assertEqual(policy.limits["ram_limit_soft"], 75)
+        self.assertIsNone(policy.error)
+
+    def test_process_cooldown(self):
+        self.write({"rules": [{"name": "hog", "when": [["proc.cpu", ">", 40]], "then": "notify", "cooldown": 30}]})
+        policy = Policy(self.path)
+        _, matches = policy.evaluate({}, [view(1, "a", cpu=50)])
+        self.assertEqual(len(policy.fresh(matches, 100.0)), 1)
+        self.assertEqual(len(policy.fresh(matches, 110.0)), 0)
+        self.assertEqual(len(policy.fresh(matches, 131.0)), 1)
+
+    def test_rss_rules_see_current_rss(self):
+        self.write({"rules": [{"name": "fat", "when": [["proc.rss", ">", 1 << 30]], "then": "trim"}]})
+        policy = Policy(self.path)
+        table = FakeTable([Entry(1, "editor.exe"), Entry(2, "game.exe")], {1: 100 << 20, 2: 3 << 30})
+        _, matches = policy.evaluate({}, policy.process_views(table, 1000.0))
+        self.assertEqual([(r.name, p[0]) for r, p in matches], [("fat", 2)])
+        self.assertEqual(table.rss_refreshes, 1)
+        table.rss = {1: 2 << 30, 2: 100 << 20} # usage moved: no stale values
+        _, matches = policy.evaluate({}, policy.process_views(table, 1002.0))
+        self.assertEqual([(r.name, p[0]) for r, p in matches], [("fat", 1)])
+
+    def test_rss_is_not_fetched_when_no_rule_reads_it(self):
+        self.write({"rules": [{"name": "hog", "when": [["proc.cpu", ">", 40]], "then": "notify"}]})
+        policy = Policy(self.path)
+        table = FakeTable([Entry(1, "a", cpu=50)], {1: 1})
+        views = policy.process_views(table, 1000.0, foreground_pid=1)
+        self.assertEqual(table.rss_refreshes, 0)
+        self.assertEqual(views, [(1, "a", 50, 0, 1000.0, True)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+from benchmarks import write_synthetic_trace
+from replay import ReplayProcessTable, replay, compare
+
+# Replaying one trace twice has to give the same decisions, actions and spikes: the
+# simulated clock, not wall time or thread timing, decides what runs when.
+EFFECTS = {"flux_capacitor": ("ram", -10.0, 60.0)}
+
+class ReplayTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp(prefix="nexus_replay_test_")
+        cls.path = os.path.join(cls.tmp, "synthetic.jsonl.gz")
+        write_synthetic_trace(cls.path, hours=0.5) # three RAM ramps, three CPU bursts
+        cls.base = replay(cls.path, effects=EFFECTS)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def test_trace_drives_the_engine(self):
+        self.assertEqual(self.base["snapshots"], 1800)
+        self.assertEqual(self.base["ticks"], 900)
+        self.assertTrue(self.base["decisions"])
+        self.assertIn("flux_capacitor", [name for _, name in self.base["actions"]])
+
+    def test_replay_is_deterministic(self):
+        again = replay(self.path, effects=EFFECTS)
+        for key in ("decisions", "actions", "spikes", "snapshots", "ticks"):
+            self.assertEqual(again[key], self.base[key], key)
+        self.assertIsNone(compare(self.base, again)["first_divergence"])
+
+    def test_simulated_time_is_reported_not_wall_time(self):
+        self.assertAlmostEqual(self.base["sim_s"], 1799.0)
+        for ts, _, _ in self.base["decisions"]:
+            self.assertGreaterEqual(ts, 1.7e9)
+
+    def test_a_policy_change_shows_up_in_the_comparison(self):
+        relaxed = replay(self.path, lambda nexus: setattr(nexus, "ram_limit_soft", 99), EFFECTS)
+        diff = compare(self.base, relaxed)
+        self.assertIsNotNone(diff["first_divergence"])
+        self.assertLess(diff["actions"]["flux_capacitor"][1], diff["actions"]["flux_capacitor"][0])
+
+class ReplayProcessTableTest(unittest.TestCase):
+    def test_usage_sums_the_processes_of_one_app(self):
+        table = ReplayProcessTable()
+        table.apply({"new": [[1, 1.0, "chrome"], [2, 2.0, "chrome"], [3, 3.0, "code"]], "gone": [],
+                     "cpu": [[1, 1.0, 10.0], [2, 2.0, 5.0], [3, 3.0, 40.0]],
+                     "rss": [[1, 1.0, 300], [2, 2.0, 200], [3, 3.0, 1000]]})
+        self.assertEqual(table.usage("chrome"), (15.0, 500))
+        self.assertIsNone(table.usage("firefox"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+from signals import SignalSources
+
+# classify() on fixture /proc and /sys trees: two samples one second apart, counters moved
+# by hand, so every rate below is exact.
+PSI = "some avg10=0.00 avg60=0.00 avg300=0.00 total={some}\nfull avg10=0.00 avg60=0.00 avg300=0.00 total={full}\n"
+DISKSTATS = "   8       0 sda {reads} 0 {sectors_r} 0 {writes} 0 {sectors_w} 0 0 {ticks} 0\n"
+NETDEV = ("Inter-|   Receive                                                |  Transmit\n"
+          " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed\n"
+          "  eth0: {rx} 0 0 0 0 0 0 0 {tx} 0 0 0 0 0 0 0\n")
+
+class FixtureTree:
+    def __init__(self):
+        self.root = tempfile.mkdtemp(prefix="nexus_signals_")
+        self.proc = os.path.join(self.root, "proc")
+        self.sys = os.path.join(self.root, "sys")
+        for d in ("pressure", "net"): os.makedirs(os.path.join(self.proc, d))
+        os.makedirs(os.path.join(self.sys, "block", "sda"))
+        os.makedirs(os.path.join(self.sys, "class", "net", "eth0"))
+        self.write(os.path.join(self.sys, "class", "net", "eth0", "speed"), "1000\n") # 125 MB/s
+        self.now = 100.0
+        self.set()
+
+    def write(self, path, text):
+        # Rewritten in place: SignalSources keeps its fds open and re-reads from offset 0
+        with open(path, 'w') as f: f.write(text)
+
+    def set(self, cpu_some=0, mem_some=0, mem_full=0, io_full=0, swapped=0, disk_ticks=0, net_bytes=0):
+        self.write(os.path.join(self.proc, "pressure", "cpu"), PSI.format(some=cpu_some, full=0))
+        self.write(os.path.join(self.proc, "pressure", "memory"), PSI.format(some=mem_some, full=mem_full))
+        self.write(os.path.join(self.proc, "pressure", "io"), PSI.format(some=io_full, full=io_full))
+        self.write(os.path.join(self.proc, "vmstat"), f"nr_free_pages 1000\npswpin {swapped}\npswpout 0\n")
+        self.write(os.path.join(self.proc, "diskstats"), DISKSTATS.format(reads=0, sectors_r=0, writes=0, sectors_w=0, ticks=disk_ticks))
+        self.write(os.path.join(self.proc, "net", "dev"), NETDEV.format(rx=net_bytes, tx=0))
+
+    def clock(self):
+        return self.now
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+class ClassifyTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = FixtureTree()
+        self.sources = SignalSources(self.tree.proc, self.tree.sys, clock=self.tree.clock)
+        self.sources.sample() # baseline
+
+    def tearDown(self):
+        self.sources.close()
+        self.tree.close()
+
+    def step(self, **counters):
+        # One second later, with the given counters
+        self.tree.now += 1.0
+        self.tree.set(**counters)
+        return self.sources.sample()
+
+    def test_fixture_sources_are_found(self):
+        self.assertEqual(self.sources.available(), {"psi": True, "vmstat": True, "diskstats": True, "net": True})
+
+    def test_first_sample_has_no_rates(self):
+        self.assertIsNone(self.sources.latest["psi_cpu_some"])
+        self.assertIsNone(self.sources.classify(10, 20, 85, 85))
+
+    def test_quiet_machine(self):
+        signals = self.step()
+        self.assertEqual(signals["disk_busy"], 0.0)
+        self.assertIsNone(self.sources.classify(10, 20, 85, 85))
+
+    def test_rates_from_deltas(self):
+        signals = self.step(cpu_some=250000, disk_ticks=300, swapped=100, net_bytes=12500000)
+        self.assertAlmostEqual(signals["psi_cpu_some"], 25.0)
+        self.assertAlmostEqual(signals["disk_busy"], 30.0)
+        self.assertAlmostEqual(signals["swap_pages_s"], 100.0)
+        self.assertAlmostEqual(signals["net_util"], 10.0)
+
+    def test_cpu_stall_below_the_cpu_limit(self):
+        self.step(cpu_some=500000) # 50% of the second with a runnable task waiting
+        self.assertEqual(self.sources.classify(40, 20, 85, 85), "CPU")
+
+    def test_memory_stall_below_the_ram_limit(self):
+        self.step(mem_some=100000, mem_full=100000)
+        self.assertEqual(self.sources.classify(10, 50, 85, 85), "RAM")
+
+    def test_busy_disk_is_io(self):
+        self.step(disk_ticks=950)
+        self.assertEqual(self.sources.classify(95, 20, 85, 85), "IO") # high CPU% is a symptom here
+
+    def test_swapping_wins_over_ram_and_io(self):
+        self.step(swapped=1000, mem_some=200000, disk_ticks=990)
+        self.assertEqual(self.sources.classify(10, 90, 85, 85), "SWAP")
+
+    def test_saturated_link_is_net(self):
+        self.step(net_bytes=120000000)
+        self.assertEqual(self.sources.classify(10, 20, 85, 85), "NET")
+
+    def test_missing_sources_fall_back_to_limits(self):
+        empty = tempfile.mkdtemp(prefix="nexus_signals_")
+        try:
+            sources = SignalSources(empty, empty, clock=self.tree.clock)
+            sources.sample()
+            self.tree.now += 1.0
+            sources.sample()
+            self.assertFalse(any(sources.available().values()))
+            self.assertEqual(sources.classify(90, 20, 85, 85), "CPU")
+            self.assertEqual(sources.classify(10, 90, 85, 85), "RAM")
+            self.assertIsNone(sources.classify(10, 20, 85, 85))
+            sources.close()
+        finally: shutil.rmtree(empty, ignore_errors=True)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from viewmodel import ViewModel, FakeBackend, FakeWidget
+
+class ViewModelTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = FakeBackend()
+        self.view = ViewModel(self.backend, scrollback=5)
+        self.label = FakeWidget("label")
+        self.bar = FakeWidget("bar")
+        self.view.bind("cpu.text", self.label)
+        self.view.bind("cpu.color", self.label, "text_color")
+        self.view.bind("cpu.bar", self.bar, "progress")
+
+    def test_changed_properties_go_out_in_one_configure_per_widget(self):
+        self.view.update({"cpu.text": "40%", "cpu.color": "white", "cpu.bar": 0.4})
+        self.assertEqual(self.view.render(), 2)
+        self.assertEqual(self.label.props, {"text": "40%", "text_color": "white"})
+        self.assertEqual(self.bar.props, {"progress": 0.4})
+
+    def test_unchanged_values_do_no_widget_work(self):
+        self.view.update({"cpu.text": "40%", "cpu.color": "white"})
+        self.view.render()
+        ops = self.backend.ops
+        self.view.update({"cpu.text": "40%", "cpu.color": "white"})
+        self.assertEqual(self.view.render(), 0)
+        self.assertEqual(self.backend.ops, ops)
+        self.assertEqual(self.view.stats["idle_frames"], 1)
+
+    def test_only_the_changed_property_is_sent(self):
+        self.view.update({"cpu.text": "40%", "cpu.color": "white"})
+        self.view.render()
+        self.view.update({"cpu.text": "41%", "cpu.color": "white"})
+        self.view.render()
+        self.assertEqual(self.backend.calls[-1], ("configure", "label", {"text": "41%"}))
+
+    def test_many_updates_between_frames_coalesce(self):
+        for i in range(100): self.view.set("cpu.text", f"{i}%")
+        self.assertEqual(self.view.render(), 1)
+        self.assertEqual(self.label.props["text"], "99%")
+
+    def test_value_back_to_what_is_on_screen_is_skipped(self):
+        self.view.set("cpu.text", "40%")
+        self.view.render()
+        self.view.set("cpu.text", "41%")
+        self.view.set("cpu.text", "40%") # changed and changed back within one frame
+        self.assertEqual(self.view.render(), 0)
+        self.assertEqual(self.view.stats["skipped"], 1)
+
+    def test_late_binding_gets_the_current_value(self):
+        self.view.set("ram.text", "70%")
+        self.view.render()
+        ram = FakeWidget("ram")
+        self.view.bind("ram.text", ram)
+        self.view.render()
+        self.assertEqual(ram.props, {"text": "70%"})
+
+    def test_console_lines_batch_into_one_insert_and_trim(self):
+        console = FakeWidget("console")
+        self.view.bind_console(console)
+        for i in range(3): self.view.log(f"line {i}")
+        self.view.render()
+        self.assertEqual(self.backend.calls[-1], ("append", "console", 3))
+        for i in range(3, 12): self.view.log(f"line {i}")
+        self.view.render()
+        self.assertEqual(console.lines, [f"line {i}" for i in range(7, 12)]) # scrollback 5
+        self.assertEqual(self.view.stats["inserts"], 2)
+
+    def test_lines_wait_for_a_console(self):
+        self.view.log("early")
+        self.assertEqual(self.view.render(), 0)
+        console = FakeWidget("console")
+        self.view.bind_console(console)
+        self.view.render()
+        self.assertEqual(console.lines, ["early"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import threading
+import time
+from array import array
+
+# Tier layout: (resolution seconds, slots). Memory is fixed at construction time.
+SYSTEM_TIERS = [(1, 3600), (10, 8640), (60, 10080)] # 1h @1s, 24h @10s, 7d @1min
+APP_TIERS = [(1, 600), (10, 720), (60, 1440)]       # 10m @1s, 2h @10s, 24h @1min
+MAX_TRACKED_APPS = 64
+
+class RingBuffer:
+    # Parallel fixed-size arrays: timestamp, bucket mean, bucket peak
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = array('d', bytes(8 * capacity))
+        self.avg = array('d', bytes(8 * capacity))
+        self.peak = array('d', bytes(8 * capacity))
+        self.head = 0 # next write slot
+        self.count = 0
+
+    def append(self, ts, avg, peak):
+        i = self.head
+        self.ts[i] = ts
+        self.avg[i] = avg
+        self.peak[i] = peak
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity: self.count += 1
+
+    def slot(self, logical):
+        # logical 0 = oldest sample
+        return (self.head - self.count + logical) % self.capacity
+
+    def first_at_or_after(self, since):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts[self.slot(mid)] < since: lo = mid + 1
+            else: hi = mid
+        return lo
+
+    def window(self, since, column="avg"):
+        # Samples newer than `since`, copied out of the ring in at most two slices
+        data = self.avg if column == "avg" else self.peak
+        start = self.first_at_or_after(since)
+        n = self.count - start
+        if n <= 0: return array('d')
+        a = self.slot(start)
+        if a + n <= self.capacity: return data[a:a + n]
+        return data[a:] + data[:(a + n) % self.capacity]
+
+    def last(self):
+        if not self.count: return None
+        i = (self.head - 1) % self.capacity
+        return self.ts[i], self.avg[i], self.peak[i]
+
+    def nbytes(self):
+        return 3 * self.capacity * self.ts.itemsize
+
+class MultiResSeries:
+    def __init__(self, tiers=SYSTEM_TIERS):
+        self.tiers = [(res, RingBuffer(slots)) for res, slots in tiers]
+        # Per coarse tier roll-up accumulator: [bucket id, sum, n, peak]
+        self.pending = [None for _ in tiers]
+
+    def append(self, ts, value):
+        self.tiers[0][1].append(ts, value, value)
+        self.roll_up(1, ts, value, value)
+
+    def roll_up(self, level, ts, avg, peak):
+        if level >= len(self.tiers): return
+        res, buf = self.tiers[level]
+        bucket = int(ts // res)
+        acc = self.pending[level]
+        if acc is not None and acc[0] != bucket:
+            # Bucket closed: publish it and cascade into the next tier
+            closed_ts = (acc[0] + 1) * res
+            mean = acc[1] / acc[2]
+            buf.append(closed_ts, mean, acc[3])
+            self.roll_up(level + 1, closed_ts, mean, acc[3])
+            acc = None
+        if acc is None:
+            self.pending[level] = [bucket, avg, 1, peak]
+        else:
+            acc[1] += avg
+            acc[2] += 1
+            if peak > acc[3]: acc[3] = peak
+
+    def pick_tier(self, since):
+        # Finest tier that still holds data back to `since` (sample rate may be adaptive)
+        for res, buf in self.tiers:
+            if buf.count < buf.capacity or buf.ts[buf.slot(0)] <= since: return buf
+        return self.tiers[-1][1]
+
+    def window(self, seconds, now=None, column="avg"):
+        now = time.time() if now is None else now
+        return self.pick_tier(now - seconds).window(now - seconds, column)
+
+    def latest(self):
+        last = self.tiers[0][1].last()
+        return last[1] if last else None
+
+    def nbytes(self):
+        return sum(buf.nbytes() for _, buf in self.tiers)
+
+# --- WINDOW QUERIES ---
+def series_mean(values):
+    return sum(values) / len(values) if len(values) else None
+
+def series_max(values):
+    return max(values) if len(values) else None
+
+def series_percentile(values, q):
+    if not len(values): return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * (q / 100.0)
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+class TimeSeriesStore:
+    def __init__(self, max_apps=MAX_TRACKED_APPS, clock=time.time):
+        self.lock = threading.Lock()
+        self.clock = clock # "now" for window queries (replay passes its simulated clock)
+        self.series = {"cpu": MultiResSeries(SYSTEM_TIERS), "ram": MultiResSeries(SYSTEM_TIERS)}
+        self.apps = {} # app name -> {"cpu": series, "ram": series, "seen": ts}
+        self.max_apps = max_apps
+
+    def record_snapshot(self, snap):
+        # Sampler subscriber: one O(1) append per metric per tick
+        with self.lock:
+            self.series["cpu"].append(snap.ts, snap.cpu)
+            self.series["ram"].append(snap.ts, snap.ram)
+
+    def record_app(self, app, ts, cpu, ram):
+        with self.lock:
+            entry = self.apps.get(app)
+            if entry is None:
+                if len(self.apps) >= self.max_apps:
+                    # Keep memory bounded: evict the least recently seen app
+                    stale = min(self.apps, key=lambda name: self.apps[name]["seen"])
+                    del self.apps[stale]
+                entry = self.apps[app] = {"cpu": MultiResSeries(APP_TIERS), "ram": MultiResSeries(APP_TIERS), "seen": ts}
+            entry["cpu"].append(ts, cpu)
+            entry["ram"].append(ts, ram)
+            entry["seen"] = ts
+
+    def get_series(self, metric, app=None):
+        if app is None: return self.series.get(metric)
+        entry = self.apps.get(app)
+        return entry[metric] if entry else None
+
+    def window(self, metric, seconds, app=None, now=None, column="avg"):
+        with self.lock:
+            s = self.get_series(metric, app)
+            return s.window(seconds, self.clock() if now is None else now, column) if s else array('d')
+
+    def mean(self, metric, seconds, app=None, now=None):
+        return series_mean(self.window(metric, seconds, app, now))
+
+    def max(self, metric, seconds, app=None, now=None):
+        return series_max(self.window(metric, seconds, app, now, column="peak"))
+
+    def percentile(self, metric, seconds, q, app=None, now=None):
+        return series_percentile(self.window(metric, seconds, app, now), q)
+
+    def time_above(self, metric, limit, app=None):
+        # How long (seconds) the 1s tier has been continuously above `limit`
+        with self.lock:
+            s = self.get_series(metric, app)
+            if s is None: return 0.0
+            buf = s.tiers[0][1]
+            if not buf.count: return 0.0
+            newest = buf.slot(buf.count - 1)
+            if buf.avg[newest] <= limit: return 0.0
+            start = buf.ts[newest]
+            for logical in range(buf.count - 2, -1, -1):
+                i = buf.slot(logical)
+                if buf.avg[i] <= limit: break
+                start = buf.ts[i]
+            return buf.ts[newest] - start
+
+    def nbytes(self):
+        with self.lock:
+            total = sum(s.nbytes() for s in self.series.values())
+            total += sum(e["cpu"].nbytes() + e["ram"].nbytes() for e in self.apps.values())
+            return total
@@ -6,17 +6,34 @@ import ctypes
 import subprocess
 import threading
 import time
-import humanize # type: ignore
 import sys
 import shutil
 import json
 from datetime import datetime
-from PIL import Image # type: ignore
+from telemetry import get_sampler
+from journal import MemoryJournal, apply_trinity_lag
+from proctable import ProcessTable
+from foreground import ForegroundResolver
+from scheduler import get_scheduler
+from sentinel import ActionExecutor
+from oracle import Oracle
+from priority import PriorityManager, LEVEL_HIGH, LEVEL_REALTIME
+from tempclean import TempCleaner, format_report
+from signals import SignalSources
+from viewmodel import ViewModel
+from diagnostics import get_instruments, measured, format_panel
+from hardware import cached_topology, identity, scan_manifest, save_manifest
+from policy import Policy, app_fields
+from launch import LaunchProfiles, derive_profile
 
 # Constants for Windows API
 CREATE_NO_WINDOW = 0x08000000
-HIGH_PRIORITY_CLASS = 0x00000080
-REALTIME_PRIORITY_CLASS = 0x00000100
+
+# Periodic jobs (owned by the shared scheduler)
+NEXUS_INTERVAL = 2.0
+BOOST_INTERVAL = 5.0
+LAUNCH_NEXUS_INTERVAL = 1.0 # while a profiled app runs
+LAUNCH_SAMPLE_INTERVAL = 0.5
 
 # Configuration
 ctk.set_appearance_mode("Dark")
@@ -42,9 +59,45 @@ class DualEngineApp(ctk.CTk): # type: ignore
         self.boost_active_trinity = False
         self.nexus_ai_active = False
         
+        # Shared telemetry (one snapshot per tick for every loop)
+        self.scheduler = get_scheduler()
+        self.sampler = get_sampler()
+        self.proctable = ProcessTable()
+        self.foreground = ForegroundResolver(proctable=self.proctable)
+        self.signals = SignalSources() # PSI / disk / swap / NIC: IO, SWAP and NET bottlenecks
+        self.priority = PriorityManager(proctable=self.proctable, topology=cached_topology()) # remembers originals, rolls back on disengage
+        if self.priority.topology is None:
+            # No manifest on disk yet (first run / new machine): scan off the Tk thread, split by topology once it lands
+            threading.Thread(target=self.scan_topology, name="trinity-manifest", daemon=True).start()
+        self.instruments = get_instruments().attach(self.scheduler, self.sampler) # own cost (DIAGNOSTICS tab)
+
+        # Limits, skip-list and "conditions -> actions" rules from nexus_policy.json (hot-reloaded)
+        self.policy = Policy(on_reload=self.on_policy_reload, on_error=lambda message: self.log(f"[POLICY] {message} - keeping previous rules."))
+        self.policy.watch(self.scheduler)
+
+        # Short-horizon forecasting for the prediction phase
+        self.oracle = Oracle()
+        self.sampler.subscribe(self.oracle.observe_snapshot)
+
+        # Autonomous corrections with cooldowns and measured effect (no action storms)
+        self.actions = ActionExecutor(self.sampler, self.scheduler)
+        self.actions.register("flux_capacitor", self.nexus_flux_capacitor, metric="ram", enter=lambda: self.limits["ram_limit_soft"], exit_margin=5, cooldown=30.0)
+        # Temp cleaning runs in the background under an I/O budget (it is triggered at CPU > cpu_critical)
+        self.temp_cleaner = TempCleaner(ops_per_s=2000, max_seconds=20, pause_if=lambda: self.sampler.snapshot().cpu > 97)
+        self.actions.register("temp_clean", self.clean_temp_files, metric="cpu", enter=lambda: self.limits["cpu_critical"], exit_margin=10, cooldown=300.0)
+
         # AI Memory
         self.lag_history_file = "nexus_memory.json"
+        self.ai_journal = MemoryJournal(self.lag_history_file, apply_trinity_lag)
         self.process_stats = self.load_ai_memory()
+        self.lag_episodes = {} # app -> ts its current lag episode started
+
+        # Learned per-app profiles, applied the moment a known heavy app starts (reverted when it exits)
+        self.launches = LaunchProfiles(self.proctable, self.scheduler, self.launch_profile, priority=self.priority,
+                                       trim=self.clean_ram_safe, tighten=self.tighten_sampling, notify=lambda message: self.log(f"[NEXUS] {message}"))
+
+        # Widgets are only touched by the view model on the Tk thread (workers publish into it)
+        self.view = ViewModel()
 
         # Layout: Grid
         self.grid_columnconfigure(0, weight=1)
@@ -58,6 +111,7 @@ class DualEngineApp(ctk.CTk): # type: ignore
         self.tab_apex = self.engine_tabs.add("APEX (STABLE)")
         self.tab_trinity = self.engine_tabs.add("TRINITY (GOD MODE)")
         self.tab_nexus = self.engine_tabs.add("NEXUS AI (ADAPTIVE)")
+        self.tab_diag = self.engine_tabs.add("DIAGNOSTICS")
         
         # Configure Tab Colors
         self.engine_tabs._segmented_button.configure(selected_color=self.apex_color, selected_hover_color=self.apex_color, unselected_color="#333333", text_color="white")
@@ -66,30 +120,47 @@ class DualEngineApp(ctk.CTk): # type: ignore
         self.build_apex_ui()
         self.build_trinity_ui()
         self.build_nexus_ui()
+        self.build_diagnostics_ui()
 
         # Console Log (Shared at bottom)
         self.console = ctk.CTkTextbox(self, height=120, fg_color="#000000", text_color="#00ff00", font=("Consolas", 12))
         self.console.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 20))
+        self.view.bind_console(self.console)
+        for key, widgets in (("cpu", [self.apex_cpu, self.trinity_cpu]), ("ram", [self.apex_ram, self.trinity_ram])):
+            for widget in widgets: self.view.bind(key, widget)
+        self.view.bind("nexus.info", self.nexus_info_label)
+        self.view.bind("diag.text", self.diag_label)
         self.log("System Online. NEXUS AI initialized.")
+        if self.policy.error: self.log(f"[POLICY] {self.policy.error} - using the built-in rules.")
 
         # Bind tab change to color update
         self.engine_tabs._segmented_button.configure(command=self.on_tab_change)
 
         # Start monitoring
+        self.view.start(self)
         self.update_metrics()
 
+    def scan_topology(self):
+        try:
+            manifest = scan_manifest()
+            save_manifest(manifest, identity())
+        except Exception: return
+        self.priority.topology = manifest.get("topology")
+
+    def on_policy_reload(self, policy):
+        self.limits = policy.limits
+        self.priority.skip_names = policy.skip
+        if hasattr(self, "view"): self.log(f"[POLICY] {len(policy.compiled.rules)} rules loaded (CPU {self.limits['cpu_limit_soft']}% / RAM {self.limits['ram_limit_soft']}%).")
+
     def load_ai_memory(self):
-        if os.path.exists(self.lag_history_file):
-            try:
-                with open(self.lag_history_file, 'r') as f:
-                    return json.load(f)
-            except: return {}
-        return {}
+        try:
+            return self.ai_journal.load()
+        except: return {}
 
+    @measured("save_memory")
     def save_ai_memory(self):
         try:
-            with open(self.lag_history_file, 'w') as f:
-                json.dump(self.process_stats, f)
+            self.ai_journal.flush()
         except: pass
 
     def on_tab_change(self, value):
@@ -103,10 +174,13 @@ class DualEngineApp(ctk.CTk): # type: ignore
             self.engine_tabs._segmented_button.configure(selected_color=self.trinity_color)
             self.console.configure(text_color=self.trinity_color)
             self.log("Switched to TRINITY Core.")
-        else:
+        elif "NEXUS" in selected_tab:
             self.engine_tabs._segmented_button.configure(selected_color=self.nexus_color)
             self.console.configure(text_color=self.nexus_color)
             self.log("Switched to NEXUS AI Core.")
+        else:
+            self.engine_tabs._segmented_button.configure(selected_color="#666666")
+            self.view.set("diag.text", format_panel(self.instruments.dump()))
 
     def build_apex_ui(self):
         self.tab_apex.grid_columnconfigure((0,1), weight=1)
@@ -161,6 +235,21 @@ class DualEngineApp(ctk.CTk): # type: ignore
         self.nexus_btn = ctk.CTkButton(self.tab_nexus, text="ACTIVATE NEXUS AI", fg_color=self.nexus_color, text_color="black", height=50, font=ctk.CTkFont(size=16, weight="bold"), hover_color="#0088cc", command=self.toggle_nexus)
         self.nexus_btn.grid(row=4, column=0, columnspan=2, pady=30, padx=40, sticky="ew")
 
+    def build_diagnostics_ui(self):
+        self.tab_diag.grid_columnconfigure((0,1), weight=1)
+        ctk.CTkLabel(self.tab_diag, text="ENGINE OVERHEAD", font=ctk.CTkFont(size=24, weight="bold"), text_color="gray").grid(row=0, column=0, columnspan=2, pady=20)
+        self.diag_label = ctk.CTkLabel(self.tab_diag, text="Collecting...", font=ctk.CTkFont("Consolas", 12), text_color="white", justify="left", anchor="w")
+        self.diag_label.grid(row=1, column=0, columnspan=2, sticky="ew", padx=20)
+
+        self.diag_profile = ctk.CTkSwitch(self.tab_diag, text="Profile Overruns (sample stacks)", progress_color="#666666",
+                                          command=lambda: self.instruments.enable_profiler(bool(self.diag_profile.get())))
+        self.diag_profile.grid(row=2, column=0, pady=20, sticky="w", padx=40)
+        ctk.CTkButton(self.tab_diag, text="EXPORT JSON", fg_color="#333333", height=40, command=self.export_diagnostics).grid(row=2, column=1, pady=20, padx=40, sticky="ew")
+
+    def export_diagnostics(self):
+        try: self.log(f"[DIAG] Dump written to {os.path.abspath(self.instruments.write_dump())}")
+        except OSError as e: self.log(f"[DIAG] Dump failed: {e}")
+
     def create_metric_card(self, parent, title, value, row, col, color):
         frame = ctk.CTkFrame(parent, fg_color="#1a1a1a", corner_radius=15, height=100)
         frame.grid(row=row, column=col, sticky="nsew", padx=10, pady=10)
@@ -170,21 +259,21 @@ class DualEngineApp(ctk.CTk): # type: ignore
         return label_value
 
     def log(self, message):
-        self.console.insert("end", f"> {message}\n")
-        self.console.see("end")
+        # Safe from any thread: lines are batched into one insert per frame
+        self.view.log(f"> {message}")
 
     def update_metrics(self):
+        self.refresh_metrics()
+        self.after(1000, self.update_metrics)
+
+    @measured("update_live_feed")
+    def refresh_metrics(self):
         try:
-            cpu = psutil.cpu_percent(interval=None) # Non-blocking
-            ram = psutil.virtual_memory()
-            
-            for label in [self.apex_cpu, self.trinity_cpu]:
-                label.configure(text=f"{cpu}%")
-            for label in [self.apex_ram, self.trinity_ram]:
-                label.configure(text=f"{ram.percent}%")
-                
+            snap = self.sampler.snapshot() # Cached, non-blocking
+            # Unchanged values cost no widget work (see viewmodel.py)
+            self.view.update({"cpu": f"{snap.cpu}%", "ram": f"{snap.ram}%"})
+            if self.engine_tabs.get() == "DIAGNOSTICS": self.view.set("diag.text", format_panel(self.instruments.dump()))
         except Exception: pass
-        self.after(1000, self.update_metrics)
 
     # --- APEX LOGIC ---
     def toggle_apex(self):
@@ -192,17 +281,18 @@ class DualEngineApp(ctk.CTk): # type: ignore
             self.boost_active_apex = True
             self.apex_btn.configure(text="DEACTIVATE APEX", fg_color="gray")
             self.log("APEX ENGINE ENGAGED.")
-            threading.Thread(target=self.run_apex, daemon=True).start()
+            self.scheduler.call_later("apex.engage", 0, self.run_apex)
         else:
             self.boost_active_apex = False
             self.apex_btn.configure(text="ACTIVATE APEX BOOST", fg_color=self.apex_color)
             self.log("APEX ENGINE DISENGAGED.")
+            self.stop_boost_if_idle()
 
     def run_apex(self):
         if self.apex_clean_ram.get():
             self.clean_ram_safe()
         if self.apex_priority.get():
-            threading.Thread(target=self.boost_priority_loop, args=(HIGH_PRIORITY_CLASS,), daemon=True).start()
+            self.start_boost()
 
     # --- TRINITY LOGIC ---
     def toggle_trinity(self):
@@ -210,16 +300,30 @@ class DualEngineApp(ctk.CTk): # type: ignore
             self.boost_active_trinity = True
             self.trinity_btn.configure(text="DISENGAGE GOD MODE", fg_color="gray")
             self.log("TRINITY GOD MODE ENGAGED.")
-            threading.Thread(target=self.run_trinity, daemon=True).start()
+            self.scheduler.call_later("trinity.engage", 0, self.run_trinity)
         else:
             self.boost_active_trinity = False
             self.trinity_btn.configure(text="ENGAGE GOD MODE", fg_color=self.trinity_color)
             self.log("TRINITY GOD MODE DISENGAGED.")
+            self.stop_boost_if_idle()
 
     def run_trinity(self):
         self.log("[TRINITY] INITIATING GOD PROTOCOLS...")
         if self.trinity_clean_ram.get(): self.clean_ram_aggressive()
-        if self.trinity_priority.get(): threading.Thread(target=self.boost_priority_loop, args=(REALTIME_PRIORITY_CLASS,), daemon=True).start()
+        if self.trinity_priority.get(): self.start_boost()
+
+    # --- BOOST JOB (shared by APEX and TRINITY, never duplicated) ---
+    def start_boost(self):
+        self.scheduler.every("boost.priority", BOOST_INTERVAL, self.boost_priority_tick, first_delay=0)
+
+    def stop_boost_if_idle(self):
+        # Cancel + restore run on the scheduler thread, so they never interleave with a boost tick
+        self.scheduler.call_later("boost.stop", 0, self.stop_boost_job)
+
+    def stop_boost_job(self):
+        if self.boost_active_apex or self.boost_active_trinity: return # re-engaged meanwhile
+        self.scheduler.cancel("boost.priority")
+        self.priority.apply({}) # launch profiles stay pinned
 
     # --- NEXUS AI LOGIC ---
     def toggle_nexus(self):
@@ -228,117 +332,149 @@ class DualEngineApp(ctk.CTk): # type: ignore
             self.nexus_btn.configure(text="DEACTIVATE NEXUS AI", fg_color="gray")
             self.nexus_status.configure(text="AI STATE: MONITORING & LEARNING", text_color=self.nexus_color)
             self.log("[NEXUS] AI Neural Net Loaded. Scanning for bottlenecks...")
-            threading.Thread(target=self.run_nexus_core, daemon=True).start()
+            self.scheduler.every("nexus.core", NEXUS_INTERVAL, self.nexus_core_tick, first_delay=0)
+            self.scheduler.call_later("launch.start", 0, self.launches.start)
         else:
             self.nexus_ai_active = False
+            self.scheduler.cancel("nexus.core")
+            self.scheduler.call_later("launch.stop", 0, self.launches.stop)
             self.nexus_btn.configure(text="ACTIVATE NEXUS AI", fg_color=self.nexus_color)
             self.nexus_status.configure(text="AI STATE: STANDBY", text_color="gray")
             self.log("[NEXUS] AI Systems Offline. Data saved.")
             self.save_ai_memory()
 
-    def run_nexus_core(self):
-        # The Brain of the operation
-        while self.nexus_ai_active:
-            try:
-                cpu = psutil.cpu_percent(interval=1)
-                ram = psutil.virtual_memory().percent
-                
-                # Detect Active Game/App
+    @measured("neural_tick")
+    def nexus_core_tick(self):
+        # The Brain of the operation (one pass per scheduler tick; each phase timed under the engine's names)
+        if not self.nexus_ai_active: return
+        try:
+            snap = self.sampler.snapshot() # Latest shared tick
+            cpu = snap.cpu
+            ram = snap.ram
+            limits = self.limits
+            measure = self.instruments.measure
+
+            # 1. RECORDING PHASE
+            with measure("cortex_analyze"):
+                # Detect Active Game/App (falls back to the heaviest process)
                 active_process = self.get_active_window_process_name()
-                
-                # 1. RECORDING PHASE
-                if self.nexus_learn.get() and active_process:
-                    if cpu > 85 or ram > 85:
-                        self.log(f"[NEXUS] LAG DETECTED in {active_process} (CPU:{cpu}% RAM:{ram}%)")
-                        if active_process not in self.process_stats:
-                            self.process_stats[active_process] = {"lag_count": 0, "bottleneck_type": "none"} # type: ignore
-                        self.process_stats[active_process]["lag_count"] += 1 # type: ignore
-                        
-                        if cpu > 85: self.process_stats[active_process]["bottleneck_type"] = "CPU" # type: ignore
-                        elif ram > 85: self.process_stats[active_process]["bottleneck_type"] = "RAM" # type: ignore
-                        
-                        self.nexus_info_label.configure(text=f"Bottlenecks Detected: {len(self.process_stats)}\nLast Limit: {active_process}")
-
-                # 2. ACTION PHASE
-                if self.nexus_auto.get():
-                    if ram > 85:
-                        self.log("[NEXUS] RAM Critical! Engaging Flux Capacitor...")
-                        self.clean_ram_aggressive()
-                    
-                    if cpu > 90:
-                        self.log("[NEXUS] CPU Critical! Engaging Neural Priority...")
-                         # Auto-enable Trinity priority if not already on
-                        if not self.boost_active_trinity:
-                            self.clean_temp_files() # Quick temp clean to help I/O
-                            # We can't easily start a thread from a thread without care, but we can call the util matches
-                            pass 
-
-                # 3. PREDICTION PHASE
-                if active_process in self.process_stats:
-                    stats = self.process_stats[active_process]
-                    if stats["lag_count"] > 2:
-                        # Known heavy app
-                        if not self.boost_active_trinity and not self.boost_active_apex:
-                            self.log(f"[NEXUS] KNOWN HEAVY APP '{active_process}' detected. Pre-allocating resources.")
-                            # Auto-trigger optimizers without full mode switch
-                            if stats["bottleneck_type"] == "RAM":
-                                self.clean_ram_safe()
-            except Exception: pass
-            
-            time.sleep(2)
+                self.proctable.refresh()
+                consumers = self.proctable.top_names(3, "cpu" if cpu > limits["cpu_limit_soft"] else "rss")
+                if not active_process and consumers: active_process = consumers[0][0]
+
+                self.signals.sample()
+                bottleneck = self.signals.classify(cpu, ram, limits["cpu_limit_soft"], limits["ram_limit_soft"])
+                lagging = active_process if self.nexus_learn.get() and bottleneck else None
+                for app in [a for a in self.lag_episodes if a != lagging]:
+                    # Episode over: its duration feeds the app's sketch
+                    self.ai_journal.append({"app": app, "end": max(0.0, snap.ts - self.lag_episodes.pop(app))})
+                if lagging:
+                    start = lagging not in self.lag_episodes
+                    if start: self.lag_episodes[lagging] = snap.ts
+                    self.log(f"[NEXUS] {bottleneck} LAG DETECTED in {active_process} (CPU:{cpu}% RAM:{ram}%)")
+                    self.log(f"[NEXUS] Top consumers: {', '.join(name for name, _ in consumers)}")
+                    self.ai_journal.append({"app": active_process, "type": bottleneck, "ts": snap.ts, "cpu": cpu, "ram": ram, "start": start})
+
+                    self.view.set("nexus.info", f"Bottlenecks Detected: {len(self.process_stats)}\nLast Limit: {active_process}")
+
+            # 2. ACTION PHASE
+            if self.nexus_auto.get():
+                with measure("sentinel_react"):
+                    self.policy_react(snap, active_process)
+
+            # 3. PREDICTION PHASE
+            with measure("oracle_predict"):
+                prediction = self.oracle.predict("ram", limits["ram_limit_soft"])
+                if prediction and self.nexus_auto.get():
+                    eta, forecast = prediction
+                    self.log(f"[NEXUS] ORACLE: RAM will cross {limits['ram_limit_soft']}% in ~{eta:.0f}s. Acting early.")
+                    self.actions.trigger("flux_capacitor", snap, value=forecast)
+        except Exception: pass
+
+    def launch_profile(self, name):
+        # Known heavy app starting: decided on the recorded distribution (recurring + long or deep spikes)
+        stats = self.process_stats.get(name)
+        return derive_profile(name, stats, (stats or {}).get("profile"), self.limits["cpu_limit_soft"], self.limits["ram_limit_soft"])
+
+    def tighten_sampling(self, on):
+        # While a profiled app runs, sample and analyse it more closely
+        self.sampler.retune(LAUNCH_SAMPLE_INTERVAL if on else self.sampler.base_interval)
+        self.scheduler.set_interval("nexus.core", LAUNCH_NEXUS_INTERVAL if on else NEXUS_INTERVAL, reschedule=True)
+
+    def policy_react(self, snap, active_process):
+        # Rules decide what is wanted (flux capacitor on RAM, temp clean on critical CPU, ...), the executor whether it may run now
+        policy = self.policy
+        ctx = policy.context(snap, **self.signals.latest)
+        ctx["boost.trinity"] = self.boost_active_trinity
+        ctx["boost.apex"] = self.boost_active_apex
+        if policy.uses("app."):
+            profile = (self.process_stats.get(active_process) or {}).get("profile")
+            ctx.update(app_fields(active_process, profile, self.limits["cpu_limit_soft"], self.limits["ram_limit_soft"]))
+        procs = ()
+        if policy.has_process_rules():
+            foreground_pid, _ = self.foreground.resolve_pid()
+            procs = policy.process_views(self.proctable, snap.ts, foreground_pid)
+        fired, matches = policy.evaluate(ctx, procs)
+        for name in policy.due_actions(fired, self.actions):
+            if self.actions.trigger(name, snap) and name == "temp_clean": # Quick temp clean to help I/O
+                self.log("[NEXUS] CPU Critical! Quick temp clean deployed.")
+        for rule in fired:
+            for action in rule.then:
+                if action not in self.actions.actions: self.policy_action(action, rule)
+        for rule, proc in policy.fresh(matches, snap.ts):
+            for action in rule.then: self.policy_action(action, rule, proc)
+
+    def policy_action(self, action, rule, proc=None):
+        # Rule actions that are not executor actions (unknown names are ignored)
+        if action == "notify":
+            self.log(f"[POLICY] Rule '{rule.name}' matched" + (f" for {proc[1]} (pid {proc[0]})." if proc else "."))
+        elif action == "clean_ram":
+            self.clean_ram_safe()
+        elif action == "trim" and proc:
+            self.clean_ram_safe(proc[0])
 
     # --- SHARED UTILS ---
     def get_active_window_process_name(self):
         try:
-            if os.name == 'nt':
-                hwnd = ctypes.windll.user32.GetForegroundWindow() # type: ignore
-                pid = ctypes.c_ulong()
-                ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid)) # type: ignore
-                p = psutil.Process(pid.value)
-                return p.name()
+            return self.foreground.resolve()
         except: return None
 
-    def clean_ram_safe(self):
+    def clean_ram_safe(self, pid=None):
         try:
             if os.name == 'nt':
-                PID = os.getpid()
+                PID = pid or os.getpid()
                 handle = ctypes.windll.kernel32.OpenProcess(0x1F0FFF, False, PID) # type: ignore
                 ctypes.windll.psapi.EmptyWorkingSet(handle) # type: ignore
                 ctypes.windll.kernel32.CloseHandle(handle) # type: ignore
         except: pass
 
+    def nexus_flux_capacitor(self):
+        self.log("[NEXUS] RAM Critical! Engaging Flux Capacitor...")
+        self.clean_ram_aggressive()
+
     def clean_ram_aggressive(self):
         self.clean_ram_safe()
 
     def clean_temp_files(self):
-        try:
-            temp_dir = os.environ.get('TEMP')
-            if temp_dir:
-                for root, dirs, files in os.walk(temp_dir): # type: ignore
-                    for f in files: # type: ignore
-                        try:
-                           os.remove(os.path.join(root, f)) 
-                        except: pass
-        except: pass
+        # Returns at once; the report is logged when the background run finishes
+        if not self.temp_cleaner.start(on_done=lambda report: self.log(f"[CLEAN] {format_report(report)}")):
+            self.log("[CLEAN] Temp clean already running.")
 
-    def boost_priority_loop(self, priority_level):
-        while self.boost_active_apex or self.boost_active_trinity:
-            try:
-                if os.name == 'nt':
-                    hwnd = ctypes.windll.user32.GetForegroundWindow() # type: ignore
-                    pid = ctypes.c_ulong()
-                    ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid)) # type: ignore
-                    
-                    if pid.value > 0:
-                        p = psutil.Process(pid.value)
-                        target_name = p.name().lower()
-                        if target_name not in ["explorer.exe", "searchui.exe", "lockapp.exe", "python.exe"]:
-                            if self.boost_active_trinity: 
-                                if p.nice() != REALTIME_PRIORITY_CLASS: p.nice(REALTIME_PRIORITY_CLASS)
-                            elif self.boost_active_apex:
-                                if p.nice() != HIGH_PRIORITY_CLASS: p.nice(HIGH_PRIORITY_CLASS)
-            except: pass
-            time.sleep(5)
+    @measured("boost_priority_loop")
+    def boost_priority_tick(self):
+        if not self.boost_active_apex and not self.boost_active_trinity: return
+        try:
+            pid, name = self.foreground.resolve_pid()
+            if not pid or not name or name.lower() in self.policy.skip:
+                self.priority.apply({}) # foreground left the boosted app: give everything back
+                return
+            # Whole tree; TRINITY also pins it to the main cores and parks background hogs
+            if self.boost_active_trinity:
+                self.proctable.refresh()
+                self.priority.boost(pid, LEVEL_REALTIME, isolate=True)
+            else:
+                self.priority.boost(pid, LEVEL_HIGH)
+        except Exception: pass
 
 if __name__ == "__main__":
     app = DualEngineApp() # type: ignore
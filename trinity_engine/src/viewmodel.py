@@ -0,0 +1,144 @@
+import threading
+from collections import deque
+
+# View-model layer between the engines and Tk.
+# Any thread may publish values (set/update) or console lines (log); only the Tk thread
+# calls render(), which pushes the values that actually changed since the last frame
+# (one configure() per widget, however many of its properties changed) and appends all
+# new console lines with a single insert, trimming scrollback to a fixed cap.
+# An idle frame does no widget work at all.
+#   TkBackend   - customtkinter / tkinter widgets
+#   FakeBackend - records every widget operation (tests, benchmarks)
+FRAME_MS = 100
+SCROLLBACK = 500
+PENDING_LINES = 2000 # console lines kept while the Tk thread is behind (or no console bound yet)
+
+class TkBackend:
+    def configure(self, widget, props):
+        progress = props.pop("progress", None)
+        if props: widget.configure(**props)
+        if progress is not None: widget.set(progress) # CTkProgressBar
+
+    def append(self, console, text, trim_lines):
+        console.insert("end", text)
+        if trim_lines: console.delete("1.0", f"{trim_lines + 1}.0")
+        console.see("end")
+
+class FakeWidget:
+    def __init__(self, name=""):
+        self.name = name
+        self.props = {}
+        self.lines = []
+
+class FakeBackend:
+    def __init__(self):
+        self.ops = 0
+        self.calls = []
+
+    def configure(self, widget, props):
+        self.ops += 1
+        self.calls.append(("configure", widget.name, dict(props)))
+        widget.props.update(props)
+
+    def append(self, console, text, trim_lines):
+        self.ops += 1
+        self.calls.append(("append", console.name, text.count("\n")))
+        console.lines.extend(text.splitlines())
+        if trim_lines:
+            self.ops += 1
+            del console.lines[:trim_lines]
+
+class ViewModel:
+    def __init__(self, backend=None, scrollback=SCROLLBACK):
+        self.backend = backend or TkBackend()
+        self.scrollback = scrollback
+        self.bindings = {} # key -> [(widget, prop)]
+        self.values = {} # key -> latest published value
+        self.applied = {} # (id(widget), prop) -> value on screen
+        self.dirty = set()
+        self.lines = deque(maxlen=PENDING_LINES)
+        self.console = None
+        self.console_count = 0
+        self.lock = threading.Lock()
+        self.stats = {"frames": 0, "idle_frames": 0, "configures": 0, "skipped": 0, "inserts": 0, "lines": 0, "lines_dropped": 0}
+
+    # --- WIRING (Tk thread, at build time) ---
+    def bind(self, key, widget, prop="text"):
+        # prop: any configure() option, or "progress" for a progress bar's set()
+        self.bindings.setdefault(key, []).append((widget, prop))
+        with self.lock:
+            if key in self.values: self.dirty.add(key)
+
+    def bind_console(self, widget):
+        self.console = widget
+        self.console_count = 0
+
+    # --- PUBLISH (any thread) ---
+    def set(self, key, value):
+        with self.lock:
+            if self.values.get(key, self) == value: return
+            self.values[key] = value
+            self.dirty.add(key)
+
+    def update(self, values):
+        with self.lock:
+            for key, value in values.items():
+                if self.values.get(key, self) == value: continue
+                self.values[key] = value
+                self.dirty.add(key)
+
+    def log(self, line):
+        with self.lock:
+            if len(self.lines) == self.lines.maxlen: self.stats["lines_dropped"] += 1
+            self.lines.append(line)
+
+    # --- RENDER (Tk thread only) ---
+    def render(self):
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            values = {key: self.values[key] for key in dirty}
+            lines = []
+            if self.console is not None and self.lines:
+                lines = list(self.lines)
+                self.lines.clear()
+        self.stats["frames"] += 1
+        if not values and not lines:
+            self.stats["idle_frames"] += 1
+            return 0
+        ops = 0
+
+        # Group changed properties per widget: one configure() each
+        per_widget = {}
+        for key, value in values.items():
+            for widget, prop in self.bindings.get(key, ()):
+                slot = (id(widget), prop)
+                if self.applied.get(slot, self) == value:
+                    self.stats["skipped"] += 1
+                    continue
+                self.applied[slot] = value
+                per_widget.setdefault(id(widget), (widget, {}))[1][prop] = value
+        for widget, props in per_widget.values():
+            try: self.backend.configure(widget, props)
+            except Exception: pass
+            ops += 1
+        self.stats["configures"] += len(per_widget)
+
+        if lines:
+            # Only the newest `scrollback` lines can survive the trim: do not insert the rest
+            lines = lines[-self.scrollback:]
+            self.console_count += len(lines)
+            trim = max(0, self.console_count - self.scrollback)
+            self.console_count -= trim
+            try: self.backend.append(self.console, "".join(line + "\n" for line in lines), trim)
+            except Exception: pass
+            ops += 1
+            self.stats["inserts"] += 1
+            self.stats["lines"] += len(lines)
+        return ops
+
+    def start(self, root, interval_ms=FRAME_MS):
+        # Frame loop on the Tk event loop
+        def frame():
+            self.render()
+            root.after(interval_ms, frame)
+        root.after(interval_ms, frame)